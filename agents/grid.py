@@ -1,14 +1,14 @@
 from google.adk.agents import LlmAgent
 from prompts.grid import get_grid_instructions
 from tools.grid import (
-    get_caiso_demand,
-    get_caiso_supply_mix,
-    get_caiso_renewable_generation,
-    get_caiso_net_demand,
-    calculate_load_deviation,
-    get_caiso_curtailment,
-    get_caiso_tie_flows,
-    get_caiso_outages,
+    get_caiso_demand_async,
+    get_caiso_supply_mix_async,
+    get_caiso_renewable_generation_async,
+    get_caiso_net_demand_async,
+    calculate_load_deviation_async,
+    get_caiso_curtailment_async,
+    get_caiso_tie_flows_async,
+    get_caiso_outages_async,
 )
 
 GRID_INSTRUCTIONS = get_grid_instructions()
@@ -18,13 +18,13 @@ grid_agent = LlmAgent(
     instruction=GRID_INSTRUCTIONS,
     description="Analyzes real-time grid operations including demand vs forecast deviations, supply mix, renewable generation, net demand, curtailment, and transmission constraints.",
     tools=[
-        get_caiso_demand,
-        get_caiso_supply_mix,
-        get_caiso_renewable_generation,
-        get_caiso_net_demand,
-        calculate_load_deviation,
-        get_caiso_curtailment,
-        get_caiso_tie_flows,
-        get_caiso_outages,
+        get_caiso_demand_async,
+        get_caiso_supply_mix_async,
+        get_caiso_renewable_generation_async,
+        get_caiso_net_demand_async,
+        calculate_load_deviation_async,
+        get_caiso_curtailment_async,
+        get_caiso_tie_flows_async,
+        get_caiso_outages_async,
     ]
 )
\ No newline at end of file
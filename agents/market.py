@@ -1,5 +1,10 @@
 from google.adk.agents import LlmAgent
-from tools.market import get_caiso_market_data
+from tools.market import get_caiso_market_data_async
+from tools.analog_days import find_analog_days_async
+from tools.lmp import get_hub_spread_analytics_async, get_caiso_nodal_lmps_async
+from tools.price_history import get_price_percentiles_async, get_price_spikes_async, get_price_regimes_async, get_weather_conditioned_prices_async
+from tools.dispatch import optimize_battery_dispatch_async
+from tools.utils import search_caiso_nodes_async
 from prompts.market import get_market_instructions
 
 
@@ -8,6 +13,6 @@ MARKET_INSTRUCTIONS = get_market_instructions()
 market_agent = LlmAgent(
     name="CAISO_Market", 
     description="Handles specific CAISO market data requests like Load, Fuel Mix, and LMPs.", 
-    tools=[get_caiso_market_data],
+    tools=[get_caiso_market_data_async, search_caiso_nodes_async, get_hub_spread_analytics_async, get_caiso_nodal_lmps_async, find_analog_days_async, get_price_percentiles_async, get_price_spikes_async, get_price_regimes_async, get_weather_conditioned_prices_async, optimize_battery_dispatch_async],
     instruction=MARKET_INSTRUCTIONS
 )
\ No newline at end of file
@@ -1,7 +1,7 @@
 
 from google.adk.agents import LlmAgent
 from prompts.weather import get_weather_instructions
-from tools.weather import get_weather_locations_for_node, get_weather_forecast, get_caiso_forecasts
+from tools.weather import get_weather_locations_for_node, get_weather_locations_for_nodes, get_weather_forecast_async, get_caiso_forecasts_async, get_caiso_weather_snapshot_async, get_zonal_weather_indices_async
 from dotenv import load_dotenv
 import os
 
@@ -14,5 +14,5 @@ weather_impact_agent = LlmAgent(
     name="Weather_Impact_Analyst",
     instruction=WEATHER_AGENT_INSTRUCTIONS,
     description="Maps CAISO nodes to relevant weather locations and analyzes price impacts.",
-    tools=[get_weather_locations_for_node, get_weather_forecast, get_caiso_forecasts]
+    tools=[get_weather_locations_for_node, get_weather_locations_for_nodes, get_weather_forecast_async, get_caiso_forecasts_async, get_caiso_weather_snapshot_async, get_zonal_weather_indices_async]
 )
\ No newline at end of file
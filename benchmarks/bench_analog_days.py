@@ -0,0 +1,110 @@
+"""
+Benchmark analog-day search over years of synthetic daily profiles.
+
+Builds N days of 24-hour profiles (three hub prices, load, net load, three
+zonal temperatures, solar radiation, wind), indexes them with
+tools.analogs.AnalogIndex and times k-nearest-day queries against the
+previous approach: scoring every hourly row of a DuckDB table against a
+target with a hand-weighted ABS sum (the old db.py "similar spikes" query).
+The index results are checked against a brute-force distance computation.
+
+Usage:
+    python -m benchmarks.bench_analog_days [--days 3650] [--k 10] [--repeat 200]
+"""
+
+import argparse
+import time
+import duckdb
+import numpy as np
+import pandas as pd
+from tools.analogs import AnalogIndex
+
+WIDTHS = {"da_price": 72, "load": 24, "net_load": 24, "temperature_f": 72, "solar_radiation_wm2": 24, "wind_speed_mph": 24}
+
+
+def make_blocks(days: int) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    season = np.sin(np.arange(days) / 365 * 2 * np.pi)[:, None]
+    hour = np.arange(24)[None, :]
+    daily = np.sin((hour - 14) / 24 * 2 * np.pi)
+    blocks = {}
+    for name, width in WIDTHS.items():
+        repeats = width // 24
+        base = np.tile(20 * season + 10 * daily, repeats)
+        weather = rng.normal(0, 5, (days, 1))
+        blocks[name] = base + weather + rng.normal(0, 2, (days, width))
+    # A few gaps, like missing OASIS hours
+    blocks["load"][rng.random(blocks["load"].shape) < 0.01] = np.nan
+    return blocks
+
+
+def brute_force(index: AnalogIndex, target: dict[str, np.ndarray], k: int, exclude: int) -> list[str]:
+    scaled_x, scaled_q = [], []
+    for name in index.names:
+        values = index.raw[name]
+        present = np.isfinite(values)
+        scaled_x.append(np.where(present, (values - index._mean[name]) * index._scale[name], 0.0))
+        q = target[name]
+        scaled_q.append(np.where(np.isfinite(q), (q - index._mean[name]) * index._scale[name], 0.0))
+    x, q = np.hstack(scaled_x), np.concatenate(scaled_q)
+    distance = ((x - q) ** 2).sum(axis=1)
+    distance[exclude] = np.inf
+    return [str(index.dates[i]) for i in np.argsort(distance, kind="stable")[:k]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=3650)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    dates = np.arange(np.datetime64("2016-01-01"), np.datetime64("2016-01-01") + args.days)
+    blocks = make_blocks(args.days)
+    started = time.perf_counter()
+    index = AnalogIndex(dates, blocks)
+    build = time.perf_counter() - started
+    print(f"{args.days} days x {sum(WIDTHS.values())} features, index built in {build * 1000:.1f} ms")
+
+    rng = np.random.default_rng(1)
+    targets = rng.integers(0, args.days, args.repeat)
+    samples, matches = [], 0
+    for t in targets:
+        target = index.vector(dates[t])
+        started = time.perf_counter()
+        analogs = index.query(target, k=args.k, exclude=[dates[t]])
+        samples.append(time.perf_counter() - started)
+        matches += [a["date"] for a in analogs] == brute_force(index, target, args.k, t)
+    print(f"analog index query      {np.median(samples) * 1000:8.2f} ms median   exact match {matches}/{len(targets)}")
+
+    # Previous approach: hourly rows in DuckDB, every row scored against the target with ABS sums
+    times = pd.date_range("2016-01-01", periods=args.days * 24, freq="h")
+    hourly = pd.DataFrame({
+        "timestamp": times,
+        "price_mwh": blocks["da_price"][:, :24].ravel(),
+        "temperature_2m": blocks["temperature_f"][:, :24].ravel(),
+        "cloud_cover": blocks["solar_radiation_wm2"].ravel(),
+        "wind_speed_10m": blocks["wind_speed_mph"].ravel(),
+    })
+    con = duckdb.connect()
+    con.execute("CREATE TABLE grid_data AS SELECT * FROM hourly")
+    sql_samples = []
+    for t in targets[:20]:
+        stamp = times[t * 24 + 18]
+        started = time.perf_counter()
+        con.execute("""
+            WITH target AS (SELECT * FROM grid_data WHERE timestamp = ?)
+            SELECT g.timestamp,
+                   ABS(g.temperature_2m - m.temperature_2m) * 2 + ABS(g.cloud_cover - m.cloud_cover)
+                   + ABS(g.wind_speed_10m - m.wind_speed_10m) AS score
+            FROM grid_data g, target m
+            WHERE g.timestamp != m.timestamp
+            ORDER BY score
+            LIMIT ?
+        """, [stamp, args.k]).fetchall()
+        sql_samples.append(time.perf_counter() - started)
+    print(f"hourly SQL cross join   {np.median(sql_samples) * 1000:8.2f} ms median   ({len(hourly):,} hourly rows, one hour of 4 variables)")
+
+
+if __name__ == "__main__":
+    main()
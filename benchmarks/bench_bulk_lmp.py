@@ -0,0 +1,77 @@
+"""
+Benchmark bulk nodal LMP retrieval against a simulated OASIS.
+
+A fake client answers get_lmp after a fixed latency with hourly prices for the
+requested nodes (or every node for "ALL"). Compares one request per node in a
+loop with tools.bulk_lmp.fetch_lmp_bulk (node batches, concurrent under the
+rate limiter) and reports nodes/second.
+
+Usage:
+    python -m benchmarks.bench_bulk_lmp [--nodes 300] [--days 2] [--latency 0.3]
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from tools.bulk_lmp import fetch_lmp_bulk
+from tools.fetch import OASIS_CONCURRENCY, OASIS_MIN_INTERVAL, RangeFetcher
+
+
+class FakeOasis:
+    """get_lmp with a fixed response latency over a synthetic node universe."""
+
+    def __init__(self, universe: list[str], latency: float):
+        self.universe = universe
+        self.latency = latency
+        self.requests = 0
+
+    def get_lmp(self, date, end, market, locations, sleep=5):
+        self.requests += 1
+        time.sleep(self.latency)
+        nodes = self.universe if locations == "ALL" else locations
+        times = pd.date_range(date, end, freq="h", inclusive="left")
+        rows = len(times) * len(nodes)
+        rng = np.random.default_rng(self.requests)
+        return pd.DataFrame({
+            "Interval Start": np.tile(times, len(nodes)),
+            "Location": np.repeat(nodes, len(times)),
+            "LMP": rng.uniform(10, 80, rows),
+            "Energy": 35.0,
+            "Congestion": rng.normal(0, 5, rows),
+            "Loss": rng.normal(0, 0.5, rows),
+        })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--nodes", type=int, default=300)
+    parser.add_argument("--days", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per simulated OASIS response")
+    parser.add_argument("--baseline-nodes", type=int, default=10, help="nodes timed for the one-per-request loop")
+    args = parser.parse_args()
+
+    universe = [f"NODE_{i:04d}_N001" for i in range(4000)]
+    nodes = universe[:args.nodes]
+    start = pd.Timestamp("2025-06-01", tz="US/Pacific")
+    end = start + pd.Timedelta(days=args.days)
+
+    client = FakeOasis(universe, args.latency)
+    started = time.perf_counter()
+    for node in nodes[:args.baseline_nodes]:
+        client.get_lmp(start, end, "DAY_AHEAD_HOURLY", [node])
+    loop_rate = args.baseline_nodes / (time.perf_counter() - started)
+    print(f"{args.nodes} nodes x {args.days} days, {args.latency * 1000:.0f} ms per OASIS response, "
+          f"{OASIS_CONCURRENCY} concurrent, {OASIS_MIN_INTERVAL}s request spacing")
+    print(f"one request per node            {loop_rate:8.1f} nodes/s   ({args.nodes / loop_rate:.1f} s for all nodes)")
+
+    for market in ["REAL_TIME_5_MIN", "DAY_AHEAD_HOURLY"]:
+        client = FakeOasis(universe, args.latency)
+        df, report = fetch_lmp_bulk(client, nodes, start, end, market=market, fetcher=RangeFetcher())
+        assert not report["missing_nodes"] and df["Location"].dtype == "category"
+        print(f"bulk, {market:<17}      {report['nodes_per_second']:8.1f} nodes/s   "
+              f"({report['seconds']:.1f} s, {report['requests']} requests, {report['rows']:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
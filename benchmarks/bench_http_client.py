@@ -0,0 +1,83 @@
+"""
+Benchmark the shared HTTP client against the local Open-Meteo stub.
+
+Runs the same request sequence with bare requests.get (no session, no timeout,
+no retry) and with tools.http_client.HttpClient, under injected latency,
+failures and hangs, and reports success rate, latency percentiles and how many
+TCP connections each opened.
+
+Usage:
+    python -m benchmarks.bench_http_client [--requests 200] [--latency-ms 20]
+        [--fail-rate 0.1] [--hang-rate 0.01]
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from benchmarks.stub_open_meteo import StubConfig, serve
+from tools.http_client import HttpClient
+
+
+def run(fetch, url: str, count: int, concurrency: int) -> tuple[int, list[float]]:
+    def one(_):
+        started = time.perf_counter()
+        try:
+            fetch(url)
+            return True, time.perf_counter() - started
+        except Exception:
+            return False, time.perf_counter() - started
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, range(count)))
+    return sum(ok for ok, _ in results), [seconds for _, seconds in results]
+
+
+def bare_get(url: str):
+    response = requests.get(url)
+    response.raise_for_status()
+    return response.json()
+
+
+def report(name: str, ok: int, latencies: list[float], config: StubConfig, count: int) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    print(
+        f"{name:<12} success {ok / count:6.1%}  p50 {statistics.median(latencies) * 1000:8.1f} ms"
+        f"  p95 {p95 * 1000:8.1f} ms  max {latencies[-1] * 1000:8.1f} ms"
+        f"  requests {config.requests:5d}  connections {len(config.connections):4d}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--fail-rate", type=float, default=0.1)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=5.0)
+    parser.add_argument("--read-timeout", type=float, default=1.0)
+    args = parser.parse_args()
+
+    for name in ("bare", "HttpClient"):
+        config = StubConfig(args.latency_ms, args.jitter_ms, args.fail_rate, args.hang_rate, args.hang_seconds)
+        server, _ = serve(0, config)
+        url = (
+            f"http://127.0.0.1:{server.server_address[1]}/v1/forecast"
+            "?latitude=34.05&longitude=-118.24&hourly=temperature_2m"
+        )
+        if name == "bare":
+            fetch = bare_get
+        else:
+            client = HttpClient(read_timeout=args.read_timeout, backoff_base=0.05, pool_size=args.concurrency)
+            fetch = client.get_json
+        ok, latencies = run(fetch, url, args.requests, args.concurrency)
+        report(name, ok, latencies, config, args.requests)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
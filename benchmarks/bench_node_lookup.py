@@ -0,0 +1,79 @@
+"""
+Benchmark node geography lookups on a synthetic CAISO node list.
+
+Writes N random nodes inside California's bounding box to a temporary CSV,
+loads it with tools.nodes.NodeGeography and reports load time, per-node and
+bulk lookup latency, and grid-index nearest-node queries against a brute-force
+haversine scan (checking both return the same node).
+
+Usage:
+    python -m benchmarks.bench_node_lookup [--nodes 5000] [--queries 2000]
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+import numpy as np
+from tools.nodes import NodeGeography, haversine_km
+from tools.weather import CAISO_WEATHER_POINTS
+
+
+def write_nodes(path: str, count: int) -> list[str]:
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(32.5, 42.0, count)
+    lons = rng.uniform(-124.3, -114.1, count)
+    ids = [f"NODE_{i:05d}_GEN-APND" for i in range(count)]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["node_id", "lat", "lon"])
+        writer.writerows(zip(ids, lats, lons))
+    return ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--nodes", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nodes.csv")
+        ids = write_nodes(path, args.nodes)
+
+        geography = NodeGeography(CAISO_WEATHER_POINTS, path=path, price_files="")
+        started = time.perf_counter()
+        len(geography)
+        print(f"load {args.nodes} nodes            {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+        rng = np.random.default_rng(1)
+        sample = [ids[i] for i in rng.integers(0, len(ids), args.queries)]
+        started = time.perf_counter()
+        for node_id in sample:
+            geography.lookup(node_id)
+        print(f"lookup (zone + nearest points)  {(time.perf_counter() - started) / args.queries * 1e6:9.1f} us/node")
+
+        started = time.perf_counter()
+        geography.lookup_many(sample)
+        print(f"lookup_many {args.queries} nodes       {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+        query_lats = rng.uniform(32.5, 42.0, args.queries)
+        query_lons = rng.uniform(-124.3, -114.1, args.queries)
+        index = geography.index
+        started = time.perf_counter()
+        grid = [index.nearest(lat, lon)[0][0] for lat, lon in zip(query_lats, query_lons)]
+        grid_us = (time.perf_counter() - started) / args.queries * 1e6
+
+        started = time.perf_counter()
+        brute = [
+            int(np.argmin(haversine_km(lat, lon, index.lats, index.lons)))
+            for lat, lon in zip(query_lats, query_lons)
+        ]
+        brute_us = (time.perf_counter() - started) / args.queries * 1e6
+        print(f"nearest node, grid index        {grid_us:9.1f} us/query")
+        print(f"nearest node, brute force       {brute_us:9.1f} us/query   match {grid == brute}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark CAISO node search on a synthetic node list.
+
+Generates N CAISO-style node IDs (hubs, LAPs, pnodes such as MOSSLD_2_PSP1
+and their -APND aggregates), builds tools.node_search.NodeSearchIndex and
+reports build time and per-query latency for exact, prefix, name-part,
+misspelled and filtered queries, next to a linear substring scan over the
+same list (the previous implementation, minus its OASIS download).
+
+Usage:
+    python -m benchmarks.bench_node_search [--nodes 15000] [--repeat 200]
+"""
+
+import argparse
+import random
+import string
+import time
+import numpy as np
+from tools.node_search import NodeSearchIndex, name_zone, node_type
+
+QUERIES = ["TH_SP15_GEN-APND", "TH_NP", "MOSSLD", "MOSSLND", "BELLOTA_7", "sp15 hub", "dlap", "ALAM", "N101"]
+
+
+def make_ids(count: int) -> list[str]:
+    rng = random.Random(0)
+    ids = ["TH_NP15_GEN-APND", "TH_SP15_GEN-APND", "TH_ZP26_GEN-APND", "DLAP_PGAE-APND", "DLAP_SCE-APND", "DLAP_SDGE-APND", "DLAP_VEA-APND"]
+    ids += ["MOSSLD_2_PSP1", "MOSSLD_2_PSP1-APND", "BELLOTA_7_N101", "ALAMT1G_7_B1"]
+    while len(ids) < count:
+        station = "".join(rng.choices(string.ascii_uppercase, k=rng.randint(4, 7)))
+        suffix = rng.choice(["N001", "N101", "B1", "PSP1", "GN", "LD1", "UNIT1"])
+        node_id = f"{station}_{rng.randint(1, 7)}_{suffix}"
+        ids.append(node_id)
+        if rng.random() < 0.3:
+            ids.append(f"{node_id}-APND")
+        if rng.random() < 0.02:
+            ids.append(f"SLAP_{station}-APND")
+    return ids[:count]
+
+
+def timed(fn, repeat: int) -> float:
+    """Median microseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return float(np.median(samples)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--nodes", type=int, default=15000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    ids = make_ids(args.nodes)
+    records = [{"node_id": node_id, "type": node_type(node_id), "zone": name_zone(node_id)} for node_id in ids]
+    started = time.perf_counter()
+    index = NodeSearchIndex(records)
+    print(f"{len(ids)} nodes, index built in {(time.perf_counter() - started) * 1000:.0f} ms\n")
+
+    print(f"{'query':<18} {'linear scan':>12} {'index':>10}   top match")
+    for query in QUERIES:
+        linear = timed(lambda: [n for n in ids if query.lower() in n.lower()][:10], args.repeat)
+        indexed = timed(lambda: index.search(query, limit=10), args.repeat)
+        matches = index.search(query, limit=10)
+        top = f"{matches[0]['node_id']} ({matches[0]['match']})" if matches else "-"
+        print(f"{query:<18} {linear:>9.0f} us {indexed:>7.0f} us   {top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark the pooled price analytics against one shared connection.
+
+Generates monthly CSVs of synthetic hourly prices for N sites (same layout as
+benchmarks.bench_price_store), ingests them into a tools.price_store.PriceStore
+and runs a mix of spike-ranking and regime queries from C concurrent sessions:
+first through a single DuckDB connection behind a lock (how a shared
+connection has to be used from threads), then through a
+tools.price_analytics.PriceAnalytics pool of one cursor and of P cursors.
+Then mixes in full-year scans (one in every --scan-every queries) and
+reports the latency of the short queries stuck behind them. Reports
+throughput and per-query latency for each.
+
+Concurrent cursors share DuckDB's threads, so the pool only raises
+throughput with more than one core; run this on the deployment's core count
+before changing GRIDPILOT_ANALYTICS_CONNECTIONS.
+
+Usage:
+    python -m benchmarks.bench_price_analytics [--sites 200] [--days 365] [--sessions 8] [--pool 4] [--queries 64] [--scan-every 8]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import duckdb
+from benchmarks.bench_price_store import write_csvs
+from tools.price_analytics import FILTER_PARAMS, QUERIES, VIEW_NAME, PriceAnalytics
+from tools.price_store import PriceStore
+
+ZONES = ["NP15", "SP15", "ZP26"]
+
+
+def workload(n: int) -> list[tuple[str, dict]]:
+    """n queries cycling through zones, months and query kinds."""
+    calls = []
+    for i in range(n):
+        month = f"2025-{i % 12 + 1:02d}"
+        params = {"zone": ZONES[i % 3], "first_month": month, "last_month": month}
+        if i % 3 == 0:
+            calls.append(("spikes", {**params, "top": 10}))
+        elif i % 3 == 1:
+            calls.append(("regimes", {**params, "p95": 80.0, "p99": 88.0}))
+        else:
+            calls.append(("regime_hours", {**params, "p95": 80.0}))
+    return calls
+
+
+def with_scans(calls: list[tuple[str, dict]], every: int) -> list[tuple[str, dict]]:
+    """Every `every`-th query replaced by a regimes scan of the whole year across all zones."""
+    scan = ("regimes", {"p95": 80.0, "p99": 88.0})
+    return [scan if i % every == every - 1 else call for i, call in enumerate(calls)]
+
+
+def run(execute, calls: list[tuple[str, dict]], sessions: int, scans: bool = False) -> tuple[float, list[float]]:
+    """Wall time and sorted latencies, of the short queries only when `scans`."""
+    latencies = []
+
+    def timed(call):
+        started = time.perf_counter()
+        execute(*call)
+        if not (scans and "zone" not in call[1]):
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(sessions) as pool:
+        list(pool.map(timed, calls))
+    return time.perf_counter() - started, sorted(latencies)
+
+
+def report(name: str, wall: float, latencies: list[float]) -> None:
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000
+    print(f"{name:<34} {len(latencies) / wall:>8.1f} q/s {p50:>9.1f} ms {p95:>9.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sites", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--pool", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--scan-every", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_dir = os.path.join(tmp, "csv")
+        os.makedirs(csv_dir)
+        store = PriceStore(os.path.join(tmp, "prices"))
+        for path in write_csvs(csv_dir, args.sites, args.days):
+            store.ingest(path)
+        calls = workload(args.queries)
+
+        con = duckdb.connect()
+        store.create_view(con, VIEW_NAME)
+        lock = threading.Lock()
+
+        def shared(name, params):
+            sql, extra = QUERIES[name]
+            bound = {key: params.get(key) for key in (*FILTER_PARAMS, *extra)}
+            with lock:
+                return con.execute(sql, bound).df()
+
+        single = PriceAnalytics(store, size=1)
+        pooled = PriceAnalytics(store, size=args.pool)
+        for analytics in (single, pooled):
+            analytics.query(*calls[0])
+        mixed = with_scans(calls, args.scan_every)
+
+        cores = os.cpu_count() or 1
+        (threads,) = con.execute("SELECT current_setting('threads')").fetchone()
+        print(f"{args.sites} sites x {args.days} days, {args.queries} queries from {args.sessions} sessions, "
+              f"{cores} cores, DuckDB threads {threads}")
+        if cores == 1:
+            print("one core: concurrent cursors cannot raise throughput here, only shorten waits behind long scans")
+        print(f"\n{'':<34} {'throughput':>12} {'p50':>12} {'p95':>12}")
+        report("shared connection + lock", *run(shared, calls, args.sessions))
+        report("pool of 1 cursor", *run(single.query, calls, args.sessions))
+        report(f"pool of {args.pool} cursors", *run(pooled.query, calls, args.sessions))
+        report(f"1 cursor, scan every {args.scan_every}", *run(single.query, mixed, args.sessions, scans=True))
+        report(f"{args.pool} cursors, scan every {args.scan_every}", *run(pooled.query, mixed, args.sessions, scans=True))
+        print(f"\npool waits: 1 cursor {single.stats()['waits']}, {args.pool} cursors {pooled.stats()['waits']}")
+
+
+if __name__ == "__main__":
+    main()
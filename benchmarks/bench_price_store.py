@@ -0,0 +1,123 @@
+"""
+Benchmark the partitioned price store against querying the raw CSVs.
+
+Generates a year of hourly DA/RT prices for N sites (one CSV per month, in
+the layout of data/caiso_combined_prices_*.csv), ingests them into a
+tools.price_store.PriceStore, and times typical lookups - one node over a
+week, one zone over a month, everything over a quarter - against the
+previous approach of loading the CSVs into DuckDB on every run.
+
+Usage:
+    python -m benchmarks.bench_price_store [--sites 500] [--days 365] [--repeat 5]
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+import duckdb
+import pandas as pd
+from tools.price_store import PriceStore
+
+ZONES = ["NP15", "SP15", "ZP26"]
+
+
+def write_csvs(directory: str, sites: int, days: int) -> list[str]:
+    """One CSV per month of synthetic hourly prices, generated in DuckDB."""
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    con.execute(f"""
+        CREATE TABLE prices AS
+        WITH hours AS (
+            SELECT unnest(range(TIMESTAMPTZ '2025-01-01 08:00:00+00', TIMESTAMPTZ '2025-01-01 08:00:00+00' + INTERVAL {days} DAY, INTERVAL 1 HOUR)) AS timestamp
+        ), sites AS (
+            SELECT i, 'Site ' || i || ' Solar & Storage' AS site, ['{"', '".join(ZONES)}'][1 + i % 3] AS zone,
+                   'NODE' || lpad(i::VARCHAR, 5, '0') || '_7_N001' AS node
+            FROM range({sites}) t(i)
+        )
+        SELECT timestamp,
+               40 + 20 * sin(hour(timestamp) / 24 * 2 * pi()) + (hash(i, timestamp) % 1000) / 100.0 AS da_price_mwh,
+               38 + 25 * sin(hour(timestamp) / 24 * 2 * pi()) + (hash(timestamp, i) % 3000) / 100.0 AS rt_price_mwh,
+               rt_price_mwh - da_price_mwh AS price_spread_mwh,
+               site, zone, node
+        FROM hours, sites
+    """)
+    paths = []
+    for (month,) in con.execute("SELECT DISTINCT strftime(timestamp, '%Y-%m') FROM prices ORDER BY 1").fetchall():
+        path = os.path.join(directory, f"caiso_combined_prices_{month}.csv")
+        con.execute(f"COPY (SELECT * FROM prices WHERE strftime(timestamp, '%Y-%m') = '{month}') TO '{path}' (HEADER)")
+        paths.append(path)
+    return paths
+
+
+def best_of(fn, repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(f) for f in glob.glob(os.path.join(path, "**", "*"), recursive=True) if os.path.isfile(f))
+
+
+def rollups_size(path: str) -> int:
+    """Rollup database file plus any write-ahead log not yet checkpointed."""
+    return sum(os.path.getsize(f) for f in (path, path + ".wal") if os.path.exists(f))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sites", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_dir = os.path.join(tmp, "csv")
+        os.makedirs(csv_dir)
+        paths = write_csvs(csv_dir, args.sites, args.days)
+        store = PriceStore(os.path.join(tmp, "prices"))
+
+        started = time.perf_counter()
+        rows = sum(store.ingest(path)["rows"] for path in paths)
+        ingest = time.perf_counter() - started
+        started = time.perf_counter()
+        store.ingest(paths[0])
+        reingest = time.perf_counter() - started
+        print(f"{rows:,} rows, {args.sites} sites x {args.days} days, {len(paths)} files")
+        print(f"CSV {dir_size(csv_dir) / 1e6:.0f} MB -> store {dir_size(store.root) / 1e6:.0f} MB "
+              f"(+ rollups {rollups_size(store.rollups_path) / 1e6:.0f} MB), "
+              f"ingested in {ingest:.1f} s (re-ingest of a seen file {reingest * 1000:.0f} ms)\n")
+
+        node = "NODE00042_7_N001"
+        cases = [
+            ("one node, one week", dict(start="2025-06-01", end="2025-06-08", nodes=[node]),
+             f"node = '{node}' AND timestamp >= TIMESTAMPTZ '2025-06-01 00:00:00-07' AND timestamp < TIMESTAMPTZ '2025-06-08 00:00:00-07'"),
+            ("one zone, one month", dict(start="2025-07-01", end="2025-08-01", zones=["SP15"]),
+             "zone = 'SP15' AND timestamp >= TIMESTAMPTZ '2025-07-01 00:00:00-07' AND timestamp < TIMESTAMPTZ '2025-08-01 00:00:00-07'"),
+            ("all sites, one quarter", dict(start="2025-04-01", end="2025-07-01"),
+             "timestamp >= TIMESTAMPTZ '2025-04-01 00:00:00-07' AND timestamp < TIMESTAMPTZ '2025-07-01 00:00:00-07'"),
+        ]
+
+        def from_csv(where: str) -> pd.DataFrame:
+            # The previous db.py flow: rebuild an in-memory table from the CSVs, then query it
+            con = duckdb.connect()
+            con.execute("CREATE TABLE grid_data AS SELECT * FROM read_csv_auto(?)", [paths])
+            return con.execute(f"SELECT * FROM grid_data WHERE {where}").df()
+
+        print(f"{'query':<24} {'CSV load + query':>17} {'store':>10} {'partitions':>11}   rows  match")
+        for name, kwargs, where in cases:
+            csv_time, expected = best_of(lambda: from_csv(where), max(1, args.repeat // 2))
+            store_time, result = best_of(lambda: store.query(**kwargs), args.repeat)
+            partitions = len(store.partitions(kwargs.get("start"), kwargs.get("end"), kwargs.get("zones")))
+            total = len(store.partitions())
+            match = len(result) == len(expected) and (result.empty or abs(result["rt_price_mwh"].sum() - expected["rt_price_mwh"].sum()) < 1e-6 * max(1, len(result)))
+            print(f"{name:<24} {csv_time * 1000:>14.0f} ms {store_time * 1000:>7.0f} ms {partitions:>5}/{total:<5} {len(result):>7}  {match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Benchmark the grid tool result builders on synthetic 100k-row frames.
+
+Compares the original row-wise (iterrows) builders against the columnar
+builders in tools/grid.py, checks they produce the same records, and
+prints per-row cost for each.
+
+Usage:
+    python -m benchmarks.bench_result_builders [--rows 100000] [--repeat 3]
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from tools import grid
+
+
+def make_deviation_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    start = pd.date_range("2025-01-01", periods=rows, freq="h", tz="US/Pacific")
+    load = rng.normal(30_000, 5_000, rows)
+    forecast = load + rng.normal(0, 1_500, rows)
+    merged = pd.DataFrame({
+        "Interval Start": start,
+        "Interval End": start + pd.Timedelta(hours=1),
+        "Load": load,
+        "Load Forecast": forecast,
+    })
+    merged["Deviation MW"] = merged["Load"] - merged["Load Forecast"]
+    merged["Deviation Pct"] = (merged["Deviation MW"] / merged["Load Forecast"]) * 100
+    merged["Hour"] = merged["Interval Start"].dt.hour
+    return merged
+
+
+def make_tie_flow_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({
+        "Interface ID": [f"IF_{i % 500}" for i in range(rows)],
+        "Tie Name": [f"TIE_{i}" for i in range(rows)],
+        "From BAA": "CISO",
+        "To BAA": [f"BAA_{i % 20}" for i in range(rows)],
+        "MW": rng.normal(0, 500, rows),
+    })
+
+
+def make_as_price_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(2)
+    frame = pd.DataFrame({"Region": [f"AS_REGION_{i}" for i in range(rows)]})
+    for column in grid.AS_PRICE_COLUMNS.values():
+        frame[column] = rng.uniform(0, 50, rows)
+    return frame
+
+
+def make_constraint_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        "Location": [f"CONSTRAINT_{i}" for i in range(rows)],
+        "Price": rng.uniform(1, 500, rows),
+        "Constraint Cause": [f"CAUSE_{i % 10}" for i in range(rows)],
+    })
+
+
+def make_outage_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(4)
+    start = pd.Series(pd.date_range("2025-01-01", periods=rows, freq="min", tz="US/Pacific"))
+    end = start + pd.Timedelta(hours=4)
+    end[::7] = pd.NaT
+    return pd.DataFrame({
+        "Resource Name": [f"RESOURCE_{i}" for i in range(rows)],
+        "Resource ID": [f"RID_{i}" for i in range(rows)],
+        "Outage Type": np.where(np.arange(rows) % 3, "FORCED", "PLANNED"),
+        "Nature of Work": "Plant Maintenance",
+        "Curtailment MW": rng.uniform(0, 300, rows),
+        "Resource PMAX MW": rng.uniform(300, 800, rows),
+        "Curtailment Start Time": start,
+        "Curtailment End Time": end,
+    })
+
+
+# Row-wise reference builders, as the tools implemented them before the columnar rewrite
+
+def rowwise_deviations(merged: pd.DataFrame) -> list[dict]:
+    deviations = []
+    for _, row in merged.iterrows():
+        deviations.append({
+            "hour_ending": int(row["Hour"]) + 1,
+            "interval_start": row["Interval Start"].isoformat(),
+            "da_forecast_mw": float(row["Load Forecast"]),
+            "rt_actual_mw": float(row["Load"]),
+            "deviation_mw": float(row["Deviation MW"]),
+            "deviation_pct": round(float(row["Deviation Pct"]), 2),
+            "significant": abs(row["Deviation MW"]) > 2000,
+        })
+    return deviations
+
+
+def rowwise_tie_flows(latest_df: pd.DataFrame) -> list[dict]:
+    interfaces = []
+    for _, row in latest_df.iterrows():
+        interfaces.append({
+            "interface_id": row["Interface ID"],
+            "tie_name": row["Tie Name"],
+            "from_baa": row["From BAA"],
+            "to_baa": row["To BAA"],
+            "flow_mw": float(row["MW"]),
+            "direction": "import" if row["MW"] < 0 else "export",
+        })
+    return interfaces
+
+
+def rowwise_as_prices(latest_df: pd.DataFrame) -> dict:
+    prices_by_region = {}
+    for _, row in latest_df.iterrows():
+        prices_by_region[row["Region"]] = {
+            "regulation_up": float(row.get("Regulation Up", 0)),
+            "regulation_down": float(row.get("Regulation Down", 0)),
+            "spinning_reserves": float(row.get("Spinning Reserves", 0)),
+            "non_spinning_reserves": float(row.get("Non-Spinning Reserves", 0)),
+            "regulation_mileage_up": float(row.get("Regulation Mileage Up", 0)),
+            "regulation_mileage_down": float(row.get("Regulation Mileage Down", 0)),
+        }
+    return prices_by_region
+
+
+def rowwise_constraints(binding: pd.DataFrame) -> list[dict]:
+    constraints = []
+    for _, row in binding.iterrows():
+        constraints.append({
+            "location": row["Location"],
+            "shadow_price": float(row["Price"]),
+            "constraint_cause": row.get("Constraint Cause", "Unknown"),
+        })
+    return constraints
+
+
+def rowwise_outages(df: pd.DataFrame) -> list[dict]:
+    outages = []
+    for _, row in df.iterrows():
+        outages.append({
+            "resource_name": row["Resource Name"],
+            "resource_id": row["Resource ID"],
+            "outage_type": row["Outage Type"],
+            "nature_of_work": row["Nature of Work"],
+            "curtailment_mw": float(row["Curtailment MW"]),
+            "pmax_mw": float(row["Resource PMAX MW"]),
+            "start_time": row["Curtailment Start Time"].isoformat() if pd.notna(row["Curtailment Start Time"]) else None,
+            "end_time": row["Curtailment End Time"].isoformat() if pd.notna(row["Curtailment End Time"]) else None,
+        })
+    return outages
+
+
+CASES = [
+    ("load_deviation", make_deviation_frame, rowwise_deviations, grid._deviation_records),
+    ("tie_flows", make_tie_flow_frame, rowwise_tie_flows, grid._tie_flow_records),
+    ("as_prices", make_as_price_frame, rowwise_as_prices, grid._as_price_records),
+    ("shadow_prices", make_constraint_frame, rowwise_constraints, grid._constraint_records),
+    ("outages", make_outage_frame, rowwise_outages, grid._outage_records),
+]
+
+
+def best_of(fn, frame: pd.DataFrame, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(frame)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'builder':<16}{'row-wise us/row':>18}{'columnar us/row':>18}{'speedup':>10}  match")
+    for name, make_frame, rowwise, columnar in CASES:
+        frame = make_frame(args.rows)
+        before, expected = best_of(rowwise, frame, args.repeat)
+        after, actual = best_of(columnar, frame, args.repeat)
+        per_row_before = before / args.rows * 1e6
+        per_row_after = after / args.rows * 1e6
+        print(
+            f"{name:<16}{per_row_before:>18.3f}{per_row_after:>18.3f}"
+            f"{before / after:>9.1f}x  {expected == actual}"
+        )
+
+
+if __name__ == "__main__":
+    main()
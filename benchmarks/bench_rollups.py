@@ -0,0 +1,104 @@
+"""
+Benchmark the incrementally maintained price rollups.
+
+Generates monthly CSVs of synthetic hourly prices for N sites (same layout as
+benchmarks.bench_price_store), ingests them one month at a time into a
+tools.price_store.PriceStore and times the rollup update each month costs
+against rebuilding them from every stored row, and against recomputing the
+month x hour statistics with quantile_cont over everything stored.
+Then compares the rollup database's size with the store's, and percentile
+lookups - a zone's p95 at one hour of day, a zone's and every site's p95
+over the year - read from the rollups against the quantile_cont scans of the
+store they replace, with the sketch error. Nodes are not rolled up; their
+exact percentiles come from a read of the store, timed last.
+
+Usage:
+    python -m benchmarks.bench_rollups [--sites 200] [--days 365] [--repeat 5]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import duckdb
+from benchmarks.bench_price_store import best_of, dir_size, rollups_size, write_csvs
+from tools.price_store import PriceStore
+from tools.rollups import ALL_SITES, ROLLUP_GRAINS, PriceRollups, measure_stats, value_stats
+
+RECOMPUTE_SQL = """
+    SELECT zone, strftime(timezone('US/Pacific', timestamp), '%Y-%m') AS period, hour(timezone('US/Pacific', timestamp)) AS hour,
+           COUNT(*), AVG(rt_price_mwh), AVG(price_spread_mwh),
+           quantile_cont(rt_price_mwh, [0.5, 0.95, 0.99]), quantile_cont(price_spread_mwh, [0.5, 0.95, 0.99])
+    FROM grid_data
+    GROUP BY GROUPING SETS ((zone, period, hour), (period, hour))
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sites", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_dir = os.path.join(tmp, "csv")
+        os.makedirs(csv_dir)
+        paths = write_csvs(csv_dir, args.sites, args.days)
+        store = PriceStore(os.path.join(tmp, "prices"))
+        con = duckdb.connect()
+
+        print(f"{args.sites} sites x {args.days} days, one file per month\n")
+        print(f"{'month':<9} {'rows':>9} {'ingest':>9} {'rollup update':>14} {'rollup rebuild':>15} {'SQL recompute':>14}")
+        update = store._rollups.update
+        timings = []
+
+        def timed_update(rows, batch):
+            started = time.perf_counter()
+            update(rows, batch)
+            timings.append(time.perf_counter() - started)
+
+        store._rollups.update = timed_update
+        for path in paths:
+            started = time.perf_counter()
+            entry = store.ingest(path)
+            ingest = time.perf_counter() - started
+            store.create_view(con, "grid_data")
+            stored = con.execute('SELECT * EXCLUDE ("month") FROM grid_data').df()
+            rebuild, _ = best_of(lambda: PriceRollups(":memory:").update(stored, "all"), 1)
+            recompute, _ = best_of(lambda: con.execute(RECOMPUTE_SQL).fetchall(), 1)
+            month = os.path.basename(path)[len("caiso_combined_prices_"):-len(".csv")]
+            print(f"{month:<9} {entry['rows']:>9,} {ingest * 1000:>6.0f} ms {timings[-1] * 1000:>11.0f} ms "
+                  f"{rebuild * 1000:>12.0f} ms {recompute * 1000:>11.0f} ms")
+        store._rollups.update = update
+
+        rollups = store.rollups()
+        table_rows = {grain: len(rollups.rows(grain)) for grain in ROLLUP_GRAINS}
+        print(f"\nstore {dir_size(store.root) / 1e6:.1f} MB, rollups {rollups_size(store.rollups_path) / 1e6:.1f} MB "
+              f"({', '.join(f'{grain} {rows:,} rows' for grain, rows in table_rows.items())})")
+
+        pacific_hour = "hour(timezone('US/Pacific', timestamp))"
+        cases = [
+            ("zone p95 at 18:00", lambda: measure_stats(rollups.rows("month_hour", "zone", "SP15", hours=[18]), "rt_price_mwh")["p95"],
+             f"SELECT quantile_cont(rt_price_mwh, 0.95) FROM grid_data WHERE zone = 'SP15' AND {pacific_hour} = 18"),
+            ("zone p95", lambda: measure_stats(rollups.rows("month_hour", "zone", "SP15"), "rt_price_mwh")["p95"],
+             "SELECT quantile_cont(rt_price_mwh, 0.95) FROM grid_data WHERE zone = 'SP15'"),
+            ("all-sites p95 at 18:00", lambda: measure_stats(rollups.rows("month_hour", "all", ALL_SITES, hours=[18]), "rt_price_mwh")["p95"],
+             f"SELECT quantile_cont(rt_price_mwh, 0.95) FROM grid_data WHERE {pacific_hour} = 18"),
+            ("all-sites p95", lambda: measure_stats(rollups.rows("month_hour", "all", ALL_SITES), "rt_price_mwh")["p95"],
+             "SELECT quantile_cont(rt_price_mwh, 0.95) FROM grid_data"),
+        ]
+        print(f"\n{'lookup':<24} {'store scan':>11} {'rollups':>9}   {'exact p95':>9} {'sketch p95':>10}  error")
+        for name, lookup, sql in cases:
+            scan_time, (exact,) = best_of(lambda: con.execute(sql).fetchone(), args.repeat)
+            rollup_time, estimate = best_of(lookup, args.repeat)
+            error = abs(estimate - exact) / abs(exact)
+            print(f"{name:<24} {scan_time * 1000:>8.1f} ms {rollup_time * 1000:>6.1f} ms   {exact:>9.2f} {estimate:>10.2f}  {error:.2%}")
+
+        node = f"NODE{args.sites // 2:05d}_7_N001"
+        node_time, stats = best_of(lambda: value_stats(store.query(nodes=[node])["rt_price_mwh"]), args.repeat)
+        print(f"\nnode p50/p95/p99 read from the store: {node_time * 1000:.1f} ms (p95 {stats['p95']:.2f}, exact)")
+
+
+if __name__ == "__main__":
+    main()
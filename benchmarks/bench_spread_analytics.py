@@ -0,0 +1,108 @@
+"""
+Benchmark the hub spread analytics engine on synthetic LMP history.
+
+Builds months of 5-minute LMPs (with gaps) for the three trading hubs plus
+extra nodes, runs tools.lmp_analytics.pivot_lmp + spread_analytics, and
+checks its exceedance counts, hour-of-day profile and rolling mean against a
+straightforward pandas pivot/groupby/rolling implementation. Also checks that
+a history shorter than the rolling window (6 hours against 24) and a node
+with only a few scattered intervals still produce results.
+
+Usage:
+    python -m benchmarks.bench_spread_analytics [--days 90] [--nodes 5] [--repeat 5]
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from tools.lmp_analytics import pivot_lmp, rolling_mean, spread_analytics
+from tools.weather import CAISO_HUBS
+
+THRESHOLDS = [5.0, 20.0, 50.0]
+
+
+def make_lmps(locations: list[str], days: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    times = pd.date_range("2025-06-01", periods=days * 288, freq="5min", tz="US/Pacific")
+    hour = times.hour.to_numpy()
+    energy = 40 + 25 * np.sin((hour - 12) / 24 * 2 * np.pi) + rng.normal(0, 8, len(times))
+    frames = []
+    for i, location in enumerate(locations):
+        congestion = rng.normal(0, 3 + i, len(times)) + np.where((hour >= 17) & (hour < 21), 4.0 * i, 0.0)
+        loss = rng.normal(0, 0.5, len(times))
+        frames.append(pd.DataFrame({
+            "Interval Start": times,
+            "Location": location,
+            "LMP": energy + congestion + loss,
+            "Energy": energy,
+            "Congestion": congestion,
+            "Loss": loss,
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    # Drop ~1% of rows, like OASIS gaps
+    return df[rng.random(len(df)) > 0.01].reset_index(drop=True)
+
+
+def pandas_reference(df: pd.DataFrame, location: str, reference: str, window: int) -> dict:
+    wide = df.pivot_table(index="Interval Start", columns="Location", values="LMP")
+    wide = wide.reindex(pd.date_range(wide.index.min(), wide.index.max(), freq="5min"))
+    spread = wide[location] - wide[reference]
+    return {
+        "above": [int((spread > t).sum()) for t in THRESHOLDS],
+        "below": [int((spread < -t).sum()) for t in THRESHOLDS],
+        "by_hour": spread.groupby(spread.index.hour).mean().to_numpy(),
+        "rolling": spread.rolling(window, min_periods=(window + 1) // 2).mean().to_numpy(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--nodes", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    locations = [*CAISO_HUBS.values(), *(f"NODE_{i}_N001" for i in range(args.nodes))]
+    reference = CAISO_HUBS["SP15"]
+    df = make_lmps(locations, args.days)
+    print(f"{len(df):,} rows: {args.days} days x 288 intervals x {len(locations)} locations")
+
+    best_pivot = best_stats = float("inf")
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        matrices = pivot_lmp(df, locations, 5)
+        pivoted = time.perf_counter()
+        result = spread_analytics(matrices, reference, THRESHOLDS, window_hours=24)
+        best_pivot = min(best_pivot, pivoted - started)
+        best_stats = min(best_stats, time.perf_counter() - pivoted)
+
+    started = time.perf_counter()
+    expected = pandas_reference(df, CAISO_HUBS["NP15"], reference, 288)
+    reference_ms = (time.perf_counter() - started) * 1000
+
+    spread = result["spreads"][f"{CAISO_HUBS['NP15']} - {reference}"]
+    # NP15 and SP15 are the first two columns
+    spread_rolling = rolling_mean(matrices["LMP"][:, [0]] - matrices["LMP"][:, [1]], 288, min_periods=144)[:, 0]
+    match = (
+        [row["above"] for row in spread["exceedance"]] == expected["above"]
+        and [row["below"] for row in spread["exceedance"]] == expected["below"]
+        and np.allclose(list(spread["by_hour_ending"].values()), expected["by_hour"], atol=0.01)
+        and np.allclose(spread_rolling, expected["rolling"], equal_nan=True)
+    )
+    print(f"pivot to matrices      {best_pivot * 1000:8.1f} ms")
+    print(f"spread analytics       {best_stats * 1000:8.1f} ms   ({len(result['spreads'])} spreads, {len(locations)} locations)")
+    print(f"pandas, one spread     {reference_ms:8.1f} ms   match {match}")
+
+    # Today so far: 6 hours of data against the default 24-hour window, plus a sparse node
+    short = make_lmps(locations[:2], 1)
+    short = short[short["Interval Start"] < short["Interval Start"].min() + pd.Timedelta(hours=6)]
+    sparse = short[short["Location"] == locations[0]].iloc[::20].assign(Location="SPARSE_N001")
+    short_result = spread_analytics(pivot_lmp(pd.concat([short, sparse]), [*locations[:2], "SPARSE_N001"], 5), reference, THRESHOLDS)
+    short_spread = short_result["spreads"][f"{CAISO_HUBS['NP15']} - {reference}"]["rolling_mean"]
+    sparse_spread = short_result["spreads"][f"SPARSE_N001 - {reference}"]["rolling_mean"]
+    print(f"6 h history, 24 h window: latest {short_spread['latest']}, sparse node latest {sparse_spread['latest']}")
+
+
+if __name__ == "__main__":
+    main()
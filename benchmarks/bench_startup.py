@@ -0,0 +1,94 @@
+"""
+Benchmark cold-start latency of main.py in a fresh interpreter.
+
+Each run spawns a new Python process (as the spawn-per-request deployment
+does) and reports:
+  - import: process start until `import main` finishes (agents + tools)
+  - first_event: process start until runner.run_async yields its first event
+It also lists which heavy modules were already imported before the first event.
+
+first_event needs model credentials (e.g. GOOGLE_API_KEY); without them only
+the import phase is reported.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--query "..."]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ["pandas", "numpy", "gridstatus", "duckdb", "geopy", "requests"]
+
+CHILD = """
+import asyncio, json, sys, time
+import main
+imported = time.time()
+heavy_at_import = [m for m in {heavy!r} if m in sys.modules]
+
+async def first_event():
+    from google.genai import types
+    runner, session_service = main.build_runner()
+    session = await session_service.create_session(app_name=main.APP_NAME, user_id=main.USER_ID)
+    content = types.Content(role="user", parts=[types.Part(text={query!r})])
+    async for _ in runner.run_async(user_id=main.USER_ID, session_id=session.id, new_message=content):
+        return time.time()
+
+result = {{"imported": imported, "heavy_at_import": heavy_at_import}}
+try:
+    result["first_event"] = asyncio.run(first_event())
+except Exception as e:
+    result["error"] = f"{{type(e).__name__}}: {{e}}"
+print("BENCH " + json.dumps(result))
+"""
+
+
+def run_once(query: str) -> dict:
+    code = CHILD.format(heavy=HEAVY_MODULES, query=query)
+    started = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH "):
+            result = json.loads(line[len("BENCH "):])
+            timings = {"import": result["imported"] - started, "heavy_at_import": result["heavy_at_import"]}
+            if "first_event" in result and result["first_event"] is not None:
+                timings["first_event"] = result["first_event"] - started
+            if "error" in result:
+                timings["error"] = result["error"]
+            return timings
+    raise RuntimeError(f"benchmark child failed:\n{proc.stderr[-2000:]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--query", default="What is the current CAISO load?")
+    args = parser.parse_args()
+
+    runs = [run_once(args.query) for _ in range(args.runs)]
+
+    imports = [run["import"] for run in runs]
+    print(f"import      median {statistics.median(imports) * 1000:8.0f} ms   min {min(imports) * 1000:8.0f} ms")
+    first_events = [run["first_event"] for run in runs if "first_event" in run]
+    if first_events:
+        print(
+            f"first_event median {statistics.median(first_events) * 1000:8.0f} ms"
+            f"   min {min(first_events) * 1000:8.0f} ms"
+        )
+    errors = {run["error"] for run in runs if "error" in run}
+    for error in errors:
+        print(f"first_event unavailable: {error}")
+    print(f"heavy modules imported at startup: {runs[-1]['heavy_at_import'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
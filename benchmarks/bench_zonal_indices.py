@@ -0,0 +1,83 @@
+"""
+Benchmark the zonal weather index engine on synthetic history.
+
+Compares a per-zone, per-city loop over hourly series (how the indices would
+be computed one location at a time) with tools.zonal's weight-matrix
+contraction, checks both agree, and reports time per index-year.
+
+Usage:
+    python -m benchmarks.bench_zonal_indices [--days 365] [--repeat 5]
+"""
+
+import argparse
+import time
+import numpy as np
+from tools.weather import CAISO_WEATHER_POINTS
+from tools.zonal import SYSTEM, ZONAL_INDICES, ZONES, weight_matrix, zonal_indices
+
+
+def make_cubes(points: list[dict], days: int) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    variables = {spec["variable"] for spec in ZONAL_INDICES.values()}
+    cubes = {}
+    for variable in variables:
+        cube = rng.uniform(0, 100, (len(points), days, 24))
+        cube[rng.random(cube.shape) < 0.01] = np.nan  # sparse gaps like real API output
+        cubes[variable] = cube
+    return cubes
+
+
+def loop_indices(points: list[dict], cubes: dict[str, np.ndarray], zones: list[str]) -> dict[str, np.ndarray]:
+    """Reference: accumulate each city's series into its zone, skipping missing hours."""
+    result = {}
+    for name, spec in ZONAL_INDICES.items():
+        cube = cubes[spec["variable"]]
+        weights, _ = weight_matrix(points, spec["category"], spec["weight"], zones)
+        out = np.full((len(zones), cube.shape[1], cube.shape[2]), np.nan)
+        for z in range(len(zones)):
+            for d in range(cube.shape[1]):
+                for h in range(cube.shape[2]):
+                    total = mass = 0.0
+                    for i in range(len(points)):
+                        value = cube[i, d, h]
+                        if weights[z, i] and value == value:
+                            total += weights[z, i] * value
+                            mass += weights[z, i]
+                    if mass:
+                        out[z, d, h] = total / mass
+        result[name] = out
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    points = [
+        {"category": category, **point}
+        for category, category_points in CAISO_WEATHER_POINTS.items()
+        for point in category_points
+    ]
+    zones = [*ZONES, SYSTEM]
+    cubes = make_cubes(points, args.days)
+
+    started = time.perf_counter()
+    expected = loop_indices(points, cubes, zones)
+    looped = time.perf_counter() - started
+
+    vectorized = float("inf")
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        actual, _ = zonal_indices(points, cubes, zones)
+        vectorized = min(vectorized, time.perf_counter() - started)
+
+    match = all(np.allclose(expected[name], actual[name], equal_nan=True) for name in expected)
+    print(f"{len(points)} locations x {args.days} days x 24 hours, {len(ZONAL_INDICES)} indices, {len(zones)} zones")
+    print(f"per-city loop   {looped * 1000:10.1f} ms")
+    print(f"weight matrix   {vectorized * 1000:10.1f} ms   ({looped / vectorized:.0f}x)  match {match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Local stub of the Open-Meteo forecast API with injectable latency and failures.
+
+Returns Open-Meteo-shaped hourly JSON for any coordinates (one result per
+point when several comma-separated coordinates are given). Point the tools at
+it with GRIDPILOT_OPEN_METEO_URL=http://127.0.0.1:8765/v1/forecast.
+
+Usage:
+    python -m benchmarks.stub_open_meteo [--port 8765] [--latency-ms 50]
+        [--jitter-ms 20] [--fail-rate 0.1] [--hang-rate 0.02] [--hang-seconds 30]
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubConfig:
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        fail_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        hang_seconds: float = 30.0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.requests = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+
+
+def hourly_payload(lat: float, lon: float, variables: list[str], start: str | None, end: str | None) -> dict:
+    first = datetime.strptime(start, "%Y-%m-%d") if start else datetime.now()
+    last = datetime.strptime(end, "%Y-%m-%d") if end else first
+    stamps = [
+        first + timedelta(days=d, hours=h)
+        for d in range((last - first).days + 1)
+        for h in range(24)
+    ]
+    values = {
+        variable: [
+            round(60 + 15 * math.sin((t.hour - 9) / 24 * 2 * math.pi) + lat / 10 + i + t.timetuple().tm_yday % 7, 1)
+            for t in stamps
+        ]
+        for i, variable in enumerate(variables)
+    }
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "timezone": "America/Los_Angeles",
+        "hourly": {"time": [t.strftime("%Y-%m-%dT%H:%M") for t in stamps], **values},
+    }
+
+
+def make_handler(config: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+        # Headers and body go out as separate writes; without this, delayed ACKs
+        # add ~40 ms to every response on a reused connection
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            with config._lock:
+                config.requests += 1
+                config.connections.add(self.client_address)
+            delay = max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+            roll = random.random()
+            if roll < config.hang_rate:
+                time.sleep(config.hang_seconds)
+            time.sleep(delay)
+            if roll >= config.hang_rate and roll < config.hang_rate + config.fail_rate:
+                self._send(503, {"error": True, "reason": "injected failure"})
+                return
+
+            query = parse_qs(urlsplit(self.path).query)
+            lats = [float(v) for v in query.get("latitude", ["0"])[0].split(",")]
+            lons = [float(v) for v in query.get("longitude", ["0"])[0].split(",")]
+            variables = query.get("hourly", ["temperature_2m"])[0].split(",")
+            start = query.get("start_date", [None])[0]
+            end = query.get("end_date", [None])[0]
+            results = [hourly_payload(lat, lon, variables, start, end) for lat, lon in zip(lats, lons)]
+            self._send(200, results if len(results) > 1 else results[0])
+
+        def _send(self, status: int, body) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int = 0, config: StubConfig | None = None) -> tuple[ThreadingHTTPServer, StubConfig]:
+    """Start the stub on a daemon thread; returns the server and its config."""
+    config = config or StubConfig()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, config
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    args = parser.parse_args()
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.fail_rate, args.hang_rate, args.hang_seconds)
+    server, _ = serve(args.port, config)
+    print(f"Stub Open-Meteo at http://127.0.0.1:{args.port}/v1/forecast")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,77 +1,86 @@
+import glob
+import sys
 import duckdb
+from tools.price_store import price_store
+from tools.rollups import measure_stats
 
-# Connect to an in-memory database
-con = duckdb.connect()
+# Convert the price CSVs into the partitioned Parquet store (data/prices).
+# Files already ingested are skipped, so only new exports are read.
+sources = sys.argv[1:] or sorted(glob.glob("data/caiso_combined_prices_*.csv"))
+for path in sources:
+    entry = price_store.ingest(path)
+    status = "already ingested" if entry.get("already_ingested") else f"{entry['rows']} rows added, {entry['skipped_rows']} already stored"
+    print(f"{path}: {status}")
 
-# Load the data from CSV
-# We use read_csv_auto to infer types, but we can also specify types if needed based on the user's list
-con.execute("CREATE TABLE grid_data AS SELECT * FROM read_csv_auto('data/data.csv')")
+# Connect to an in-memory database and query the store in place
+con = duckdb.connect()
+price_store.create_view(con, "grid_data")
 
 print("=== Data Overview ===")
 con.sql("DESCRIBE grid_data").show()
+con.sql("""
+    SELECT zone, "month", COUNT(DISTINCT node) AS nodes, COUNT(DISTINCT site) AS sites, COUNT(*) AS rows
+    FROM grid_data
+    GROUP BY ALL
+    ORDER BY zone, "month"
+""").show()
 
 # 1. Identify the Top Price Spikes
-# This helps visualize the most extreme events in the dataset
-print("\n=== Top 10 Price Spikes ===")
+# This helps visualize the most extreme real-time events in the dataset
+print("\n=== Top 10 Real-Time Price Spikes ===")
 con.sql("""
-    SELECT 
-        timestamp, 
-        price_mwh, 
-        temperature_2m, 
-        cloud_cover, 
-        wind_speed_10m,
-        hour,
-        day_of_week
-    FROM grid_data 
-    ORDER BY price_mwh DESC 
+    SELECT
+        timestamp,
+        site,
+        node,
+        rt_price_mwh,
+        da_price_mwh,
+        price_spread_mwh
+    FROM grid_data
+    ORDER BY rt_price_mwh DESC
     LIMIT 10
 """).show()
 
-# 2. Weather Correlation Analysis
-# Compare average weather conditions during price spikes (> 95th percentile) vs normal operation
-# This helps understand "which weather parameters might have caused them"
-print("\n=== Weather Conditions: High Price (>95th percentile) vs Normal ===")
+# 2. Day-Ahead vs Real-Time by Hour
+# Compare average DA and RT prices per zone and hour of day (Pacific),
+# and how often real-time cleared above day-ahead
+print("\n=== DA vs RT by Zone and Hour ===")
 con.sql("""
-    WITH stats AS (
-        SELECT quantile_cont(price_mwh, 0.95) as p95 FROM grid_data
-    )
-    SELECT 
-        CASE 
-            WHEN price_mwh > (SELECT p95 FROM stats) THEN 'Spike (>95%)' 
-            ELSE 'Normal' 
+    SELECT
+        zone,
+        hour(timezone('US/Pacific', timestamp)) AS hour,
+        ROUND(AVG(da_price_mwh), 2) AS avg_da,
+        ROUND(AVG(rt_price_mwh), 2) AS avg_rt,
+        ROUND(AVG(price_spread_mwh), 2) AS avg_spread,
+        ROUND(100 * AVG(CASE WHEN rt_price_mwh > da_price_mwh THEN 1 ELSE 0 END), 1) AS rt_above_da_pct
+    FROM grid_data
+    GROUP BY ALL
+    ORDER BY zone, hour
+""").show(max_rows=100)
+
+# 3. Spike Hours (> 95th percentile RT) vs Normal
+# Percentiles come from the rollups kept up to date on ingest (merged
+# sketches), not from a sort of the full history
+rollups = price_store.rollups()
+zone_rows = rollups.rows("month_hour", "zone")
+print("\n=== RT Price Percentiles by Zone (from rollups) ===")
+for zone, rows in zone_rows.groupby("key"):
+    stats = measure_stats(rows, "rt_price_mwh")
+    print(f"{zone:<8} n={stats['count']:<9} mean={stats['mean']:<8} p50={stats['p50']:<8} p95={stats['p95']:<8} p99={stats['p99']}")
+p95 = measure_stats(rollups.rows("month_hour", "all"), "rt_price_mwh").get("p95")
+
+print("\n=== Real-Time Spikes (>95th percentile) vs Normal ===")
+con.execute("""
+    SELECT
+        CASE
+            WHEN rt_price_mwh > ? THEN 'Spike (>95%)'
+            ELSE 'Normal'
         END as category,
         COUNT(*) as hours_count,
-        ROUND(AVG(price_mwh), 2) as avg_price,
-        ROUND(AVG(temperature_2m), 2) as avg_temp_c,
-        ROUND(AVG(cloud_cover), 2) as avg_cloud_cover,
-        ROUND(AVG(wind_speed_10m), 2) as avg_wind_speed,
-        ROUND(AVG(relative_humidity_2m), 2) as avg_humidity
+        ROUND(AVG(rt_price_mwh), 2) as avg_rt_price,
+        ROUND(AVG(da_price_mwh), 2) as avg_da_price,
+        ROUND(AVG(price_spread_mwh), 2) as avg_spread
     FROM grid_data
     GROUP BY 1
-    ORDER BY avg_price DESC
-""").show()
-
-# 3. Find Similar Historical Spikes (Nearest Neighbors by Weather)
-# Take the highest price spike, and find other timestamps with very similar weather conditions
-# to see if they also resulted in high prices.
-print("\n=== Historical Days with Similar Weather to the Max Spike ===")
-con.sql("""
-    WITH max_spike AS (
-        SELECT * FROM grid_data ORDER BY price_mwh DESC LIMIT 1
-    )
-    SELECT 
-        t.timestamp,
-        t.price_mwh,
-        t.temperature_2m,
-        t.cloud_cover,
-        t.wind_speed_10m,
-        -- Calculate a simple similarity score (lower is more similar)
-        -- We weight temperature and cloud cover as likely drivers
-        (ABS(t.temperature_2m - m.temperature_2m) * 2 + 
-         ABS(t.cloud_cover - m.cloud_cover) + 
-         ABS(t.wind_speed_10m - m.wind_speed_10m)) as similarity_score
-    FROM grid_data t, max_spike m
-    WHERE t.timestamp != m.timestamp
-    ORDER BY similarity_score ASC
-    LIMIT 10
-""").show()
+    ORDER BY avg_rt_price DESC
+""", [p95]).df().pipe(print)
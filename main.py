@@ -15,34 +15,44 @@ load_dotenv()
 
 import sys
 
-async def main():
-    # A realistic analyst query: checking the "health" of the market
-    if len(sys.argv) > 1:
-        user_query = sys.argv[1]
-    else:
-        user_query = f"Analyze the current status of the CAISO market. How is the weather in Los Angeles impacting the load?"
-    print(f"User: {user_query}")
-    
+APP_NAME = "GridPilot"
+USER_ID = "hari"
+
+
+def build_runner() -> tuple[Runner, InMemorySessionService]:
+    """Create the GridPilot App and Runner with in-memory services."""
     # Setup services
     session_service = InMemorySessionService()
     artifact_service = InMemoryArtifactService()
     credential_service = InMemoryCredentialService()
     
     # Create App and Runner
-    app = App(name="GridPilot", root_agent=orchestrator)
+    app = App(name=APP_NAME, root_agent=orchestrator)
     runner = Runner(
         app=app,
         session_service=session_service,
         artifact_service=artifact_service,
         credential_service=credential_service
     )
+    return runner, session_service
+
+
+async def main():
+    # A realistic analyst query: checking the "health" of the market
+    if len(sys.argv) > 1:
+        user_query = sys.argv[1]
+    else:
+        user_query = f"Analyze the current status of the CAISO market. How is the weather in Los Angeles impacting the load?"
+    print(f"User: {user_query}")
+    
+    runner, session_service = build_runner()
     
     # Create session
-    session = await session_service.create_session(app_name="GridPilot", user_id="hari")
+    session = await session_service.create_session(app_name=APP_NAME, user_id=USER_ID)
     
     # Run agent
     content = types.Content(role='user', parts=[types.Part(text=user_query)])
-    async for event in runner.run_async(user_id="hari", session_id=session.id, new_message=content):
+    async for event in runner.run_async(user_id=USER_ID, session_id=session.id, new_message=content):
         if event.content and event.content.parts:
              print(f"[{event.author}]: {event.content.parts[0].text}")
 
@@ -95,7 +95,16 @@ OUTLOOK:
 
 ## Important Tools you have access to
 These are the tools you have access to, use them as required:
-1. get_caiso_market_data - Fetches real-time CAISO market snapshot including system load, solar/wind generation, net load calculation, and 5-minute LMP prices with congestion components for NP15/SP15 trading hubs.
+1. get_caiso_market_data - Fetches real-time CAISO market snapshot including system load, solar/wind generation, net load calculation, and 5-minute LMP prices with energy/congestion/loss components for NP15/SP15 trading hubs, as structured fields (MW and $/MWh).
+2. search_caiso_nodes - Finds CAISO pricing node IDs (trading hubs, DLAPs/SLAPs, aggregated and individual pnodes) by full or partial name, tolerating misspellings; words like "hub", "dlap" or "pnode" and a zone ("SP15 hub") filter the results. Use it to get the exact node ID before requesting prices for a specific location.
+3. get_hub_spread_analytics - Analyzes LMP history over a date range (up to a year; 5-minute, 15-minute or day-ahead hourly) for the NP15/SP15/ZP26 hubs and any extra nodes: spreads against a reference (default SP15) with mean/percentiles/extremes, energy/congestion/loss split, exceedance counts and hours above/below $ thresholds, rolling and daily mean spreads, hour-ending profiles, and each location's congestion component. Use it for questions like "how often did the NP15-SP15 spread exceed $20 this month".
+4. get_caiso_nodal_lmps - Fetches LMPs for many nodes at once (a portfolio of hundreds, up to 31 days) and returns per-node mean/min/max LMP and mean congestion, the highest and lowest priced nodes, and fetch throughput. Pass all nodes in one call rather than calling it per node.
+5. find_analog_days - Finds the historical days most similar to a given day, or to today's/tomorrow's forecast, by their 24-hour profiles of hub DA prices, load, net load and zonal weather, and returns each analog's distance and price/load/temperature summary. Use it for "when did we last see a day like this" questions, and look at what prices did on those days. Pass season_days (e.g. 30) to stay within the same season.
+6. get_price_percentiles - Looks up historical RT/DA price or RT-DA spread percentiles (p50/p95/p99, mean, std, extremes) for a zone, every site ("ALL") or a node from the local price history, optionally for one hour of day and a range of months, and places a given price within that distribution (percentile rank, above p95/p99). Use it for questions like "is today's spike above the 95th percentile for this hour".
+7. get_price_spikes - Ranks the highest real-time price hours in the local price history of the solar-plus-storage sites (all sites, a zone or a node, optionally within a date range), with each hour's DA price and RT-DA spread.
+8. get_price_regimes - Splits the local price history into normal, spike (>p95) and extreme (>p99) hours and compares average RT/DA prices, spreads and how often RT cleared above DA in each, plus how often each hour of day spikes. Use it for "how different are spike hours" and "when do spikes happen" questions.
+9. get_weather_conditioned_prices - Groups the local price history over a date range (up to a year) by the zonal weather at each hour (temperature by default, or humidity, cloud cover, solar radiation, wind speed) and compares prices across the bands. Use it for questions like "how do SP15 prices behave above 95F".
+10. optimize_battery_dispatch - Finds the best perfect-foresight daily charge/discharge schedule for a battery (power, energy, round-trip efficiency and a daily cycle limit) at every stored site over a date range (up to a year) against DA or RT prices, and ranks sites by arbitrage revenue with average charge/discharge prices and the best site's hourly dispatch shape. Use it for storage siting and "how much could a 4-hour battery earn at X" questions; revenues are an upper bound, not a forecast.
 
 """
 
@@ -74,8 +74,11 @@ These are the tools you have access to, use them as required:
 ## Important Tools you have access to
 These are the tools you have access to, use them as required:
 1. get_weather_locations_for_node - Maps a CAISO pricing node (NP15/SP15/ZP26) to relevant weather locations weighted by load centers, solar farms, and wind farms that impact prices.
-2. get_weather_forecast - Retrieves temperature data (max, min, noon, evening peak) from Open-Meteo API for a location and date in Fahrenheit.
+2. get_weather_forecast - Retrieves a day summary for one location from Open-Meteo: temperature (max, min, noon, evening peak) in Fahrenheit, humidity, cloud cover, peak solar radiation and wind speed at 10m/100m.
 3. get_caiso_forecasts - Fetches CAISO's official load forecasts and day-ahead LMP prices for specified nodes to compare with weather-driven predictions
+4. get_caiso_weather_snapshot - Fetches hourly temperature, cloud cover, solar radiation and wind speed for all CAISO load, solar and wind locations in one call. Prefer it over repeated get_weather_forecast calls when you need a zonal or system-wide picture.
+5. get_zonal_weather_indices - Computes NP15/SP15/ZP26/CAISO indices over a date range (up to a year): population-weighted temperature and humidity, capacity-weighted cloud cover and solar radiation, and capacity-weighted wind speed. Use it to correlate weather with load or prices across days or months.
+6. get_weather_locations_for_nodes - Bulk version of get_weather_locations_for_node for many pricing nodes (hubs or individual pnodes): returns each node's zone and nearest load/solar/wind weather points, the zone weather locations once per zone, and any node IDs that are not in the node list.
 
 """
 
@@ -2,11 +2,19 @@ document.addEventListener('DOMContentLoaded', () => {
     const chatHistory = document.getElementById('chat-history');
     const userInput = document.getElementById('user-input');
     const sendBtn = document.getElementById('send-btn');
+    // Conversation id from the agent service, so follow-ups keep their context
+    let sessionId = null;
 
     function addMessage(text, sender) {
         const messageDiv = document.createElement('div');
         messageDiv.classList.add('message', `${sender}-message`);
+        setMessageText(messageDiv, text, sender);
+        chatHistory.appendChild(messageDiv);
+        chatHistory.scrollTop = chatHistory.scrollHeight;
+        return messageDiv;
+    }
 
+    function setMessageText(messageDiv, text, sender) {
         // Handle multi-line responses and preserve formatting
         if (sender === 'bot' && text.includes('\n')) {
             messageDiv.style.whiteSpace = 'pre-wrap';
@@ -14,10 +22,18 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         messageDiv.textContent = text;
-        chatHistory.appendChild(messageDiv);
         chatHistory.scrollTop = chatHistory.scrollHeight;
     }
 
+    function addActivity(text) {
+        const activityDiv = document.createElement('div');
+        activityDiv.classList.add('activity');
+        activityDiv.textContent = text;
+        chatHistory.appendChild(activityDiv);
+        chatHistory.scrollTop = chatHistory.scrollHeight;
+        return activityDiv;
+    }
+
     function addTypingIndicator() {
         const indicatorDiv = document.createElement('div');
         indicatorDiv.classList.add('typing-indicator');
@@ -38,6 +54,33 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Keep the typing indicator below the newest output while the run continues
+    function moveTypingIndicator(indicator) {
+        if (indicator && indicator.parentNode) {
+            chatHistory.appendChild(indicator);
+        }
+    }
+
+    // Parse "event: ...\ndata: ..." frames out of the buffered stream text
+    function parseFrames(buffer) {
+        const frames = [];
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let type = 'message';
+            const dataLines = [];
+            for (const line of frame.split('\n')) {
+                if (line.startsWith('event:')) type = line.slice(6).trim();
+                else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+            }
+            if (dataLines.length > 0) {
+                frames.push({ type, data: JSON.parse(dataLines.join('\n')) });
+            }
+        }
+        return { frames, rest: buffer };
+    }
+
     async function sendMessage() {
         const message = userInput.value.trim();
         if (!message) return;
@@ -51,23 +94,92 @@ document.addEventListener('DOMContentLoaded', () => {
         // Add loading indicator
         const loadingIndicator = addTypingIndicator();
 
+        // Message bubble currently receiving streamed text, and which agent owns it
+        let currentBubble = null;
+        let currentAgent = null;
+        let currentText = '';
+        let gotResponse = false;
+        const toolActivity = {};
+
+        function handleFrame({ type, data }) {
+            switch (type) {
+                case 'session':
+                case 'done':
+                    sessionId = data.session_id || sessionId;
+                    break;
+                case 'delegation':
+                    addActivity(`${data.from} → ${data.to}`);
+                    break;
+                case 'tool_call':
+                    toolActivity[data.id || data.name] = addActivity(`${data.agent}: running ${data.name}…`);
+                    break;
+                case 'tool_result': {
+                    const activity = toolActivity[data.id || data.name];
+                    const status = data.error ? `failed (${data.error})` : 'done';
+                    if (activity) activity.textContent = `${data.agent}: ${data.name} ${status}`;
+                    break;
+                }
+                case 'text':
+                    if (!currentBubble || currentAgent !== data.agent) {
+                        currentBubble = addMessage('', 'bot');
+                        currentAgent = data.agent;
+                        currentText = '';
+                    }
+                    currentText += data.delta;
+                    setMessageText(currentBubble, currentText, 'bot');
+                    gotResponse = true;
+                    break;
+                case 'message':
+                    // Complete text replaces the streamed chunks for this agent's turn
+                    if (data.text === 'None') break;
+                    if (currentBubble && currentAgent === data.agent) {
+                        setMessageText(currentBubble, data.text, 'bot');
+                    } else {
+                        addMessage(data.text, 'bot');
+                    }
+                    currentBubble = null;
+                    currentAgent = null;
+                    gotResponse = true;
+                    break;
+                case 'error':
+                    addMessage('Error: ' + data.error, 'bot');
+                    gotResponse = true;
+                    break;
+            }
+            moveTypingIndicator(loadingIndicator);
+        }
+
         try {
-            const response = await fetch('/api/chat', {
+            const response = await fetch('/api/chat/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({ message })
+                body: JSON.stringify({ message, sessionId })
             });
 
-            const data = await response.json();
+            if (!response.ok) {
+                const data = await response.json();
+                removeTypingIndicator(loadingIndicator);
+                addMessage('Error: ' + (data.error || response.statusText), 'bot');
+                return;
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const { frames, rest } = parseFrames(buffer);
+                buffer = rest;
+                frames.forEach(handleFrame);
+            }
 
             removeTypingIndicator(loadingIndicator);
-
-            if (data.error) {
-                addMessage('Error: ' + data.error, 'bot');
-            } else {
-                addMessage(data.response, 'bot');
+            if (!gotResponse) {
+                addMessage('No response generated', 'bot');
             }
         } catch (error) {
             removeTypingIndicator(loadingIndicator);
@@ -1,96 +1,138 @@
 require('dotenv').config();
 const express = require('express');
 const path = require('path');
+const { spawn } = require('child_process');
 
 const app = express();
 const port = process.env.PORT || 3000;
 
+// Long-lived Python agent service (service.py). Set AGENT_SERVICE_URL to use one
+// that is already running; otherwise a single uvicorn worker is started here.
+const agentServicePort = process.env.AGENT_SERVICE_PORT || 8001;
+const agentServiceUrl = process.env.AGENT_SERVICE_URL || `http://127.0.0.1:${agentServicePort}`;
+
+function startAgentService() {
+  // Use python from conda environment if available
+  const pythonPath = process.env.PYTHON_PATH || 'python';
+  const agentService = spawn(
+    pythonPath,
+    ['-m', 'uvicorn', 'service:app', '--host', '127.0.0.1', '--port', String(agentServicePort)],
+    { env: { ...process.env }, stdio: 'inherit' }
+  );
+  agentService.on('exit', (code) => {
+    console.error(`Agent service exited with code ${code}`);
+  });
+  process.on('exit', () => agentService.kill());
+  return agentService;
+}
+
+if (!process.env.AGENT_SERVICE_URL) {
+  startAgentService();
+}
+
 app.use(express.json());
 app.use(express.static('public'));
 
 app.post('/api/chat', async (req, res) => {
   try {
-    const { message } = req.body;
+    const { message, sessionId } = req.body;
     if (!message) {
       return res.status(400).json({ error: 'Message is required' });
     }
 
-    const { spawn } = require('child_process');
-    // Use python from conda environment if available
-    const pythonPath = process.env.PYTHON_PATH || 'python';
-    const pythonProcess = spawn(pythonPath, ['agents/gridpilot_agent.py', message], {
-      env: { ...process.env }
+    const serviceResponse = await fetch(`${agentServiceUrl}/chat`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ message, session_id: sessionId || null })
     });
 
-    let dataString = '';
-    let errorString = '';
+    if (serviceResponse.status === 503) {
+      return res.status(503).json({ error: 'GridPilot is busy right now. Please try again in a moment.' });
+    }
+    if (!serviceResponse.ok) {
+      console.error(`Agent service returned ${serviceResponse.status}:`, await serviceResponse.text());
+      return res.status(500).json({ error: 'Failed to process request. Please check server logs.' });
+    }
 
-    pythonProcess.stdout.on('data', (data) => {
-      dataString += data.toString();
-    });
+    const data = await serviceResponse.json();
+    const agentResponses = data.responses.filter(r => r.message !== 'None');
+
+    // Format the response for the frontend
+    let formattedResponse = '';
+    if (agentResponses.length > 0) {
+      // Get the last meaningful response (usually from Coordinator or the final agent)
+      const lastResponse = agentResponses[agentResponses.length - 1];
+      formattedResponse = lastResponse.message;
+
+      // If there are market data responses, combine them
+      const marketData = agentResponses.filter(r => r.agent === 'CAISO_Market');
+      const weatherData = agentResponses.filter(r => r.agent === 'Weather');
+
+      if (marketData.length > 0 || weatherData.length > 0) {
+        formattedResponse = agentResponses
+          .filter(r => r.message.length > 10)
+          .map(r => r.message)
+          .join('\n\n');
+      }
+    }
 
-    pythonProcess.stderr.on('data', (data) => {
-      errorString += data.toString();
-    });
+    res.json({ response: formattedResponse || 'No response generated', sessionId: data.session_id });
 
-    pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        console.error(`Python process exited with code ${code}`);
-        console.error('Python Error:', errorString);
-        return res.status(500).json({ error: 'Failed to process request. Please check server logs.' });
-      }
+  } catch (error) {
+    console.error('Error communicating with backend:', error);
+    res.status(500).json({ error: 'Failed to get response' });
+  }
+});
 
-      // Parse the agent output to extract meaningful responses
-      const lines = dataString.split('\n');
-      const agentResponses = [];
-
-      for (const line of lines) {
-        // Capture agent responses in format [AgentName]: Response
-        const agentMatch = line.match(/^\[([\w_]+)\]: (.+)$/);
-        if (agentMatch && agentMatch[2] !== 'None') {
-          agentResponses.push({
-            agent: agentMatch[1],
-            message: agentMatch[2]
-          });
-        }
-      }
+// Streams agent events (delegation, tool calls, partial text) as Server-Sent Events
+app.post('/api/chat/stream', async (req, res) => {
+  const { message, sessionId } = req.body;
+  if (!message) {
+    return res.status(400).json({ error: 'Message is required' });
+  }
 
-      // Format the response for the frontend
-      let formattedResponse = '';
-      if (agentResponses.length > 0) {
-        // Get the last meaningful response (usually from Coordinator or the final agent)
-        const lastResponse = agentResponses[agentResponses.length - 1];
-        formattedResponse = lastResponse.message;
-
-        // If there are market data responses, combine them
-        const marketData = agentResponses.filter(r => r.agent === 'CAISO_Market');
-        const weatherData = agentResponses.filter(r => r.agent === 'Weather');
-
-        if (marketData.length > 0 || weatherData.length > 0) {
-          formattedResponse = agentResponses
-            .filter(r => r.message !== 'None' && r.message.length > 10)
-            .map(r => r.message)
-            .join('\n\n');
-        }
-      } else {
-        // Fallback to raw output if no structured responses found
-        formattedResponse = dataString
-          .split('\n')
-          .filter(line => !line.startsWith('User:') &&
-                         !line.includes('UserWarning') &&
-                         !line.includes('INFO') &&
-                         !line.includes('DEBUG') &&
-                         !line.includes('Warning:') &&
-                         line.trim().length > 0)
-          .join('\n');
-      }
+  // Stop the agent run if the browser goes away
+  const controller = new AbortController();
+  res.on('close', () => controller.abort());
 
-      res.json({ response: formattedResponse || 'No response generated' });
+  try {
+    const serviceResponse = await fetch(`${agentServiceUrl}/chat/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ message, session_id: sessionId || null }),
+      signal: controller.signal
     });
 
+    if (serviceResponse.status === 503) {
+      return res.status(503).json({ error: 'GridPilot is busy right now. Please try again in a moment.' });
+    }
+    if (!serviceResponse.ok) {
+      console.error(`Agent service returned ${serviceResponse.status}:`, await serviceResponse.text());
+      return res.status(500).json({ error: 'Failed to process request. Please check server logs.' });
+    }
+
+    res.writeHead(200, {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      'Connection': 'keep-alive',
+      'X-Accel-Buffering': 'no'
+    });
+    res.flushHeaders();
+
+    for await (const chunk of serviceResponse.body) {
+      res.write(chunk);
+    }
+    res.end();
+
   } catch (error) {
-    console.error('Error communicating with backend:', error);
-    res.status(500).json({ error: 'Failed to get response' });
+    if (controller.signal.aborted) return;
+    console.error('Error streaming from backend:', error);
+    if (!res.headersSent) {
+      res.status(500).json({ error: 'Failed to get response' });
+    } else {
+      res.write(`event: error\ndata: ${JSON.stringify({ error: 'Connection to GridPilot was lost' })}\n\n`);
+      res.end();
+    }
   }
 });
 
@@ -0,0 +1,265 @@
+"""
+Long-lived GridPilot agent service.
+
+Builds the App and Runner once and keeps agents, sessions and data caches warm
+across requests. server.js calls it over local HTTP instead of spawning a
+Python process per message.
+
+Run with:
+    uvicorn service:app --port 8001
+"""
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
+from google.genai import types
+from pydantic import BaseModel
+from main import APP_NAME, USER_ID, build_runner
+from tools.analog_days import analog_history, history_window
+from tools.grid import caiso, poller
+from tools.http_client import http_client
+from tools.price_analytics import price_analytics
+
+# Agent runs allowed at once; further requests wait in the queue
+MAX_CONCURRENT_RUNS = int(os.getenv("GRIDPILOT_MAX_CONCURRENT_RUNS", "4"))
+# Requests allowed to wait for a run slot before new ones are rejected with 503
+MAX_QUEUED_RUNS = int(os.getenv("GRIDPILOT_MAX_QUEUED_RUNS", "16"))
+# Seconds a queued request waits for a slot before giving up
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("GRIDPILOT_QUEUE_TIMEOUT", "60"))
+
+
+class QueueFull(Exception):
+    """Raised when the run queue is at capacity or a queued request timed out."""
+
+
+class RunLimiter:
+    """
+    Caps concurrent agent runs and bounds how many requests may wait for one.
+
+    Usage:
+        async with limiter:
+            ...
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int, timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.queued = 0
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        """Wait for a run slot, raising QueueFull if the queue is full or the wait times out."""
+        # Admission is counted before the first await so a burst cannot overshoot the queue
+        if self.active + self.queued >= self.max_concurrent + self.max_queued:
+            self.rejected += 1
+            raise QueueFull("Agent queue is full, try again shortly")
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise QueueFull("Timed out waiting for an agent slot")
+        finally:
+            self.queued -= 1
+        self.active += 1
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    async def __aenter__(self) -> "RunLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+        }
+
+
+class ChatRequest(BaseModel):
+    message: str
+    session_id: str | None = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.runner, app.state.session_service = build_runner()
+    app.state.limiter = RunLimiter(MAX_CONCURRENT_RUNS, MAX_QUEUED_RUNS, QUEUE_TIMEOUT_SECONDS)
+    if os.getenv("GRIDPILOT_POLLER") == "1":
+        poller.start()
+    if os.getenv("GRIDPILOT_ANALOG_BACKFILL") == "1":
+        analog_history.start_backfill(*history_window())
+    yield
+    poller.stop(timeout=5)
+    analog_history.stop(timeout=5)
+
+
+app = FastAPI(title="GridPilot agent service", lifespan=lifespan)
+
+
+async def get_or_create_session(session_id: str | None) -> Any:
+    """Return the session for session_id, creating it (or a fresh one) if needed."""
+    session_service = app.state.session_service
+    if session_id:
+        session = await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+        if session is not None:
+            return session
+    return await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest) -> dict[str, Any]:
+    """
+    Run the orchestrator on one user message.
+
+    Returns:
+        Dictionary with the session_id to reuse for follow-up messages and the
+        text responses in order as {"agent", "message"} entries.
+    """
+    if not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message is required")
+    try:
+        async with app.state.limiter:
+            session = await get_or_create_session(request.session_id)
+            content = types.Content(role="user", parts=[types.Part(text=request.message)])
+            responses = []
+            async for event in app.state.runner.run_async(
+                user_id=USER_ID, session_id=session.id, new_message=content
+            ):
+                if event.content and event.content.parts and event.content.parts[0].text:
+                    responses.append({"agent": event.author, "message": event.content.parts[0].text})
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {"session_id": session.id, "responses": responses}
+
+
+@app.get("/health")
+async def health() -> dict[str, Any]:
+    """Queue, cache, outbound HTTP, price analytics, poller and analog history status."""
+    return {
+        "status": "ok",
+        "runs": app.state.limiter.stats(),
+        "cache": caiso.cache_stats(),
+        "http": http_client.stats(),
+        "analytics": price_analytics.stats(),
+        "poller": poller.status() if poller.running else None,
+        "analog_history": analog_history.status(),
+    }
+
+
+def event_payloads(event: Event) -> list[tuple[str, dict[str, Any]]]:
+    """
+    Translate one runner event into (type, data) pairs for the browser.
+
+    Types:
+        delegation: the agent handed the conversation to another agent.
+        tool_call: a tool invocation started.
+        tool_result: a tool invocation finished.
+        text: a partial text chunk to append to the agent's current message.
+        message: the agent's complete message text, replacing streamed chunks.
+    """
+    payloads = []
+    agent = event.author
+    for call in event.get_function_calls():
+        if call.name == "transfer_to_agent":
+            continue
+        payloads.append(("tool_call", {"agent": agent, "id": call.id, "name": call.name, "args": call.args or {}}))
+    for response in event.get_function_responses():
+        if response.name == "transfer_to_agent":
+            continue
+        result = response.response or {}
+        payloads.append((
+            "tool_result",
+            {"agent": agent, "id": response.id, "name": response.name, "error": result.get("error")},
+        ))
+    if event.actions and event.actions.transfer_to_agent:
+        payloads.append(("delegation", {"from": agent, "to": event.actions.transfer_to_agent}))
+
+    text = "".join(
+        part.text for part in (event.content.parts if event.content and event.content.parts else [])
+        if part.text and not part.thought
+    )
+    if text:
+        if event.partial:
+            payloads.append(("text", {"agent": agent, "delta": text}))
+        else:
+            payloads.append(("message", {"agent": agent, "text": text}))
+    return payloads
+
+
+def sse(event_type: str, data: dict[str, Any]) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """
+    Run the orchestrator on one user message and stream its events as SSE.
+
+    A "session" event carrying the session_id opens the stream. Each runner
+    event is then forwarded as soon as it is produced (see event_payloads),
+    followed by a final "done" event, or an "error" event if the run fails
+    part-way.
+    """
+    if not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message is required")
+    limiter = app.state.limiter
+    try:
+        await limiter.acquire()
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    released = False
+
+    def release() -> None:
+        # Runs from the generator's finally and again as a background task, in
+        # case the client disconnects before the stream ever starts
+        nonlocal released
+        if not released:
+            released = True
+            limiter.release()
+
+    async def stream() -> AsyncIterator[str]:
+        try:
+            session = await get_or_create_session(request.session_id)
+            yield sse("session", {"session_id": session.id})
+            content = types.Content(role="user", parts=[types.Part(text=request.message)])
+            async for event in app.state.runner.run_async(
+                user_id=USER_ID,
+                session_id=session.id,
+                new_message=content,
+                run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+            ):
+                for event_type, data in event_payloads(event):
+                    yield sse(event_type, data)
+            yield sse("done", {"session_id": session.id})
+        except Exception as e:
+            yield sse("error", {"error": str(e)})
+        finally:
+            release()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release),
+    )
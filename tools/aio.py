@@ -0,0 +1,55 @@
+"""
+Async helpers for the tool layer.
+Blocking I/O (gridstatus, requests, geopy) runs on a bounded thread pool so
+slow upstream calls never stall the ADK event loop.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Upper bound on blocking tool calls in flight across all sessions
+MAX_WORKERS = int(os.getenv("GRIDPILOT_TOOL_WORKERS", "8"))
+
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="gridpilot-tool")
+
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking callable on the tool executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+async def gather_blocking(*calls: Callable[[], Any]) -> list[Any]:
+    """
+    Run independent blocking calls concurrently on the tool executor.
+
+    Args:
+        calls: Zero-argument callables, e.g. lambdas around client fetches.
+
+    Returns:
+        Results in the same order as calls. The first exception is re-raised.
+    """
+    return await asyncio.gather(*(run_blocking(call) for call in calls))
+
+
+def async_variant(sync_fn: Callable[..., Any]) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator for a hand-written async version of a tool.
+
+    Copies the sync tool's name, docstring and annotations so the LLM sees
+    an identical function declaration whichever variant is registered.
+    """
+    def decorate(async_fn: Callable[..., Any]) -> Callable[..., Any]:
+        return functools.update_wrapper(async_fn, sync_fn)
+    return decorate
+
+
+def async_tool(sync_fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Build an async variant of a blocking tool that runs it on the tool executor."""
+    @async_variant(sync_fn)
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(sync_fn, *args, **kwargs)
+    return wrapper
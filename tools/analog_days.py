@@ -0,0 +1,273 @@
+"""
+Analog-day search tool: builds each day's feature profiles (hub DA prices,
+load, net load, zonal weather) and finds the most similar days with the
+tools.analogs index.
+
+The feature history is filled by a background backfill the tool starts when
+days are missing (or at service start with GRIDPILOT_ANALOG_BACKFILL=1), or
+ahead of time from the command line:
+    python -m tools.analog_days [--days 365]
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime
+from typing import Any
+from tools.aio import async_tool
+from tools.analogs import AnalogHistory, daily_profiles
+from tools.bulk_lmp import fetch_lmp_bulk
+from tools.cache import CAISO_TZ
+from tools.grid import caiso
+from tools.lazy import lazy_import
+from tools.weather import CAISO_HUBS, zonal_weather_history
+from tools.zonal import SYSTEM, ZONES
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Analog-day features: 24-hour profiles of hub DA prices, load, net load and
+# zonal weather indices (index name -> zones whose profiles are included)
+ANALOG_WEATHER = {"temperature_f": ZONES, "solar_radiation_wm2": [SYSTEM], "wind_speed_mph": [SYSTEM]}
+ANALOG_FEATURES = ["da_price", "load", "net_load", *ANALOG_WEATHER]
+DEFAULT_ANALOG_HISTORY_DAYS = 365
+MAX_ANALOG_HISTORY_DAYS = 3650
+
+
+def _analog_weather(first_day: Any, n_days: int) -> dict[str, Any]:
+    """Zonal weather index profiles, block name -> (n_days x 24 * zones)."""
+    zones = [*ZONES, SYSTEM]
+    values = zonal_weather_history(first_day, n_days, list(ANALOG_WEATHER), zones)
+    return {
+        name: np.hstack([values[name][zones.index(zone)] for zone in index_zones])
+        for name, index_zones in ANALOG_WEATHER.items()
+    }
+
+
+def _net_load(load: Any, solar: Any, wind: Any) -> Any:
+    # A missing renewable profile counts as zero rather than blanking the day
+    return load - np.nan_to_num(solar) - np.nan_to_num(wind)
+
+
+def _analog_history_features(first_day: Any, n_days: int) -> dict[str, Any]:
+    """Actual feature profiles for n_days closed days from first_day."""
+    end = first_day + pd.Timedelta(days=n_days)
+    lmp, _ = fetch_lmp_bulk(caiso, list(CAISO_HUBS.values()), first_day, end, market="DAY_AHEAD_HOURLY")
+    load = caiso.get_load(date=first_day, end=end)
+    renewables = caiso.get_renewables_hourly(date=first_day, end=end)
+    if not renewables.empty:
+        renewables = renewables[renewables["Location"] == "CAISO"]
+
+    def profile(df, column):
+        if df.empty:
+            return np.full((n_days, 24), np.nan)
+        return daily_profiles(df["Interval Start"], df[column], first_day, n_days)
+
+    load_profile = profile(load, "Load")
+    return {
+        "da_price": np.hstack([profile(lmp[lmp["Location"] == hub], "LMP") for hub in CAISO_HUBS.values()]),
+        "load": load_profile,
+        "net_load": _net_load(load_profile, profile(renewables, "Solar"), profile(renewables, "Wind")),
+        **_analog_weather(first_day, n_days),
+    }
+
+
+def _analog_forecast_features(day: Any) -> tuple[dict[str, Any], list[str]]:
+    """
+    Feature profiles for a day that has not closed yet, from DA prices (once
+    published), CAISO's load and renewable forecasts and the weather forecast.
+    Returns (blocks, names of features that could not be fetched).
+    """
+    end = day + pd.Timedelta(days=1)
+
+    def profile(df, column):
+        return daily_profiles(df["Interval Start"], df[column], day, 1)[0]
+
+    def da_price():
+        lmp, _ = fetch_lmp_bulk(caiso, list(CAISO_HUBS.values()), day, end, market="DAY_AHEAD_HOURLY")
+        if lmp.empty:
+            raise ValueError("Day-ahead prices not published yet")
+        return np.hstack([profile(lmp[lmp["Location"] == hub], "LMP") for hub in CAISO_HUBS.values()])
+
+    def load():
+        return profile(caiso.get_load_forecast(date=day, end=end), "Load Forecast")
+
+    def renewables():
+        df = caiso.get_renewables_forecast_dam(date=day, end=end)
+        # Keep the latest published forecast for each hour
+        df = df[df["Location"] == "CAISO"].sort_values("Publish Time").drop_duplicates("Interval Start", keep="last")
+        return profile(df, "Solar MW"), profile(df, "Wind MW")
+
+    blocks, unavailable = {}, []
+    for name, fetch in [("da_price", da_price), ("load", load), ("renewables", renewables), ("weather", lambda: _analog_weather(day, 1))]:
+        try:
+            value = fetch()
+        except Exception:
+            unavailable.append(name)
+            continue
+        if name == "weather":
+            blocks.update({block: values[0] for block, values in value.items()})
+        elif name == "renewables":
+            if "load" in blocks:
+                blocks["net_load"] = _net_load(blocks["load"], *value)
+        else:
+            blocks[name] = value
+    if "load" not in blocks or "renewables" in unavailable:
+        unavailable = [name for name in unavailable if name != "renewables"] + ["net_load"]
+    return blocks, unavailable
+
+
+def _analog_summary(blocks: dict[str, Any]) -> dict[str, float | None]:
+    """Headline numbers of a day's profiles."""
+    def stat(name, fn):
+        values = blocks.get(name)
+        if values is None or not np.isfinite(values).any():
+            return None
+        return round(float(fn(values)), 1)
+
+    return {
+        "avg_da_price": stat("da_price", np.nanmean),
+        "max_da_price": stat("da_price", np.nanmax),
+        "peak_load_mw": stat("load", np.nanmax),
+        "peak_net_load_mw": stat("net_load", np.nanmax),
+        "min_net_load_mw": stat("net_load", np.nanmin),
+        "max_temperature_f": stat("temperature_f", np.nanmax),
+        "avg_wind_speed_mph": stat("wind_speed_mph", np.nanmean),
+    }
+
+
+analog_history = AnalogHistory(_analog_history_features, ANALOG_FEATURES)
+
+
+def history_window(history_days: int = DEFAULT_ANALOG_HISTORY_DAYS) -> tuple[Any, Any]:
+    """First and last closed day of the analog history ending yesterday."""
+    today = pd.Timestamp.now(tz=CAISO_TZ).normalize()
+    return (today - pd.Timedelta(days=history_days)).date(), (today - pd.Timedelta(days=1)).date()
+
+
+def find_analog_days(
+    date: str | None = None,
+    k: int = 5,
+    history_days: int = DEFAULT_ANALOG_HISTORY_DAYS,
+    season_days: int | None = None,
+    features: list[str] | None = None,
+) -> dict[str, Any]:
+    """
+    Finds the k historical days most similar to a given day (or to today's /
+    tomorrow's forecast) by their 24-hour profiles of hub day-ahead prices,
+    system load, net load (load - solar - wind) and zonal weather (temperature
+    per zone, solar radiation, wind speed).
+
+    Args:
+        date: Target day in YYYY-MM-DD format. Past days use actuals; today and
+            later days use DA prices (if published) and CAISO load, renewable
+            and weather forecasts. Defaults to today.
+        k: Number of analog days to return. Defaults to 5.
+        history_days: How many closed days before today to search. Defaults to 365.
+            Only days already in the local feature history are searched; any
+            missing ones are fetched by a background backfill, so a cold
+            history answers from fewer days (see "history") until it is built.
+        season_days: If set, only consider days within this many calendar days
+            of the target's day of year (e.g. 30 for the same season). Optional.
+        features: Subset of "da_price", "load", "net_load", "temperature_f",
+            "solar_radiation_wm2", "wind_speed_mph" to compare on. Defaults to all.
+
+    Returns:
+        Dictionary with the target's summary and the features compared, and
+        the analog days nearest first, each with its distance (RMS difference
+        in standard deviations), per-feature distances and a summary (average
+        and max DA price, peak load, net load range, max temperature), and
+        the history searched: its range, days used out of those requested,
+        days still missing and whether the backfill is running.
+    """
+    try:
+        today = pd.Timestamp.now(tz=CAISO_TZ).normalize()
+        try:
+            day = today if date in (None, "today") else pd.Timestamp(datetime.strptime(date, "%Y-%m-%d")).tz_localize(CAISO_TZ)
+        except ValueError:
+            return {"error": "Dates must be in YYYY-MM-DD format"}
+        if not 1 <= history_days <= MAX_ANALOG_HISTORY_DAYS:
+            return {"error": f"history_days must be between 1 and {MAX_ANALOG_HISTORY_DAYS}"}
+        features = features or ANALOG_FEATURES
+        unknown = [name for name in features if name not in ANALOG_FEATURES]
+        if unknown:
+            return {"error": f"Unknown features: {unknown}. Use any of {ANALOG_FEATURES}."}
+
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        first_day, last_day = history_window(history_days)
+        index = analog_history.index(first_day, last_day)
+        missing = len(analog_history.missing(first_day, last_day))
+        if missing:
+            # Fetching a cold year is ~1,100 OASIS pulls; answer from what is
+            # cached and build the rest in the background
+            analog_history.start_backfill(first_day, last_day)
+        history = {
+            "start": str(index.dates[0]) if len(index) else None,
+            "end": str(index.dates[-1]) if len(index) else None,
+            "days": len(index),
+            "requested_days": history_days,
+            "missing_days": missing,
+            "backfilling": analog_history.backfilling,
+        }
+        timings["history"] = round((time.perf_counter() - started) * 1000, 1)
+        if not len(index):
+            return {
+                "error": "No analog history built yet; it is being fetched in the background, try again in a few minutes",
+                "history": history,
+            }
+
+        started = time.perf_counter()
+        unavailable = []
+        if day >= today:
+            mode = "forecast"
+            target, unavailable = _analog_forecast_features(day)
+        else:
+            mode = "actual"
+            target = index.vector(day.date()) or {
+                name: values[0] for name, values in _analog_history_features(day, 1).items()
+            }
+        timings["target"] = round((time.perf_counter() - started) * 1000, 1)
+
+        started = time.perf_counter()
+        compared = {name: values for name, values in target.items() if name in features}
+        analogs = index.query(compared, k=k, exclude=[day.date()], season_days=season_days, target_date=day.date())
+        timings["query"] = round((time.perf_counter() - started) * 1000, 2)
+        if not analogs:
+            return {"error": "No comparable days found", "date": day.strftime("%Y-%m-%d"), "unavailable_features": unavailable, "history": history}
+
+        return {
+            "date": day.strftime("%Y-%m-%d"),
+            "mode": mode,
+            "features_compared": list(analogs[0]["feature_distances"]),
+            "unavailable_features": unavailable,
+            "target": _analog_summary(target),
+            "analogs": [
+                {**analog, "summary": _analog_summary(index.vector(analog["date"]))}
+                for analog in analogs
+            ],
+            "history": history,
+            "timings_ms": timings,
+        }
+    except Exception as e:
+        return {"error": f"Failed to find analog days: {str(e)}"}
+
+
+find_analog_days_async = async_tool(find_analog_days)
+
+
+def main() -> None:
+    """Build or extend the analog feature history in the foreground."""
+    parser = argparse.ArgumentParser(description="Backfill the analog-day feature history (GRIDPILOT_ANALOG_HISTORY_PATH).")
+    parser.add_argument("--days", type=int, default=DEFAULT_ANALOG_HISTORY_DAYS, help="closed days before today to cover")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    first_day, last_day = history_window(args.days)
+    started = time.perf_counter()
+    added = analog_history.backfill(first_day, last_day)
+    print(f"Added {added} days in {time.perf_counter() - started:.0f} s: {analog_history.status()}")
+
+
+if __name__ == "__main__":
+    main()
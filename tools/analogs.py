@@ -0,0 +1,342 @@
+"""
+Analog-day search over daily feature profiles.
+Each day is a set of 24-hour profiles (hub prices, load, net load, zonal
+weather). Blocks are z-scored per hour column and scaled so every block
+weighs the same, then the k most similar days are found by exact
+nearest-neighbour search over one (day x feature) matrix. With a few hundred
+dimensions a tree index would not prune anything, so the search is a single
+matrix-vector product per query.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import date as date_type
+from typing import Any, Callable
+from tools.cache import CAISO_TZ
+from tools.lazy import lazy_import
+from tools.lmp_analytics import group_mean
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+ANALOG_HISTORY_PATH = os.getenv("GRIDPILOT_ANALOG_HISTORY_PATH", os.path.join("data", "analog_features.npz"))
+
+# Days fetched (and saved) per step of a history backfill
+BACKFILL_CHUNK_DAYS = int(os.getenv("GRIDPILOT_ANALOG_BACKFILL_CHUNK_DAYS", "31"))
+
+# Share of a block's hours a day needs for the block to count in a comparison
+MIN_BLOCK_COVERAGE = 0.5
+
+
+def daily_profiles(times: Any, values: Any, first_day: pd.Timestamp, n_days: int) -> np.ndarray:
+    """
+    Mean value per Pacific (day, hour) as an (n_days x 24) array, NaN where
+    there is no data. Sub-hourly data is averaged into its hour; the repeated
+    hour of a 25-hour DST day is averaged too.
+    """
+    local = pd.DatetimeIndex(times).tz_convert(CAISO_TZ)
+    day = (local.tz_localize(None).normalize() - first_day.tz_localize(None).normalize()).days.to_numpy()
+    hour = local.hour.to_numpy()
+    keep = (day >= 0) & (day < n_days)
+    labels = day[keep] * 24 + hour[keep]
+    values = np.asarray(values, dtype=float)[keep]
+    return group_mean(values, labels, n_days * 24).reshape(n_days, 24)
+
+
+class AnalogIndex:
+    """
+    Exact k-nearest-neighbour index over daily feature blocks.
+
+    Args:
+        dates: Day of each row (anything np.datetime64[D] accepts).
+        blocks: Block name -> (days x width) raw values, NaN where missing.
+        weights: Block name -> relative weight; defaults to 1 for each block.
+    """
+
+    def __init__(self, dates: Any, blocks: dict[str, np.ndarray], weights: dict[str, float] | None = None):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.names = list(blocks)
+        self.raw = {name: np.asarray(values, dtype=float) for name, values in blocks.items()}
+        self.weights = {name: float((weights or {}).get(name, 1.0)) for name in self.names}
+        self._position = {day: i for i, day in enumerate(self.dates.tolist())}
+        self._day_of_year = pd.DatetimeIndex(self.dates).dayofyear.to_numpy()
+
+        self._mean, self._scale, self._slices = {}, {}, {}
+        columns, present_blocks, offset = [], [], 0
+        for name in self.names:
+            values = self.raw[name]
+            present = np.isfinite(values)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                counts = present.sum(axis=0)
+                mean = np.where(counts > 0, np.where(present, values, 0.0).sum(axis=0) / np.maximum(counts, 1), 0.0)
+                var = np.where(counts > 0, np.where(present, (values - mean) ** 2, 0.0).sum(axis=0) / np.maximum(counts, 1), 0.0)
+            std = np.sqrt(var)
+            # Each block's squared distance is a weighted mean over its columns, so blocks of
+            # different widths (one hub vs three) weigh the same
+            scale = np.sqrt(self.weights[name] / values.shape[1]) / np.where(std > 0, std, 1.0)
+            self._mean[name], self._scale[name] = mean, scale
+            self._slices[name] = slice(offset, offset + values.shape[1])
+            offset += values.shape[1]
+            # Missing hours sit at the column mean, i.e. contribute nothing either way
+            columns.append(np.where(present, (values - mean) * scale, 0.0))
+            present_blocks.append(present.mean(axis=1) >= MIN_BLOCK_COVERAGE)
+        days = len(self.dates)
+        self._matrix = np.ascontiguousarray(np.hstack(columns)) if columns else np.zeros((days, 0))
+        self._present = np.column_stack(present_blocks) if present_blocks else np.zeros((days, 0), dtype=bool)
+        self._norms = np.column_stack([
+            np.einsum("ij,ij->i", self._matrix[:, self._slices[name]], self._matrix[:, self._slices[name]])
+            for name in self.names
+        ]) if self.names else np.zeros((days, 0))
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def vector(self, day: Any) -> dict[str, np.ndarray] | None:
+        """Raw blocks of a day in the index, or None if it is not there."""
+        i = self._position.get(np.datetime64(day, "D").item())
+        if i is None:
+            return None
+        return {name: self.raw[name][i] for name in self.names}
+
+    def query(
+        self,
+        target: dict[str, np.ndarray],
+        k: int = 5,
+        exclude: list[Any] | None = None,
+        season_days: int | None = None,
+        target_date: Any = None,
+    ) -> list[dict[str, Any]]:
+        """
+        The k days closest to target.
+
+        Only blocks present in target (and covering at least
+        MIN_BLOCK_COVERAGE of their hours) are compared, so a forecast with no
+        prices is matched on load and weather alone.
+
+        Args:
+            target: Block name -> raw values (NaN where missing).
+            k: Number of analogs.
+            exclude: Days never returned (e.g. the target day itself).
+            season_days: If set, only days within this many calendar days of
+                target_date's day of year, in any year.
+            target_date: Day of the target; needed for season_days.
+
+        Returns:
+            Analogs nearest first, each with "date", "distance" (RMS z-score
+            difference over the blocks used) and "feature_distances" per block.
+        """
+        used = []
+        # Blocks left out of the comparison stay zero in q, so one product over
+        # the whole matrix gives the cross terms of the used blocks only
+        q = np.zeros(self._matrix.shape[1])
+        for b, name in enumerate(self.names):
+            values = target.get(name)
+            if values is None or self.weights[name] <= 0:
+                continue
+            values = np.asarray(values, dtype=float)
+            present = np.isfinite(values)
+            if present.mean() < MIN_BLOCK_COVERAGE:
+                continue
+            used.append(b)
+            q[self._slices[name]] = np.where(present, (values - self._mean[name]) * self._scale[name], 0.0)
+        if not used or not len(self.dates):
+            return []
+
+        # |x - q|^2 = |x|^2 - 2 x.q + |q|^2
+        distance = np.maximum(self._norms[:, used].sum(axis=1) - 2 * (self._matrix @ q) + q @ q, 0.0)
+        total_weight = sum(self.weights[self.names[b]] for b in used)
+
+        candidates = self._present[:, used].all(axis=1)
+        if exclude:
+            excluded = np.asarray(exclude, dtype="datetime64[D]")
+            candidates &= ~np.isin(self.dates, excluded)
+        if season_days is not None and target_date is not None:
+            target_doy = pd.Timestamp(np.datetime64(target_date, "D")).dayofyear
+            gap = np.abs(self._day_of_year - target_doy)
+            candidates &= np.minimum(gap, 365 - gap) <= season_days
+
+        rows = np.flatnonzero(candidates)
+        if not len(rows):
+            return []
+        k = min(k, len(rows))
+        nearest = rows[np.argpartition(distance[rows], k - 1)[:k]]
+        nearest = nearest[np.argsort(distance[nearest], kind="stable")]
+        # Per-block breakdown for the returned days only
+        names = [self.names[b] for b in used]
+        diff = self._matrix[nearest] - q
+        per_block = np.column_stack([np.einsum("ij,ij->i", diff[:, self._slices[name]], diff[:, self._slices[name]]) for name in names])
+        block_distances = np.round(np.sqrt(per_block / np.array([self.weights[name] for name in names])), 3).tolist()
+        distances = np.round(np.sqrt(distance[nearest] / total_weight), 3).tolist()
+        return [
+            {"date": str(day), "distance": dist, "feature_distances": dict(zip(names, blocks))}
+            for day, dist, blocks in zip(self.dates[nearest], distances, block_distances)
+        ]
+
+
+class AnalogHistory:
+    """
+    Disk-cached daily feature blocks, extended incrementally.
+
+    fetch(first_day, n_days) returns block name -> (n_days x width) arrays for
+    that run of days; only closed days (before today, Pacific) are kept. A
+    cache written for a different feature set is discarded.
+
+    index() answers from the days already cached and never fetches. Missing
+    days are filled by backfill(), newest first and saved chunk by chunk, run
+    in the foreground or on a daemon thread with start_backfill(), so a cold
+    cache costs no tool call a year of pulls.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[pd.Timestamp, int], dict[str, np.ndarray]],
+        features: list[str],
+        path: str = ANALOG_HISTORY_PATH,
+        chunk_days: int = BACKFILL_CHUNK_DAYS,
+    ):
+        self._fetch = fetch
+        self.features = list(features)
+        self.path = path
+        self.chunk_days = chunk_days
+        self._dates = None
+        self._blocks: dict[str, np.ndarray] = {}
+        self._index: AnalogIndex | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._error: str | None = None
+
+    def _load(self) -> None:
+        if self._dates is not None:
+            return
+        self._dates = np.zeros(0, dtype="datetime64[D]")
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                blocks = {name[len("block_"):]: data[name] for name in data.files if name.startswith("block_")}
+                if sorted(blocks) == sorted(self.features):
+                    self._dates = data["dates"].astype("datetime64[D]")
+                    self._blocks = blocks
+        except (OSError, ValueError, KeyError):
+            # Unreadable cache: start over rather than fail the tool
+            self._dates, self._blocks = np.zeros(0, dtype="datetime64[D]"), {}
+
+    def _save(self) -> None:
+        if self.path == ":memory:":
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, dates=self._dates, **{f"block_{name}": values for name, values in self._blocks.items()})
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _closed_days(start: date_type, end: date_type) -> np.ndarray:
+        today = pd.Timestamp.now(tz=CAISO_TZ).date()
+        end = min(end, today - pd.Timedelta(days=1))
+        return np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+
+    def index(self, start: date_type, end: date_type) -> AnalogIndex:
+        """Index over the cached closed days in [start, end]; never fetches."""
+        wanted = self._closed_days(start, end)
+        with self._lock:
+            self._load()
+            cached = wanted[np.isin(wanted, self._dates)]
+            if self._index is None or not np.array_equal(self._index.dates, cached):
+                rows = np.flatnonzero(np.isin(self._dates, cached))
+                self._index = AnalogIndex(self._dates[rows], {name: values[rows] for name, values in self._blocks.items()})
+            return self._index
+
+    def missing(self, start: date_type, end: date_type) -> np.ndarray:
+        """Closed days in [start, end] not cached yet."""
+        wanted = self._closed_days(start, end)
+        with self._lock:
+            self._load()
+            return wanted[~np.isin(wanted, self._dates)]
+
+    def backfill(self, start: date_type, end: date_type) -> int:
+        """
+        Fetch and cache the missing closed days in [start, end], newest first
+        in chunks of chunk_days, saving after each chunk so index() sees the
+        progress. Returns the number of days added.
+        """
+        missing = self.missing(start, end)
+        # Contiguous runs, so each chunk is one ranged pull per source
+        breaks = np.flatnonzero(np.diff(missing) != np.timedelta64(1, "D")) + 1
+        added = 0
+        for run in reversed(np.split(missing, breaks) if len(missing) else []):
+            for stop in range(len(run), 0, -self.chunk_days):
+                if self._stop.is_set():
+                    return added
+                chunk = run[max(stop - self.chunk_days, 0):stop]
+                blocks = self._fetch(pd.Timestamp(chunk[0]).tz_localize(CAISO_TZ), len(chunk))
+                with self._lock:
+                    self._add(chunk, blocks)
+                    self._save()
+                added += len(chunk)
+                logger.info("Analog history: cached %s to %s", chunk[0], chunk[-1])
+        return added
+
+    def _add(self, days: np.ndarray, blocks: dict[str, np.ndarray]) -> None:
+        keep = ~np.isin(days, self._dates)
+        for name in self.features:
+            values = blocks[name][keep]
+            stored = self._blocks.get(name)
+            self._blocks[name] = values if stored is None else np.concatenate([stored, values])
+        self._dates = np.concatenate([self._dates, days[keep]])
+        order = np.argsort(self._dates, kind="stable")
+        self._dates = self._dates[order]
+        self._blocks = {name: values[order] for name, values in self._blocks.items()}
+
+    @property
+    def backfilling(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start_backfill(self, start: date_type, end: date_type) -> bool:
+        """
+        Backfill [start, end] on a daemon thread unless one is already
+        running. Returns whether a thread was started.
+        """
+        with self._lock:
+            if self.backfilling:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run_backfill, args=(start, end), name="gridpilot-analog-backfill", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop a running backfill after its current chunk."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run_backfill(self, start: date_type, end: date_type) -> None:
+        try:
+            added = self.backfill(start, end)
+            self._error = None
+            logger.info("Analog history backfill added %d days", added)
+        except Exception as e:
+            # The next tool call that finds days missing starts another attempt
+            self._error = str(e)
+            logger.warning("Analog history backfill failed: %s", e)
+
+    def status(self) -> dict[str, Any]:
+        """Cached day count and range, whether a backfill is running and its last error."""
+        with self._lock:
+            self._load()
+            dates = self._dates
+        return {
+            "days": len(dates),
+            "first": str(dates[0]) if len(dates) else None,
+            "last": str(dates[-1]) if len(dates) else None,
+            "backfilling": self.backfilling,
+            "error": self._error,
+        }
@@ -0,0 +1,250 @@
+"""
+Revenue-maximizing battery dispatch over price history.
+Each row of a (row x interval) price matrix - typically one site-day - is an
+independent problem: start and end at the same state of charge, charge and
+discharge within the power rating, lose energy to round-trip efficiency and
+stay under a cycle limit. Rows are solved together by a backward dynamic
+program over a discretized state of charge, one array operation per
+(interval, step size) across every row. The cycle limit is enforced with a
+per-row Lagrange penalty on discharged energy, bisected for all rows at once.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from tools.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Most state-of-charge steps per interval at full power; finer grids are slower
+MAX_RESOLUTION = 8
+# Bisection steps for the cycle-limit penalty
+PENALTY_STEPS = 16
+# Rows per worker process when solving across processes
+ROWS_PER_WORKER = int(os.getenv("GRIDPILOT_DISPATCH_ROWS_PER_WORKER", "20000"))
+
+
+def _grid(power_mw: float, energy_mwh: float, interval_hours: float, resolution: int | None) -> tuple[float, int, int]:
+    """
+    (MWh per state-of-charge level, number of levels above empty, steps per
+    interval at full power). Without a resolution, the coarsest grid on which
+    the capacity is a whole number of levels, up to MAX_RESOLUTION.
+    """
+    full_step = power_mw * interval_hours
+    if resolution is None:
+        resolution = next(
+            (r for r in range(1, MAX_RESOLUTION + 1) if abs(energy_mwh * r / full_step - round(energy_mwh * r / full_step)) < 1e-6),
+            MAX_RESOLUTION,
+        )
+    step = full_step / resolution
+    levels = int(np.floor(energy_mwh / step + 1e-9))
+    if levels < 1:
+        raise ValueError("energy_mwh must hold at least one state-of-charge step; raise the resolution")
+    return step, levels, resolution
+
+
+def _solve(
+    prices: np.ndarray,
+    penalty: np.ndarray,
+    step: float,
+    levels: int,
+    resolution: int,
+    charge_eff: float,
+    discharge_eff: float,
+    start_level: int,
+) -> np.ndarray:
+    """
+    Backward DP for every row at once, then a forward pass for the policy.
+
+    Returns:
+        (row x interval) level change per interval (positive charges).
+    """
+    rows, intervals = prices.shape
+    tradable = np.isfinite(prices)
+    # Level-major (level x row) so each move compares contiguous blocks
+    prices = np.where(tradable, prices, 0.0).T.astype(np.float32)
+    penalty = np.asarray(penalty, dtype=np.float32)
+    value = np.full((levels + 1, rows), -np.inf, dtype=np.float32)
+    value[start_level] = 0.0
+    choice = np.zeros((intervals, levels + 1, rows), dtype=np.int8)
+    # Idle is the default, so ties never trade for nothing; smaller moves before larger
+    moves = [sign * k for k in range(1, resolution + 1) for sign in (1, -1)]
+    charge_cost = np.float32(step / charge_eff)
+    discharge_gain = np.float32(step * discharge_eff)
+    blocked = ~tradable.T
+
+    for t in range(intervals - 1, -1, -1):
+        best = value.copy()
+        arg = choice[t]
+        charge = -prices[t] * charge_cost
+        discharge = prices[t] * discharge_gain - penalty * np.float32(step)
+        if blocked[t].any():
+            charge[blocked[t]] = -np.inf
+            discharge[blocked[t]] = -np.inf
+        for move in moves:
+            reward = charge * move if move > 0 else discharge * -move
+            # Level i moves to i + move, which must stay within [0, levels]
+            lo, hi = max(0, -move), min(levels + 1, levels + 1 - move)
+            candidate = value[lo + move:hi + move] + reward
+            better = candidate > best[lo:hi]
+            np.copyto(best[lo:hi], candidate, where=better)
+            np.copyto(arg[lo:hi], np.int8(move), where=better)
+        value = best
+
+    moves_taken = np.zeros((rows, intervals), dtype=np.int64)
+    level = np.full(rows, start_level)
+    row_index = np.arange(rows)
+    for t in range(intervals):
+        move = choice[t, level, row_index]
+        moves_taken[:, t] = move
+        level = level + move
+    return moves_taken
+
+
+def _discharged(moves: np.ndarray) -> np.ndarray:
+    return np.clip(-moves, 0, None).sum(axis=1)
+
+
+def _net_mwh(moves: np.ndarray, step: float, charge_eff: float, discharge_eff: float) -> np.ndarray:
+    """Grid-side energy per interval (positive exports) for level changes."""
+    return np.clip(-moves, 0, None) * step * discharge_eff - np.clip(moves, 0, None) * step / charge_eff
+
+
+def _revenue(prices: np.ndarray, net_mwh: np.ndarray) -> np.ndarray:
+    return (np.where(np.isfinite(prices), prices, 0.0) * net_mwh).sum(axis=1)
+
+
+def optimize_dispatch(
+    prices: Any,
+    power_mw: float,
+    energy_mwh: float,
+    round_trip_efficiency: float = 0.85,
+    max_cycles: float | None = None,
+    interval_hours: float = 1.0,
+    resolution: int | None = None,
+    initial_soc: float = 0.0,
+    workers: int = 1,
+) -> dict[str, np.ndarray]:
+    """
+    Revenue-maximizing charge/discharge schedule for each row of prices.
+
+    Power limits the energy moved into or out of the cells per interval; the
+    round-trip loss is split evenly between charging and discharging. A row
+    starts and ends at initial_soc. NaN prices are intervals the battery sits
+    out. The schedule is optimal over the discretized state of charge. The
+    grid defaults to the coarsest that fits the capacity in whole steps:
+    arbitrage optima sit at full-power moves, so finer grids mostly add
+    cost. The cycle limit is met by penalizing discharge, which can leave a
+    little revenue on the table when the limit falls between two discrete
+    schedules.
+
+    Args:
+        prices: (row x interval) $/MWh, e.g. one row per site-day.
+        power_mw: Charge/discharge rating.
+        energy_mwh: Usable capacity.
+        round_trip_efficiency: Energy out / energy in (0-1].
+        max_cycles: Most full-capacity discharges per row; None for no limit.
+        interval_hours: Length of one interval.
+        resolution: State-of-charge steps per interval at full power. Defaults
+            to the coarsest grid that fits the capacity in whole steps (at most 8).
+        initial_soc: State of charge (0-1) at the start and end of every row.
+        workers: Processes to split the rows across.
+
+    Returns:
+        Dict of (row x interval) "charge_mw", "discharge_mw" (battery side),
+        "net_mw" (grid side, positive exports), "soc_mwh" at the end of each
+        interval, and per row "revenue" ($), "discharged_mwh", "cycles" and
+        "penalty" ($/MWh discharged that met the cycle limit).
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=float))
+    if power_mw <= 0 or energy_mwh <= 0:
+        raise ValueError("power_mw and energy_mwh must be positive")
+    if not 0 < round_trip_efficiency <= 1:
+        raise ValueError("round_trip_efficiency must be in (0, 1]")
+    if max_cycles is not None and max_cycles < 0:
+        raise ValueError("max_cycles must not be negative")
+    if not 0 <= initial_soc <= 1:
+        raise ValueError("initial_soc must be between 0 and 1")
+    if resolution is not None and not 1 <= resolution <= 64:
+        raise ValueError("resolution must be between 1 and 64")
+
+    args = (power_mw, energy_mwh, round_trip_efficiency, max_cycles, interval_hours, resolution, initial_soc)
+    if workers > 1 and len(prices) > ROWS_PER_WORKER:
+        chunks = np.array_split(prices, min(workers, -(-len(prices) // ROWS_PER_WORKER)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_optimize_rows, chunks, *[[arg] * len(chunks) for arg in args]))
+        return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    return _optimize_rows(prices, *args)
+
+
+def _optimize_rows(
+    prices: np.ndarray,
+    power_mw: float,
+    energy_mwh: float,
+    round_trip_efficiency: float,
+    max_cycles: float | None,
+    interval_hours: float,
+    resolution: int | None,
+    initial_soc: float,
+) -> dict[str, np.ndarray]:
+    step, levels, resolution = _grid(power_mw, energy_mwh, interval_hours, resolution)
+    start_level = int(round(initial_soc * levels))
+    charge_eff = discharge_eff = float(np.sqrt(round_trip_efficiency))
+
+    def solve(rows: np.ndarray, penalty: np.ndarray) -> np.ndarray:
+        return _solve(prices[rows], penalty, step, levels, resolution, charge_eff, discharge_eff, start_level)
+
+    def revenue(rows: np.ndarray, moves: np.ndarray) -> np.ndarray:
+        return _revenue(prices[rows], _net_mwh(moves, step, charge_eff, discharge_eff))
+
+    penalty = np.zeros(len(prices))
+    moves = solve(np.arange(len(prices)), penalty)
+    if max_cycles is not None:
+        # Discharged levels allowed per row
+        limit = max_cycles * energy_mwh / step + 1e-9
+        over = np.flatnonzero(_discharged(moves) > limit)
+        if len(over):
+            lo = np.zeros(len(over))
+            # Above this penalty no charge-discharge round trip pays, so the limit is met
+            finite = np.where(np.isfinite(prices[over]), prices[over], np.nan)
+            spread = np.nanmax(finite, axis=1) * discharge_eff - np.nanmin(finite, axis=1) / charge_eff
+            hi = np.maximum(spread, 0.0) + 1.0
+            best = solve(over, hi)
+            best_revenue = revenue(over, best)
+            best_penalty = hi.copy()
+            active = np.arange(len(over))
+            for _ in range(PENALTY_STEPS):
+                mid = (lo[active] + hi[active]) / 2
+                trial = solve(over[active], mid)
+                discharged = _discharged(trial)
+                feasible = discharged <= limit
+                # Keep the best schedule within the limit seen at any penalty
+                trial_revenue = revenue(over[active], trial)
+                gain = feasible & (trial_revenue > best_revenue[active])
+                best[active[gain]] = trial[gain]
+                best_revenue[active[gain]] = trial_revenue[gain]
+                best_penalty[active[gain]] = mid[gain]
+                hi[active] = np.where(feasible, mid, hi[active])
+                lo[active] = np.where(feasible, lo[active], mid)
+                # A schedule using exactly the allowed discharge is optimal for its penalty
+                active = active[~(feasible & (discharged >= limit - 1e-6))]
+                if not len(active):
+                    break
+            moves[over] = best
+            penalty[over] = best_penalty
+
+    charge = np.clip(moves, 0, None) * step
+    discharge = np.clip(-moves, 0, None) * step
+    net = _net_mwh(moves, step, charge_eff, discharge_eff)
+    return {
+        "charge_mw": charge / interval_hours,
+        "discharge_mw": discharge / interval_hours,
+        "net_mw": net / interval_hours,
+        "soc_mwh": start_level * step + np.cumsum(moves, axis=1) * step,
+        "revenue": _revenue(prices, net),
+        "discharged_mwh": discharge.sum(axis=1),
+        "cycles": discharge.sum(axis=1) / energy_mwh,
+        "penalty": penalty,
+    }
@@ -0,0 +1,157 @@
+"""
+Bulk nodal LMP retrieval for portfolios of hundreds of nodes.
+Packs node lists into OASIS-sized requests per trading day, runs them on the
+shared rate-limited OASIS pool, and folds each batch into column arrays as it
+arrives, building one frame with a categorical Location column at the end.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import time
+from typing import Any
+from tools.fetch import RangeFetcher, range_fetcher, split_range
+from tools.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# OASIS PRC_LMP accepts a comma-separated node list; larger lists are rejected
+LMP_NODES_PER_REQUEST = int(os.getenv("GRIDPILOT_LMP_NODES_PER_REQUEST", "10"))
+# Above this many nodes, day-ahead pulls request every node for the day in one
+# query and keep the requested ones (OASIS allows that for a day of DA prices,
+# real-time "all nodes" queries are limited to an hour)
+LMP_ALL_NODES_THRESHOLD = int(os.getenv("GRIDPILOT_LMP_ALL_NODES_THRESHOLD", "100"))
+
+LMP_COLUMNS = ["LMP", "Energy", "Congestion", "Loss"]
+
+
+def plan_batches(
+    nodes: list[str],
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    market: str,
+    nodes_per_request: int = LMP_NODES_PER_REQUEST,
+    all_nodes_threshold: int = LMP_ALL_NODES_THRESHOLD,
+) -> list[tuple[list[str] | str, pd.Timestamp, pd.Timestamp]]:
+    """
+    Split a (nodes x [start, end)) pull into (locations, day start, day end) requests.
+
+    Requests cover one trading day so closed days line up with the local
+    store's daily coverage; locations is "ALL" for large day-ahead pulls.
+    """
+    days = split_range(start, end, 1)
+    if market == "DAY_AHEAD_HOURLY" and len(nodes) > all_nodes_threshold:
+        return [("ALL", day_start, day_end) for day_start, day_end in days]
+    groups = [nodes[i:i + nodes_per_request] for i in range(0, len(nodes), nodes_per_request)]
+    return [(group, day_start, day_end) for day_start, day_end in days for group in groups]
+
+
+class _Columns:
+    """Append-only column arrays for LMP rows, with nodes stored as category codes."""
+
+    def __init__(self, nodes: list[str]):
+        self.nodes = nodes
+        self._codes = {node: i for i, node in enumerate(nodes)}
+        self._parts: dict[str, list[np.ndarray]] = {name: [] for name in ["Interval Start", "Location", *LMP_COLUMNS]}
+        self.rows = 0
+
+    def add(self, df: pd.DataFrame) -> set[str]:
+        """Append the rows of requested nodes; returns the nodes seen."""
+        if df is None or df.empty:
+            return set()
+        codes = df["Location"].map(self._codes).to_numpy(dtype=float, na_value=np.nan)
+        keep = ~np.isnan(codes)
+        if not keep.any():
+            return set()
+        self._parts["Location"].append(codes[keep].astype(np.int32))
+        self._parts["Interval Start"].append(df["Interval Start"].to_numpy(dtype="datetime64[ns]")[keep])
+        for column in LMP_COLUMNS:
+            values = df[column].to_numpy(dtype=float) if column in df else np.full(len(df), np.nan)
+            self._parts[column].append(values[keep])
+        self.rows += int(keep.sum())
+        return {self.nodes[i] for i in np.unique(self._parts["Location"][-1])}
+
+    def frame(self, tz: str) -> pd.DataFrame:
+        """One frame ordered by interval then node, Location as a categorical."""
+        if not self.rows:
+            return pd.DataFrame({
+                "Interval Start": pd.DatetimeIndex([], tz=tz),
+                "Location": pd.Categorical([], categories=self.nodes),
+                **{column: np.zeros(0) for column in LMP_COLUMNS},
+            })
+        stamps = np.concatenate(self._parts["Interval Start"])
+        codes = np.concatenate(self._parts["Location"])
+        order = np.lexsort((codes, stamps))
+        return pd.DataFrame({
+            "Interval Start": pd.to_datetime(stamps[order], utc=True).tz_convert(tz),
+            "Location": pd.Categorical.from_codes(codes[order], categories=self.nodes),
+            **{column: np.concatenate(self._parts[column])[order] for column in LMP_COLUMNS},
+        })
+
+
+def fetch_lmp_bulk(
+    client: Any,
+    nodes: list[str],
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    market: str = "DAY_AHEAD_HOURLY",
+    fetcher: RangeFetcher | None = None,
+) -> tuple[pd.DataFrame, dict[str, Any]]:
+    """
+    Fetch LMPs for many nodes over [start, end).
+
+    Batches run concurrently on the OASIS pool, whose rate limiter spaces
+    request starts; gridstatus' own fixed sleep after each request is turned
+    off so workers are not held idle. A failed batch is reported and the
+    rest of the pull continues.
+
+    Args:
+        client: gridstatus-style client with get_lmp (normally the shared caiso client).
+        nodes: Node IDs, in the order of the Location categories.
+        start: Tz-aware start of the window.
+        end: Tz-aware exclusive end of the window.
+        market: gridstatus LMP market name.
+        fetcher: Pool to run the requests on; defaults to the shared OASIS pool.
+
+    Returns:
+        (frame with Interval Start, Location (categorical), LMP, Energy,
+        Congestion, Loss; report with request counts, failures, missing
+        nodes, elapsed seconds and nodes/second)
+    """
+    fetcher = fetcher if fetcher is not None else range_fetcher
+    nodes = list(dict.fromkeys(nodes))
+    batches = plan_batches(nodes, start, end, market)
+    calls = [
+        functools.partial(client.get_lmp, date=day_start, end=day_end, market=market, locations=locations, sleep=0)
+        for locations, day_start, day_end in batches
+    ]
+
+    columns = _Columns(nodes)
+    seen: set[str] = set()
+    failures = []
+    started = time.perf_counter()
+    for i, df, error in fetcher.stream(calls):
+        if error is not None:
+            locations, day_start, _ = batches[i]
+            failures.append({
+                "nodes": locations,
+                "day": day_start.strftime("%Y-%m-%d"),
+                "error": str(error),
+            })
+            continue
+        seen |= columns.add(df)
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "nodes": len(nodes),
+        "days": len(split_range(start, end, 1)),
+        "requests": len(batches),
+        "failed_requests": failures,
+        "missing_nodes": [node for node in nodes if node not in seen],
+        "rows": columns.rows,
+        "seconds": round(elapsed, 2),
+        "nodes_per_second": round(len(seen) / elapsed, 1) if elapsed > 0 else None,
+    }
+    return columns.frame(str(start.tz)), report
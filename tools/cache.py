@@ -0,0 +1,308 @@
+"""
+Interval-aware caching for CAISO data pulls.
+Expiry follows CAISO publication cadence so repeated tool calls within the
+same 5-minute interval reuse one download.
+"""
+
+from __future__ import annotations
+
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable
+from tools.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+CAISO_TZ = "US/Pacific"
+INTERVAL_SECONDS = 300  # CAISO publishes real-time data every 5 minutes
+
+_LIVE_DATES = {"latest", "today"}
+
+# Days before today that CAISO may still publish late or revise (curtailment,
+# storage). Results touching them expire like live data and are not stored.
+SETTLEMENT_LAG_DAYS = int(os.getenv("GRIDPILOT_STORE_SETTLEMENT_DAYS", "2"))
+
+
+def next_interval_boundary(now: float | None = None) -> float:
+    """Return the epoch time of the next 5-minute publication boundary."""
+    if now is None:
+        now = time.time()
+    return (int(now // INTERVAL_SECONDS) + 1) * INTERVAL_SECONDS
+
+
+def to_caiso_timestamp(value: Any) -> pd.Timestamp | None:
+    """Parse a date argument into a tz-aware Pacific timestamp, or None if live/unparseable."""
+    if value is None:
+        return None
+    if isinstance(value, str) and value.strip().lower() in _LIVE_DATES:
+        return None
+    try:
+        ts = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        return None
+    if ts.tzinfo is None:
+        return ts.tz_localize(CAISO_TZ)
+    return ts.tz_convert(CAISO_TZ)
+
+
+def settled_cutoff() -> pd.Timestamp:
+    """Start of the oldest Pacific day that may still change; earlier days are final."""
+    return pd.Timestamp.now(tz=CAISO_TZ).normalize() - pd.Timedelta(days=SETTLEMENT_LAG_DAYS)
+
+
+def is_closed_range(date: Any, end: Any = None) -> bool:
+    """
+    Check whether a date/end query covers only settled historical days.
+
+    Args:
+        date: Start date as passed to gridstatus ("latest", "today", "YYYY-MM-DD" or Timestamp).
+        end: Exclusive end date for range queries. Optional.
+
+    Returns:
+        True if every interval in the query ended before the settled cutoff
+        (SETTLEMENT_LAG_DAYS before today, Pacific), so the data is final.
+    """
+    start = to_caiso_timestamp(date)
+    if start is None:
+        return False
+
+    if end is not None:
+        stop = to_caiso_timestamp(end)
+        if stop is None:
+            return False
+    else:
+        # A single date covers that whole day
+        stop = start.normalize() + pd.Timedelta(days=1)
+
+    return stop <= settled_cutoff()
+
+
+def expiry_for(date: Any, end: Any = None, now: float | None = None) -> float | None:
+    """
+    Compute when a cached result for this query should expire.
+
+    Returns:
+        Epoch seconds of the next 5-minute boundary for live or open-ended data,
+        or None if the query covers settled historical days and never expires.
+    """
+    if is_closed_range(date, end):
+        return None
+    return next_interval_boundary(now)
+
+
+def _freeze(value: Any) -> Any:
+    """Make a call argument hashable for use in a cache key."""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def make_key(namespace: str, method: str, arguments: dict[str, Any]) -> tuple:
+    """Build a cache key from the client namespace, method name and bound call arguments."""
+    return (namespace, method, _freeze(arguments))
+
+
+def bind_arguments(method: Callable[..., Any], args: tuple, kwargs: dict) -> dict[str, Any]:
+    """
+    Normalize a call to {parameter: value} so positional, keyword and
+    defaulted spellings of the same request share one key.
+    """
+    try:
+        bound = inspect.signature(method).bind(*args, **kwargs)
+    except (TypeError, ValueError):
+        return {"args": args, **kwargs}
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+class IntervalCache:
+    """
+    Thread-safe LRU cache whose entries expire on CAISO publication boundaries.
+
+    Cached values are shared between callers and must not be mutated in place.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float | None, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple, record: bool = True) -> tuple[bool, Any]:
+        """
+        Return (found, value) for a key, dropping it if it has expired.
+        Pass record=False to look up without touching the hit/miss counters.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or time.time() < expires_at:
+                    self._entries.move_to_end(key)
+                    if record:
+                        self.hits += 1
+                    return True, value
+                del self._entries[key]
+            if record:
+                self.misses += 1
+            return False, None
+
+    def set(self, key: tuple, value: Any, expires_at: float | None) -> None:
+        """Store a value until expires_at (epoch seconds), or forever if None."""
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls so only one runs per key.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is in flight wait for and share the leader's result or
+    exception. Nothing is retained once the call completes.
+    """
+
+    def __init__(self):
+        self._calls: dict[Any, Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def _join(self, key: Any) -> tuple[Future, bool]:
+        """Return the in-flight future for key and whether the caller is its leader."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _run(self, key: Any, future: Future, fn: Callable[[], Any]) -> Any:
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        """Run fn() once per concurrent key and return its result to every caller."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        return self._run(key, future, fn)
+
+    def stats(self) -> dict[str, Any]:
+        """Return how many calls executed versus joined an in-flight call."""
+        with self._lock:
+            return {
+                "executed": self.leaders,
+                "coalesced": self.shared,
+                "in_flight": len(self._calls),
+            }
+
+
+# Shared across grid, market and weather tools so identical upstream
+# requests coalesce regardless of which tool issued them
+flights = SingleFlight()
+
+
+class CachedClient:
+    """
+    Caching proxy in front of a gridstatus ISO client.
+
+    Every `get_*` method is cached by (method, date, end, market, other args)
+    and concurrent misses for the same key share a single upstream fetch;
+    any other attribute is passed through to the wrapped client unchanged.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        cache: IntervalCache | None = None,
+        namespace: str = "caiso",
+        single_flight: SingleFlight | None = None,
+    ):
+        self._client = client
+        self._cache = cache if cache is not None else IntervalCache()
+        self._namespace = namespace
+        self._flights = single_flight if single_flight is not None else flights
+
+    @property
+    def cache(self) -> IntervalCache:
+        return self._cache
+
+    def cache_stats(self) -> dict[str, Any]:
+        return {**self._cache.stats(), "single_flight": self._flights.stats()}
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not name.startswith("get_") or not callable(attr):
+            return attr
+        return self._cached_method(name, attr)
+
+    def _cached_method(self, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        def call(*args, **kwargs):
+            arguments = bind_arguments(method, args, kwargs)
+            key = make_key(self._namespace, name, arguments)
+            found, value = self._cache.get(key)
+            if found:
+                return value
+
+            def fetch():
+                # A flight that finished between our miss and joining may have filled the cache
+                found, value = self._cache.get(key, record=False)
+                if found:
+                    return value
+                value = method(*args, **kwargs)
+                expires_at = expiry_for(arguments.get("date"), arguments.get("end"))
+                self._cache.set(key, value, expires_at)
+                return value
+
+            return self._flights.do(key, fetch)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
@@ -0,0 +1,91 @@
+"""
+Helpers shared by the tool modules: building JSON-ready tool results from
+DataFrame columns, parsing tool date ranges, and latency percentiles for the
+stats endpoints.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+from tools.cache import CAISO_TZ
+from tools.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Latency samples kept per key (host, query) for percentiles
+LATENCY_SAMPLES = 512
+
+
+def percentile_ms(samples: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of sorted samples in seconds, as milliseconds."""
+    if not samples:
+        return None
+    return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 1)
+
+
+def isoformat(series: pd.Series) -> list[str | None]:
+    """
+    Column-wise equivalent of Timestamp.isoformat() for a datetime column.
+    NaT becomes None.
+    """
+    if series.empty:
+        return []
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        return [None if pd.isna(ts) else ts.isoformat() for ts in series]
+    missing = series.isna().to_numpy()
+    if (series.dt.microsecond.fillna(0) != 0).any() or (series.dt.nanosecond.fillna(0) != 0).any():
+        # Sub-second precision changes the isoformat layout; keep the exact per-value form
+        return [None if pd.isna(ts) else ts.isoformat() for ts in series]
+
+    if series.dt.tz is None:
+        wall = series
+        suffix = None
+    else:
+        wall = series.dt.tz_localize(None)
+        offsets = wall - series.dt.tz_convert("UTC").dt.tz_localize(None)
+        # Only a handful of distinct UTC offsets occur; format each once
+        suffix = offsets.map({offset: _format_utc_offset(offset) for offset in offsets.dropna().unique()})
+
+    text = np.datetime_as_string(wall.to_numpy(dtype="datetime64[s]"), unit="s").astype(object)
+    if suffix is not None:
+        text = text + suffix.fillna("").to_numpy(dtype=object)
+    text[missing] = None
+    return text.tolist()
+
+
+def _format_utc_offset(offset: pd.Timedelta) -> str:
+    minutes = int(offset.total_seconds() // 60)
+    sign = "+" if minutes >= 0 else "-"
+    hours, minutes = divmod(abs(minutes), 60)
+    return f"{sign}{hours:02d}:{minutes:02d}"
+
+
+def records(columns: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Zip per-column lists into row dicts. Columns are converted to native
+    Python values once per column instead of once per cell.
+    """
+    keys = list(columns)
+    values = [col.tolist() if hasattr(col, "tolist") else list(col) for col in columns.values()]
+    return [dict(zip(keys, row)) for row in zip(*values)]
+
+
+def day_window(start_date: str, end_date: str | None, max_days: int) -> tuple[Any, Any] | str:
+    """
+    Parse an inclusive YYYY-MM-DD range into a Pacific [start, end) window,
+    or return an error message.
+    """
+    end_date = end_date or start_date
+    try:
+        first = datetime.strptime(start_date, "%Y-%m-%d")
+        last = datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        return "Dates must be in YYYY-MM-DD format"
+    if last < first:
+        return "end_date must not be before start_date"
+    if (last - first).days + 1 > max_days:
+        return f"Range too long; request at most {max_days} days"
+    start = pd.Timestamp(first).tz_localize(CAISO_TZ)
+    return start, pd.Timestamp(last + timedelta(days=1)).tz_localize(CAISO_TZ)
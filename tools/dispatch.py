@@ -0,0 +1,174 @@
+"""
+Battery dispatch tool: revenue-maximizing charge/discharge schedules
+(tools.battery) for sites over their stored DA or RT prices.
+"""
+
+import os
+import time
+from typing import Any
+from tools.aio import async_tool
+from tools.battery import optimize_dispatch
+from tools.cache import CAISO_TZ
+from tools.common import day_window, records
+from tools.lazy import lazy_import
+from tools.lmp_analytics import group_mean
+from tools.price_store import price_store
+from tools.weather import resolve_node
+from tools.zonal import ZONES
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+DISPATCH_MARKETS = {"DA": "da_price_mwh", "RT": "rt_price_mwh"}
+MAX_DISPATCH_DAYS = 366
+MAX_DISPATCH_SITES_LISTED = 20
+DISPATCH_WORKERS = int(os.getenv("GRIDPILOT_DISPATCH_WORKERS", "1"))
+
+
+def _rounded_array(values: Any, digits: int = 2) -> list[float | None]:
+    return [round(float(v), digits) if np.isfinite(v) else None for v in values]
+
+
+def _site_day_prices(df: Any, column: str, first_day: Any, n_days: int) -> tuple[Any, Any]:
+    """
+    (site-day x 24) mean price per Pacific hour, rows grouped by node then
+    day, and the node index. A 23-hour DST day leaves its missing hour NaN.
+    """
+    codes, nodes = pd.factorize(df["node"])
+    local = df["timestamp"].dt.tz_convert(CAISO_TZ)
+    day = (local.dt.tz_localize(None).dt.normalize() - first_day.tz_localize(None)).dt.days.to_numpy()
+    keep = (day >= 0) & (day < n_days)
+    labels = (codes[keep] * n_days + day[keep]) * 24 + local.dt.hour.to_numpy()[keep]
+    values = df[column].to_numpy(dtype=float)[keep]
+    return group_mean(values, labels, len(nodes) * n_days * 24).reshape(len(nodes) * n_days, 24), nodes
+
+
+def optimize_battery_dispatch(
+    start_date: str,
+    end_date: str | None = None,
+    locations: list[str] | None = None,
+    power_mw: float = 100.0,
+    energy_mwh: float = 400.0,
+    round_trip_efficiency: float = 0.85,
+    max_cycles_per_day: float | None = 1.0,
+    market: str = "DA",
+) -> dict[str, Any]:
+    """
+    Computes the revenue-maximizing daily charge/discharge schedule of a
+    battery at each solar-plus-storage site in the local price history, with
+    perfect foresight of that day's prices, and ranks the sites by arbitrage
+    revenue.
+
+    Args:
+        start_date: First day (YYYY-MM-DD, Pacific) to optimize.
+        end_date: Last day (YYYY-MM-DD), at most a year after start_date.
+            Defaults to start_date.
+        locations: Zones ("NP15", "SP15", "ZP26") and/or node IDs to include.
+            Optional; defaults to every site.
+        power_mw: Charge/discharge rating in MW. Defaults to 100.
+        energy_mwh: Usable capacity in MWh. Defaults to 400 (4 hours).
+        round_trip_efficiency: Energy out / energy in (0-1]. Defaults to 0.85.
+        max_cycles_per_day: Most full discharges per day; None for no limit.
+            Defaults to 1.
+        market: "DA" (day-ahead) or "RT" (real-time) prices. Defaults to "DA".
+
+    Returns:
+        Dictionary with total and per-site revenue (highest first, top 20),
+        cycles, average charge and discharge prices, the best site's average
+        net MW per hour of day (positive is discharging) and its best days.
+    """
+    try:
+        column = DISPATCH_MARKETS.get(market.upper())
+        if column is None:
+            return {"error": f"Unknown market: {market}. Use one of {list(DISPATCH_MARKETS)}."}
+        window = day_window(start_date, end_date, MAX_DISPATCH_DAYS)
+        if isinstance(window, str):
+            return {"error": window}
+        start, end = window
+        n_days = (end - start).days
+
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        keys = [location.strip().upper() for location in locations or []]
+        zones = [key for key in keys if key in ZONES]
+        nodes = [resolve_node(key) for key in keys if key not in ZONES]
+        frames = []
+        if zones or not keys:
+            frames.append(price_store.query(start, end, zones=zones or None))
+        if nodes:
+            frames.append(price_store.query(start, end, nodes=nodes))
+        frames = [frame for frame in frames if not frame.empty]
+        df = pd.concat(frames) if frames else pd.DataFrame()
+        if df.empty or column not in df:
+            return {"error": f"No stored {market.upper()} prices for {locations or 'any site'} between {start_date} and {end_date or start_date}"}
+        df = df.drop_duplicates(["node", "timestamp"])
+        prices, node_index = _site_day_prices(df, column, start, n_days)
+        timings["load"] = round((time.perf_counter() - started) * 1000, 1)
+
+        started = time.perf_counter()
+        result = optimize_dispatch(
+            prices,
+            power_mw=power_mw,
+            energy_mwh=energy_mwh,
+            round_trip_efficiency=round_trip_efficiency,
+            max_cycles=max_cycles_per_day,
+            workers=DISPATCH_WORKERS,
+        )
+        timings["optimize"] = round((time.perf_counter() - started) * 1000, 1)
+
+        n_sites = len(node_index)
+        daily_revenue = result["revenue"].reshape(n_sites, n_days)
+        days_priced = np.isfinite(prices).any(axis=1).reshape(n_sites, n_days).sum(axis=1)
+        charge = result["charge_mw"].reshape(n_sites, -1)
+        discharge = result["discharge_mw"].reshape(n_sites, -1)
+        site_prices = np.nan_to_num(prices.reshape(n_sites, -1))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_charge = (charge * site_prices).sum(axis=1) / charge.sum(axis=1)
+            avg_discharge = (discharge * site_prices).sum(axis=1) / discharge.sum(axis=1)
+        revenue = daily_revenue.sum(axis=1)
+        order = np.argsort(-revenue, kind="stable")
+        sites = df.drop_duplicates("node").set_index("node")["site"] if "site" in df else None
+
+        top = order[:MAX_DISPATCH_SITES_LISTED]
+        top_nodes = node_index[top]
+        best = order[0]
+        best_days = np.argsort(-daily_revenue[best], kind="stable")[:5]
+        return {
+            "market": market.upper(),
+            "window": {"start": start.strftime("%Y-%m-%d"), "end": (end - pd.Timedelta(days=1)).strftime("%Y-%m-%d"), "days": n_days},
+            "battery": {
+                "power_mw": power_mw,
+                "energy_mwh": energy_mwh,
+                "round_trip_efficiency": round_trip_efficiency,
+                "max_cycles_per_day": max_cycles_per_day,
+            },
+            "sites_optimized": n_sites,
+            "total_revenue": round(float(revenue.sum()), 2),
+            "mean_site_revenue": round(float(revenue.mean()), 2),
+            "sites": records({
+                "node": top_nodes,
+                "site": [sites.get(node) for node in top_nodes] if sites is not None else [None] * len(top),
+                "revenue": _rounded_array(revenue[top]),
+                "revenue_per_mw_day": _rounded_array(revenue[top] / power_mw / np.maximum(days_priced[top], 1)),
+                "days_priced": days_priced[top],
+                "cycles_per_day": _rounded_array(result["cycles"].reshape(n_sites, n_days)[top].sum(axis=1) / np.maximum(days_priced[top], 1), 3),
+                "avg_charge_price": _rounded_array(avg_charge[top]),
+                "avg_discharge_price": _rounded_array(avg_discharge[top]),
+            }),
+            "sites_truncated": n_sites > MAX_DISPATCH_SITES_LISTED,
+            "best_site_profile": {
+                "node": node_index[best],
+                "avg_net_mw_by_hour": _rounded_array(result["net_mw"].reshape(n_sites, n_days, 24)[best].mean(axis=0), 1),
+                "best_days": [
+                    {"date": (start + pd.Timedelta(days=int(d))).strftime("%Y-%m-%d"), "revenue": round(float(daily_revenue[best, d]), 2)}
+                    for d in best_days
+                ],
+            },
+            "note": "Perfect-foresight optimum over each day's prices; an upper bound on what a real schedule earns.",
+            "timings_ms": timings,
+        }
+    except Exception as e:
+        return {"error": f"Failed to optimize battery dispatch: {str(e)}"}
+
+
+optimize_battery_dispatch_async = async_tool(optimize_battery_dispatch)
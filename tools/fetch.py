@@ -0,0 +1,182 @@
+"""
+Parallel chunked fetching for long CAISO date ranges.
+Splits a window into OASIS-sized chunks, fetches them concurrently under a
+shared concurrency cap and request spacing, then stitches and dedupes.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterator
+from tools.cache import to_caiso_timestamp, bind_arguments
+from tools.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Concurrent OASIS requests allowed across all sessions
+OASIS_CONCURRENCY = int(os.getenv("GRIDPILOT_OASIS_CONCURRENCY", "4"))
+# Minimum spacing between request starts, in seconds
+OASIS_MIN_INTERVAL = float(os.getenv("GRIDPILOT_OASIS_MIN_INTERVAL", "0.5"))
+
+# Days per chunk. gridstatus pulls these methods in up-to-31-day requests, so a
+# week keeps request count low while still parallelizing month-scale ranges;
+# everything else is published per trading day.
+DEFAULT_CHUNK_DAYS = 1
+CHUNK_DAYS = {
+    "get_load_hourly": 7,
+    "get_load_forecast": 7,
+    "get_load_forecast_day_ahead": 7,
+    "get_load_forecast_two_day_ahead": 7,
+    "get_load_forecast_seven_day_ahead": 7,
+    "get_load_forecast_15_min": 7,
+    "get_load_forecast_5_min": 7,
+    "get_nomogram_branch_shadow_prices_day_ahead_hourly": 7,
+}
+
+
+class RateLimiter:
+    """Enforces a minimum spacing between request starts across threads."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def split_range(start: pd.Timestamp, end: pd.Timestamp, chunk_days: int) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+    """Split [start, end) into chunks aligned to Pacific day boundaries."""
+    chunks = []
+    chunk_start = start
+    boundary = start.normalize()
+    while chunk_start < end:
+        boundary = boundary + pd.Timedelta(days=chunk_days)
+        chunk_end = min(boundary, end)
+        if chunk_end > chunk_start:
+            chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    return chunks
+
+
+def stitch(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate chunk frames, drop rows repeated at chunk edges and order by interval."""
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True).drop_duplicates(ignore_index=True)
+    if "Interval Start" in df.columns:
+        df = df.sort_values("Interval Start", kind="stable", ignore_index=True)
+    return df
+
+
+class RangeFetcher:
+    """
+    Runs OASIS requests on a dedicated pool sized to the concurrency cap.
+
+    The pool is separate from the tool executor so chunk fetches issued from
+    inside a tool call can never starve the tool that is waiting on them.
+    """
+
+    def __init__(self, max_concurrency: int = OASIS_CONCURRENCY, min_interval: float = OASIS_MIN_INTERVAL):
+        self.max_concurrency = max_concurrency
+        self._limiter = RateLimiter(min_interval)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="gridpilot-oasis")
+
+    def _limited(self, call: Callable[[], Any]) -> Any:
+        self._limiter.wait()
+        return call()
+
+    def map(self, calls: list[Callable[[], Any]]) -> list[Any]:
+        """Run zero-argument calls concurrently and return results in order."""
+        if len(calls) == 1:
+            return [self._limited(calls[0])]
+        futures = [self._executor.submit(self._limited, call) for call in calls]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def stream(self, calls: list[Callable[[], Any]]) -> Iterator[tuple[int, Any, BaseException | None]]:
+        """
+        Run zero-argument calls concurrently and yield (index, result, error)
+        as each one finishes, so callers can consume results while the rest
+        are still in flight. Unstarted calls are cancelled if the consumer stops.
+        """
+        futures = {self._executor.submit(self._limited, call): i for i, call in enumerate(calls)}
+        try:
+            for future in as_completed(futures):
+                error = future.exception()
+                yield futures[future], None if error else future.result(), error
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def fetch(
+        self,
+        method: Callable[..., Any],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        chunk_days: int = DEFAULT_CHUNK_DAYS,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Fetch [start, end) with method(date=..., end=..., **kwargs) in parallel chunks."""
+        calls = [
+            functools.partial(method, date=chunk_start, end=chunk_end, **kwargs)
+            for chunk_start, chunk_end in split_range(start, end, chunk_days)
+        ]
+        return stitch(self.map(calls))
+
+
+range_fetcher = RangeFetcher()
+
+
+class ChunkedClient:
+    """
+    Proxy in front of a gridstatus client that splits multi-chunk date/end
+    range queries across the RangeFetcher; all other calls pass through.
+    """
+
+    def __init__(self, client: Any, fetcher: RangeFetcher | None = None):
+        self._client = client
+        self._fetcher = fetcher if fetcher is not None else range_fetcher
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not name.startswith("get_") or not callable(attr):
+            return attr
+        try:
+            parameters = inspect.signature(attr).parameters
+        except (TypeError, ValueError):
+            return attr
+        if "date" not in parameters or "end" not in parameters:
+            return attr
+        return self._chunked_method(name, attr)
+
+    def _chunked_method(self, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        chunk_days = CHUNK_DAYS.get(name, DEFAULT_CHUNK_DAYS)
+
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            arguments = bind_arguments(method, args, kwargs)
+            start = to_caiso_timestamp(arguments.get("date"))
+            end = to_caiso_timestamp(arguments.get("end"))
+            if start is None or end is None or end - start.normalize() <= pd.Timedelta(days=chunk_days):
+                return method(*args, **kwargs)
+            rest = {k: v for k, v in arguments.items() if k not in ("date", "end")}
+            return self._fetcher.fetch(method, start, end, chunk_days=chunk_days, **rest)
+
+        return call
@@ -0,0 +1,139 @@
+"""
+Location resolver for weather lookups.
+Checks known CAISO locations first, then a bounded in-memory LRU and a
+persistent on-disk cache, and only geocodes genuinely new names over the
+network (Nominatim).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+from tools.cache import IntervalCache, flights
+from tools.lazy import LazyObject, lazy_import
+
+geopy_geocoders = lazy_import("geopy.geocoders")
+
+GEOCODE_CACHE_PATH = os.getenv("GRIDPILOT_GEOCODE_CACHE", "data/geocode_cache.sqlite")
+
+# Seconds an unknown name is remembered before Nominatim is asked again
+NOT_FOUND_TTL_SECONDS = 3600
+
+# Built on the first network geocode so importing the agents does not construct it
+geolocator = LazyObject(lambda: geopy_geocoders.Nominatim(user_agent="gridpilot"))
+
+# Trailing state qualifiers dropped when matching names ("Fresno, CA" == "Fresno")
+_STATE_SUFFIX = re.compile(r"(,\s*|\s+)(CA|CALIFORNIA|USA|US)$")
+
+
+def normalize_location(name: str) -> str:
+    """Canonical lookup key: upper case, single spaces, no trailing state."""
+    key = " ".join(name.upper().replace(".", "").split()).strip(" ,")
+    stripped = _STATE_SUFFIX.sub("", key)
+    while stripped != key:
+        key, stripped = stripped, _STATE_SUFFIX.sub("", stripped)
+    return key
+
+
+class GeocodeResolver:
+    """
+    Resolves place names to coordinates without repeating network lookups.
+
+    Lookup order: aliases and known locations, in-memory LRU, on-disk cache,
+    then Nominatim (coalesced so concurrent misses for one name geocode once).
+    Results are dicts with "name", "lat", "lon" and "source".
+    """
+
+    def __init__(
+        self,
+        known: dict[str, dict[str, Any]] | None = None,
+        aliases: dict[str, str] | None = None,
+        path: str = GEOCODE_CACHE_PATH,
+        max_entries: int = 1024,
+        geocode: Callable[[str], Any] | None = None,
+    ):
+        self._known = {normalize_location(name): place for name, place in (known or {}).items()}
+        self._aliases = {normalize_location(alias): name for alias, name in (aliases or {}).items()}
+        self._path = path
+        self._memory = IntervalCache(max_entries=max_entries)
+        self._geocode = geocode if geocode is not None else (lambda query: geolocator.geocode(query))
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+        self.sources = {"known": 0, "memory": 0, "disk": 0, "network": 0, "not_found": 0}
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """On-disk cache, opened on first use."""
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    directory = os.path.dirname(self._path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    db = sqlite3.connect(self._path, check_same_thread=False)
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS geocode ("
+                        "query TEXT PRIMARY KEY, name TEXT, lat REAL, lon REAL, resolved_at REAL)"
+                    )
+                    self._db = db
+        return self._db
+
+    def resolve(self, location: str) -> dict[str, Any] | None:
+        """
+        Return coordinates for a location name, or None if it cannot be found.
+
+        Args:
+            location: Place name, alias ("LA"), CAISO weather point or node ID.
+        """
+        name = self._aliases.get(normalize_location(location), location)
+        key = normalize_location(name)
+
+        place = self._known.get(key)
+        if place is not None:
+            self.sources["known"] += 1
+            return {"name": place.get("name", name), "lat": place["lat"], "lon": place["lon"], "source": "known"}
+
+        found, place = self._memory.get(("geocode", key))
+        if found:
+            self.sources["memory" if place else "not_found"] += 1
+            return {**place, "source": "memory"} if place else None
+
+        place = self._read_disk(key)
+        if place is not None:
+            self.sources["disk"] += 1
+            self._memory.set(("geocode", key), place, None)
+            return {**place, "source": "disk"}
+
+        loc = flights.do(("nominatim", key), lambda: self._geocode(name))
+        if not loc:
+            # Misses are kept in memory for a while but never persisted
+            self.sources["not_found"] += 1
+            self._memory.set(("geocode", key), None, time.time() + NOT_FOUND_TTL_SECONDS)
+            return None
+        self.sources["network"] += 1
+        place = {"name": name, "lat": loc.latitude, "lon": loc.longitude}
+        self._memory.set(("geocode", key), place, None)
+        self._write_disk(key, place)
+        return {**place, "source": "network"}
+
+    def _read_disk(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self.db.execute("SELECT name, lat, lon FROM geocode WHERE query = ?", [key]).fetchone()
+        if row is None:
+            return None
+        return {"name": row[0], "lat": row[1], "lon": row[2]}
+
+    def _write_disk(self, key: str, place: dict[str, Any]) -> None:
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?)",
+                [key, place["name"], place["lat"], place["lon"], time.time()],
+            )
+            self.db.commit()
+
+    def stats(self) -> dict[str, Any]:
+        return {"sources": dict(self.sources), "memory": self._memory.stats()}
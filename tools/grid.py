@@ -3,13 +3,54 @@ Grid tools for CAISO data retrieval and analysis.
 Uses the gridstatus library for API access.
 """
 
+from __future__ import annotations
+
 from datetime import datetime
-from typing import Any
-import pandas as pd
-import gridstatus
+from typing import Any, Callable
+from tools.aio import async_tool, async_variant, gather_blocking
+from tools.cache import CAISO_TZ, CachedClient
+from tools.common import isoformat, records
+from tools.fetch import ChunkedClient
+from tools.lazy import LazyObject, lazy_import
+from tools.poller import LatestPoller
+from tools.store import StoredClient
+
+# Heavy dependencies load on first tool call, not when the agents are imported
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+gridstatus = lazy_import("gridstatus")
+
+# Load deviations above this size are flagged as significant
+SIGNIFICANT_DEVIATION_MW = 2000
+
+# Shared CAISO client; identical pulls within one 5-minute interval are served from cache,
+# closed historical days of the stored datasets come from the local store, and whatever
+# still has to be downloaded is split into parallel OASIS-sized chunks
+caiso = CachedClient(StoredClient(ChunkedClient(LazyObject(lambda: gridstatus.CAISO()))))
+
+# Optional background poller for "latest" data; started by the host process
+# (service.py with GRIDPILOT_POLLER=1), otherwise every "latest" call fetches live
+poller = LatestPoller(caiso)
+
 
-# Initialize CAISO client
-caiso = gridstatus.CAISO()
+def latest_or_fetch(
+    series: str,
+    date: str,
+    end: str | None,
+    fetch: Callable[[], pd.DataFrame],
+    last: int | None = None,
+) -> pd.DataFrame:
+    """
+    Serve a "latest" query from the poller's ring buffers when they are fresh,
+    otherwise run the live fetch. Polled frames cover today (Pacific) like the
+    gridstatus "latest" result, or only the newest `last` intervals.
+    """
+    if date == "latest" and end is None:
+        since = None if last is not None else pd.Timestamp.now(tz=CAISO_TZ).normalize()
+        df = poller.frame(series, since=since, last=last)
+        if df is not None:
+            return df
+    return fetch()
 
 
 def get_caiso_demand(
@@ -30,7 +71,7 @@ def get_caiso_demand(
         date = "latest"
     
     try:
-        df = caiso.get_load(date=date, end=end)
+        df = latest_or_fetch("load", date, end, lambda: caiso.get_load(date=date, end=end))
         
         if df.empty:
             return {"error": "No data available", "date": date}
@@ -127,7 +168,7 @@ def get_caiso_supply_mix(
         date = "latest"
     
     try:
-        df = caiso.get_fuel_mix(date=date, end=end)
+        df = latest_or_fetch("fuel_mix", date, end, lambda: caiso.get_fuel_mix(date=date, end=end))
         
         if df.empty:
             return {"error": "No data available", "date": date}
@@ -257,7 +298,7 @@ def get_caiso_storage(
         date = "latest"
     
     try:
-        df = caiso.get_storage(date=date)
+        df = latest_or_fetch("storage", date, end, lambda: caiso.get_storage(date=date))
         
         if df.empty:
             return {"error": "No storage data available", "date": date}
@@ -302,60 +343,69 @@ def get_caiso_net_demand(
     
     try:
         # Get load and fuel mix
-        load_df = caiso.get_load(date=date, end=end)
-        fuel_df = caiso.get_fuel_mix(date=date, end=end)
-        
-        if load_df.empty or fuel_df.empty:
-            return {"error": "Insufficient data for net demand calculation", "date": date}
-        
-        # Merge on Interval Start
-        merged = pd.merge(
-            load_df[["Interval Start", "Interval End", "Load"]],
-            fuel_df[["Interval Start", "Solar", "Wind"]],
-            on="Interval Start",
-            how="inner"
-        )
-        
-        if merged.empty:
-            return {"error": "Could not merge load and fuel data", "date": date}
-        
-        # Calculate net demand
-        merged["Net Demand"] = merged["Load"] - merged["Solar"] - merged["Wind"]
-        
-        latest = merged.iloc[-1]
+        load_df = latest_or_fetch("load", date, end, lambda: caiso.get_load(date=date, end=end))
+        fuel_df = latest_or_fetch("fuel_mix", date, end, lambda: caiso.get_fuel_mix(date=date, end=end))
         
-        # Determine duck curve position based on time
-        current_hour = latest["Interval Start"].hour
-        if 6 <= current_hour < 10:
-            duck_position = "morning_ramp"
-        elif 10 <= current_hour < 16:
-            duck_position = "belly"
-        elif 16 <= current_hour < 21:
-            duck_position = "evening_ramp"
-        else:
-            duck_position = "overnight"
-        
-        # Find expected net peak (max net demand for the day)
-        net_peak_row = merged.loc[merged["Net Demand"].idxmax()]
-        
-        return {
-            "date": date,
-            "interval_start": latest["Interval Start"].isoformat(),
-            "interval_end": latest["Interval End"].isoformat(),
-            "current_demand_mw": float(latest["Load"]),
-            "solar_mw": float(latest["Solar"]),
-            "wind_mw": float(latest["Wind"]),
-            "net_demand_mw": float(latest["Net Demand"]),
-            "duck_curve_position": duck_position,
-            "daily_net_peak_mw": float(merged["Net Demand"].max()),
-            "daily_net_min_mw": float(merged["Net Demand"].min()),
-            "net_peak_hour": net_peak_row["Interval Start"].hour,
-            "timestamp": datetime.now().isoformat(),
-        }
+        return _net_demand_summary(date, load_df, fuel_df)
     except Exception as e:
         return {"error": str(e), "date": date}
 
 
+def _net_demand_summary(
+    date: str,
+    load_df: pd.DataFrame,
+    fuel_df: pd.DataFrame,
+) -> dict[str, Any]:
+    """Build the net demand result from load and fuel mix frames."""
+    if load_df.empty or fuel_df.empty:
+        return {"error": "Insufficient data for net demand calculation", "date": date}
+    
+    # Merge on Interval Start
+    merged = pd.merge(
+        load_df[["Interval Start", "Interval End", "Load"]],
+        fuel_df[["Interval Start", "Solar", "Wind"]],
+        on="Interval Start",
+        how="inner"
+    )
+    
+    if merged.empty:
+        return {"error": "Could not merge load and fuel data", "date": date}
+    
+    # Calculate net demand
+    merged["Net Demand"] = merged["Load"] - merged["Solar"] - merged["Wind"]
+    
+    latest = merged.iloc[-1]
+    
+    # Determine duck curve position based on time
+    current_hour = latest["Interval Start"].hour
+    if 6 <= current_hour < 10:
+        duck_position = "morning_ramp"
+    elif 10 <= current_hour < 16:
+        duck_position = "belly"
+    elif 16 <= current_hour < 21:
+        duck_position = "evening_ramp"
+    else:
+        duck_position = "overnight"
+    
+    # Find expected net peak (max net demand for the day)
+    net_peak_row = merged.loc[merged["Net Demand"].idxmax()]
+    
+    return {
+        "date": date,
+        "interval_start": latest["Interval Start"].isoformat(),
+        "interval_end": latest["Interval End"].isoformat(),
+        "current_demand_mw": float(latest["Load"]),
+        "solar_mw": float(latest["Solar"]),
+        "wind_mw": float(latest["Wind"]),
+        "net_demand_mw": float(latest["Net Demand"]),
+        "duck_curve_position": duck_position,
+        "daily_net_peak_mw": float(merged["Net Demand"].max()),
+        "daily_net_min_mw": float(merged["Net Demand"].min()),
+        "net_peak_hour": net_peak_row["Interval Start"].hour,
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
 def calculate_load_deviation(
     date: str | None = None,
     end: str | None = None,
@@ -384,125 +434,124 @@ def calculate_load_deviation(
         # Get day-ahead forecast
         forecast_df = caiso.get_load_forecast_day_ahead(date=date, end=end)
         
-        if actual_df.empty or forecast_df.empty:
-            return {"error": "Insufficient data for deviation calculation", "date": date}
-        
-        # Filter forecast to CA ISO-TAC total
-        forecast_total = forecast_df[forecast_df["TAC Area Name"] == "CA ISO-TAC"].copy()
-        actual_total = actual_df[actual_df["TAC Area Name"] == "CA ISO-TAC"].copy()
-        
-        if forecast_total.empty:
-            forecast_total = forecast_df.copy()
-        if actual_total.empty:
-            actual_total = actual_df.copy()
-        
-        # Merge on Interval Start
-        merged = pd.merge(
-            actual_total[["Interval Start", "Interval End", "Load"]],
-            forecast_total[["Interval Start", "Load Forecast"]],
-            on="Interval Start",
-            how="inner"
-        )
-        
-        if merged.empty:
-            return {"error": "Could not align actual and forecast data", "date": date}
-        
-        # Calculate deviations
-        merged["Deviation MW"] = merged["Load"] - merged["Load Forecast"]
-        merged["Deviation Pct"] = (merged["Deviation MW"] / merged["Load Forecast"]) * 100
-        merged["Hour"] = merged["Interval Start"].dt.hour
-        
-        # Build hourly deviation list
-        deviations = []
-        for _, row in merged.iterrows():
-            deviations.append({
-                "hour_ending": int(row["Hour"]) + 1,
-                "interval_start": row["Interval Start"].isoformat(),
-                "da_forecast_mw": float(row["Load Forecast"]),
-                "rt_actual_mw": float(row["Load"]),
-                "deviation_mw": float(row["Deviation MW"]),
-                "deviation_pct": round(float(row["Deviation Pct"]), 2),
-                "significant": abs(row["Deviation MW"]) > 2000,
+        return _load_deviation_summary(date, actual_df, forecast_df)
+    except Exception as e:
+        return {"error": str(e), "date": date}
+
+
+def _load_deviation_summary(
+    date: str,
+    actual_df: pd.DataFrame,
+    forecast_df: pd.DataFrame,
+) -> dict[str, Any]:
+    """Build the RT vs DA deviation analysis from actual and forecast frames."""
+    if actual_df.empty or forecast_df.empty:
+        return {"error": "Insufficient data for deviation calculation", "date": date}
+    
+    # Filter forecast to CA ISO-TAC total
+    forecast_total = forecast_df[forecast_df["TAC Area Name"] == "CA ISO-TAC"].copy()
+    actual_total = actual_df[actual_df["TAC Area Name"] == "CA ISO-TAC"].copy()
+    
+    if forecast_total.empty:
+        forecast_total = forecast_df.copy()
+    if actual_total.empty:
+        actual_total = actual_df.copy()
+    
+    # Merge on Interval Start
+    merged = pd.merge(
+        actual_total[["Interval Start", "Interval End", "Load"]],
+        forecast_total[["Interval Start", "Load Forecast"]],
+        on="Interval Start",
+        how="inner"
+    )
+    
+    if merged.empty:
+        return {"error": "Could not align actual and forecast data", "date": date}
+    
+    # Calculate deviations
+    merged["Deviation MW"] = merged["Load"] - merged["Load Forecast"]
+    merged["Deviation Pct"] = (merged["Deviation MW"] / merged["Load Forecast"]) * 100
+    merged["Hour"] = merged["Interval Start"].dt.hour
+    
+    # Build hourly deviation list
+    deviations = _deviation_records(merged)
+    
+    # Calculate summary
+    mean_dev = merged["Deviation MW"].mean()
+    
+    # Pattern analysis by time of day
+    morning = merged[(merged["Hour"] >= 6) & (merged["Hour"] < 10)]
+    midday = merged[(merged["Hour"] >= 10) & (merged["Hour"] < 16)]
+    evening = merged[(merged["Hour"] >= 16) & (merged["Hour"] < 21)]
+    
+    morning_avg = morning["Deviation MW"].mean() if not morning.empty else 0
+    midday_avg = midday["Deviation MW"].mean() if not midday.empty else 0
+    evening_avg = evening["Deviation MW"].mean() if not evening.empty else 0
+    
+    # Determine likely driver based on pattern
+    drivers = []
+    
+    # Check for consistent direction across all periods (suggests temperature)
+    if (morning_avg < -500 and evening_avg < -500) or (morning_avg > 500 and evening_avg > 500):
+        if mean_dev < 0:
+            drivers.append({
+                "driver": "temperature",
+                "detail": "Load running below forecast - likely warmer than expected (reduced heating)",
+                "confidence": "high"
             })
-        
-        # Calculate summary
-        mean_dev = merged["Deviation MW"].mean()
-        
-        # Pattern analysis by time of day
-        morning = merged[(merged["Hour"] >= 6) & (merged["Hour"] < 10)]
-        midday = merged[(merged["Hour"] >= 10) & (merged["Hour"] < 16)]
-        evening = merged[(merged["Hour"] >= 16) & (merged["Hour"] < 21)]
-        
-        morning_avg = morning["Deviation MW"].mean() if not morning.empty else 0
-        midday_avg = midday["Deviation MW"].mean() if not midday.empty else 0
-        evening_avg = evening["Deviation MW"].mean() if not evening.empty else 0
-        
-        # Determine likely driver based on pattern
-        drivers = []
-        
-        # Check for consistent direction across all periods (suggests temperature)
-        if (morning_avg < -500 and evening_avg < -500) or (morning_avg > 500 and evening_avg > 500):
-            if mean_dev < 0:
-                drivers.append({
-                    "driver": "temperature",
-                    "detail": "Load running below forecast - likely warmer than expected (reduced heating)",
-                    "confidence": "high"
-                })
-            else:
-                drivers.append({
-                    "driver": "temperature", 
-                    "detail": "Load running above forecast - likely colder than expected (increased heating)",
-                    "confidence": "high"
-                })
-        
-        # Check for midday-specific deviation (suggests solar/BTM)
-        if abs(midday_avg) > 1500 and abs(morning_avg) < 500:
+        else:
             drivers.append({
-                "driver": "behind_the_meter_solar",
-                "detail": "Midday deviation suggests BTM solar generation different than forecast",
-                "confidence": "medium"
+                "driver": "temperature", 
+                "detail": "Load running above forecast - likely colder than expected (increased heating)",
+                "confidence": "high"
             })
-        
-        # Check if it's a weekend or holiday
-        if not merged.empty:
-            sample_date = merged.iloc[0]["Interval Start"]
-            if sample_date.weekday() >= 5:
-                drivers.append({
-                    "driver": "calendar",
-                    "detail": "Weekend - reduced commercial/industrial load",
-                    "confidence": "high"
-                })
-        
-        if not drivers:
+    
+    # Check for midday-specific deviation (suggests solar/BTM)
+    if abs(midday_avg) > 1500 and abs(morning_avg) < 500:
+        drivers.append({
+            "driver": "behind_the_meter_solar",
+            "detail": "Midday deviation suggests BTM solar generation different than forecast",
+            "confidence": "medium"
+        })
+    
+    # Check if it's a weekend or holiday
+    if not merged.empty:
+        sample_date = merged.iloc[0]["Interval Start"]
+        if sample_date.weekday() >= 5:
             drivers.append({
-                "driver": "unknown",
-                "detail": "Pattern does not match typical drivers",
-                "confidence": "low"
+                "driver": "calendar",
+                "detail": "Weekend - reduced commercial/industrial load",
+                "confidence": "high"
             })
-        
-        return {
-            "date": date,
-            "analysis_timestamp": datetime.now().isoformat(),
-            "deviations": deviations,
-            "summary": {
-                "mean_deviation_mw": round(mean_dev, 1),
-                "max_deviation_mw": round(float(merged["Deviation MW"].max()), 1),
-                "min_deviation_mw": round(float(merged["Deviation MW"].min()), 1),
-                "hours_analyzed": len(merged),
-                "hours_with_significant_deviation": sum(1 for d in deviations if d["significant"]),
-                "overall_direction": "RT > DA (load above forecast)" if mean_dev > 0 else "RT < DA (load below forecast)",
-            },
-            "driver_analysis": {
-                "likely_drivers": drivers,
-                "pattern": {
-                    "morning_avg_deviation_mw": round(morning_avg, 0),
-                    "midday_avg_deviation_mw": round(midday_avg, 0),
-                    "evening_avg_deviation_mw": round(evening_avg, 0),
-                }
+    
+    if not drivers:
+        drivers.append({
+            "driver": "unknown",
+            "detail": "Pattern does not match typical drivers",
+            "confidence": "low"
+        })
+    
+    return {
+        "date": date,
+        "analysis_timestamp": datetime.now().isoformat(),
+        "deviations": deviations,
+        "summary": {
+            "mean_deviation_mw": round(mean_dev, 1),
+            "max_deviation_mw": round(float(merged["Deviation MW"].max()), 1),
+            "min_deviation_mw": round(float(merged["Deviation MW"].min()), 1),
+            "hours_analyzed": len(merged),
+            "hours_with_significant_deviation": int((merged["Deviation MW"].abs() > SIGNIFICANT_DEVIATION_MW).sum()),
+            "overall_direction": "RT > DA (load above forecast)" if mean_dev > 0 else "RT < DA (load below forecast)",
+        },
+        "driver_analysis": {
+            "likely_drivers": drivers,
+            "pattern": {
+                "morning_avg_deviation_mw": round(morning_avg, 0),
+                "midday_avg_deviation_mw": round(midday_avg, 0),
+                "evening_avg_deviation_mw": round(evening_avg, 0),
             }
         }
-    except Exception as e:
-        return {"error": str(e), "date": date}
+    }
 
 
 def get_caiso_curtailment(
@@ -573,7 +622,9 @@ def get_caiso_tie_flows(
         date = "latest"
     
     try:
-        df = caiso.get_tie_flows_real_time(date=date, end=end)
+        df = latest_or_fetch(
+            "tie_flows", date, end, lambda: caiso.get_tie_flows_real_time(date=date, end=end), last=1
+        )
         
         if df.empty:
             return {"error": "No tie flow data available", "date": date}
@@ -586,16 +637,7 @@ def get_caiso_tie_flows(
         net_flow = latest_df["MW"].sum()
         
         # Build interface list
-        interfaces = []
-        for _, row in latest_df.iterrows():
-            interfaces.append({
-                "interface_id": row["Interface ID"],
-                "tie_name": row["Tie Name"],
-                "from_baa": row["From BAA"],
-                "to_baa": row["To BAA"],
-                "flow_mw": float(row["MW"]),
-                "direction": "import" if row["MW"] < 0 else "export",
-            })
+        interfaces = _tie_flow_records(latest_df)
         
         return {
             "date": date,
@@ -639,17 +681,7 @@ def get_caiso_as_prices(
         latest_df = df[df["Interval Start"] == latest_time]
         
         # Build price structure by region
-        prices_by_region = {}
-        for _, row in latest_df.iterrows():
-            region = row["Region"]
-            prices_by_region[region] = {
-                "regulation_up": float(row.get("Regulation Up", 0)),
-                "regulation_down": float(row.get("Regulation Down", 0)),
-                "spinning_reserves": float(row.get("Spinning Reserves", 0)),
-                "non_spinning_reserves": float(row.get("Non-Spinning Reserves", 0)),
-                "regulation_mileage_up": float(row.get("Regulation Mileage Up", 0)),
-                "regulation_mileage_down": float(row.get("Regulation Mileage Down", 0)),
-            }
+        prices_by_region = _as_price_records(latest_df)
         
         return {
             "date": date,
@@ -700,13 +732,7 @@ def get_caiso_shadow_prices(
         latest_df = df[df["Interval Start"] == latest_time]
         binding = latest_df[latest_df["Price"] != 0]
         
-        constraints = []
-        for _, row in binding.iterrows():
-            constraints.append({
-                "location": row["Location"],
-                "shadow_price": float(row["Price"]),
-                "constraint_cause": row.get("Constraint Cause", "Unknown"),
-            })
+        constraints = _constraint_records(binding)
         
         return {
             "date": date,
@@ -714,7 +740,7 @@ def get_caiso_shadow_prices(
             "interval_start": latest_time.isoformat(),
             "binding_constraints_count": len(constraints),
             "binding_constraints": constraints,
-            "total_congestion_cost": sum(c["shadow_price"] for c in constraints),
+            "total_congestion_cost": float(binding["Price"].sum()),
             "timestamp": datetime.now().isoformat(),
         }
     except Exception as e:
@@ -749,26 +775,15 @@ def get_caiso_outages(
         # Group by outage type
         by_type = df.groupby("Outage Type")["Curtailment MW"].sum().to_dict()
         
-        # Build outage list
-        outages = []
-        for _, row in df.iterrows():
-            outages.append({
-                "resource_name": row["Resource Name"],
-                "resource_id": row["Resource ID"],
-                "outage_type": row["Outage Type"],
-                "nature_of_work": row["Nature of Work"],
-                "curtailment_mw": float(row["Curtailment MW"]),
-                "pmax_mw": float(row["Resource PMAX MW"]),
-                "start_time": row["Curtailment Start Time"].isoformat() if pd.notna(row["Curtailment Start Time"]) else None,
-                "end_time": row["Curtailment End Time"].isoformat() if pd.notna(row["Curtailment End Time"]) else None,
-            })
+        # Build outage list, limited to the first 20 for readability
+        outages = _outage_records(df.head(20))
         
         return {
             "date": date,
             "total_curtailed_mw": float(total_curtailed_mw),
             "outages_by_type": by_type,
-            "outage_count": len(outages),
-            "outages": outages[:20],  # Limit to first 20 for readability
+            "outage_count": len(df),
+            "outages": outages,
             "timestamp": datetime.now().isoformat(),
         }
     except Exception as e:
@@ -792,4 +807,122 @@ def get_caiso_grid_status() -> dict[str, Any]:
             "timestamp": datetime.now().isoformat(),
         }
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+
+def _deviation_records(merged: pd.DataFrame) -> list[dict[str, Any]]:
+    deviation_mw = merged["Deviation MW"].astype(float)
+    return records({
+        "hour_ending": merged["Hour"].astype(int) + 1,
+        "interval_start": isoformat(merged["Interval Start"]),
+        "da_forecast_mw": merged["Load Forecast"].astype(float),
+        "rt_actual_mw": merged["Load"].astype(float),
+        "deviation_mw": deviation_mw,
+        "deviation_pct": merged["Deviation Pct"].astype(float).round(2),
+        "significant": deviation_mw.abs() > SIGNIFICANT_DEVIATION_MW,
+    })
+
+
+def _tie_flow_records(latest_df: pd.DataFrame) -> list[dict[str, Any]]:
+    flow_mw = latest_df["MW"].astype(float)
+    return records({
+        "interface_id": latest_df["Interface ID"],
+        "tie_name": latest_df["Tie Name"],
+        "from_baa": latest_df["From BAA"],
+        "to_baa": latest_df["To BAA"],
+        "flow_mw": flow_mw,
+        "direction": np.where(flow_mw < 0, "import", "export").astype(object),
+    })
+
+
+AS_PRICE_COLUMNS = {
+    "regulation_up": "Regulation Up",
+    "regulation_down": "Regulation Down",
+    "spinning_reserves": "Spinning Reserves",
+    "non_spinning_reserves": "Non-Spinning Reserves",
+    "regulation_mileage_up": "Regulation Mileage Up",
+    "regulation_mileage_down": "Regulation Mileage Down",
+}
+
+
+def _as_price_records(latest_df: pd.DataFrame) -> dict[str, dict[str, float]]:
+    rows = records({
+        key: latest_df[column].astype(float) if column in latest_df.columns else np.zeros(len(latest_df))
+        for key, column in AS_PRICE_COLUMNS.items()
+    })
+    # Later rows win for a repeated region
+    return dict(zip(latest_df["Region"].tolist(), rows))
+
+
+def _constraint_records(binding: pd.DataFrame) -> list[dict[str, Any]]:
+    cause = binding["Constraint Cause"] if "Constraint Cause" in binding.columns else ["Unknown"] * len(binding)
+    return records({
+        "location": binding["Location"],
+        "shadow_price": binding["Price"].astype(float),
+        "constraint_cause": cause,
+    })
+
+
+def _outage_records(df: pd.DataFrame) -> list[dict[str, Any]]:
+    return records({
+        "resource_name": df["Resource Name"],
+        "resource_id": df["Resource ID"],
+        "outage_type": df["Outage Type"],
+        "nature_of_work": df["Nature of Work"],
+        "curtailment_mw": df["Curtailment MW"].astype(float),
+        "pmax_mw": df["Resource PMAX MW"].astype(float),
+        "start_time": isoformat(df["Curtailment Start Time"]),
+        "end_time": isoformat(df["Curtailment End Time"]),
+    })
+
+
+# Async variants registered with the ADK agents. Blocking fetches run on the
+# bounded tool executor; independent fetches within one tool run concurrently.
+
+get_caiso_demand_async = async_tool(get_caiso_demand)
+get_caiso_load_forecast_async = async_tool(get_caiso_load_forecast)
+get_caiso_supply_mix_async = async_tool(get_caiso_supply_mix)
+get_caiso_renewable_generation_async = async_tool(get_caiso_renewable_generation)
+get_caiso_storage_async = async_tool(get_caiso_storage)
+get_caiso_curtailment_async = async_tool(get_caiso_curtailment)
+get_caiso_tie_flows_async = async_tool(get_caiso_tie_flows)
+get_caiso_as_prices_async = async_tool(get_caiso_as_prices)
+get_caiso_shadow_prices_async = async_tool(get_caiso_shadow_prices)
+get_caiso_outages_async = async_tool(get_caiso_outages)
+get_caiso_grid_status_async = async_tool(get_caiso_grid_status)
+
+
+@async_variant(get_caiso_net_demand)
+async def get_caiso_net_demand_async(
+    date: str | None = None,
+    end: str | None = None,
+) -> dict[str, Any]:
+    if date is None:
+        date = "latest"
+    
+    try:
+        load_df, fuel_df = await gather_blocking(
+            lambda: latest_or_fetch("load", date, end, lambda: caiso.get_load(date=date, end=end)),
+            lambda: latest_or_fetch("fuel_mix", date, end, lambda: caiso.get_fuel_mix(date=date, end=end)),
+        )
+        return _net_demand_summary(date, load_df, fuel_df)
+    except Exception as e:
+        return {"error": str(e), "date": date}
+
+
+@async_variant(calculate_load_deviation)
+async def calculate_load_deviation_async(
+    date: str | None = None,
+    end: str | None = None,
+) -> dict[str, Any]:
+    if date is None:
+        date = "today"
+    
+    try:
+        actual_df, forecast_df = await gather_blocking(
+            lambda: caiso.get_load_hourly(date=date, end=end),
+            lambda: caiso.get_load_forecast_day_ahead(date=date, end=end),
+        )
+        return _load_deviation_summary(date, actual_df, forecast_df)
+    except Exception as e:
+        return {"error": str(e), "date": date}
@@ -0,0 +1,153 @@
+"""
+Shared HTTP client for external JSON APIs (Open-Meteo).
+Keeps connections alive in a pooled requests.Session, bounds every request
+with connect/read timeouts, retries transient failures with jittered
+exponential backoff and records per-request latency.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any
+from urllib.parse import urlsplit
+from tools.aio import run_blocking
+from tools.common import LATENCY_SAMPLES, percentile_ms
+from tools.lazy import lazy_import
+
+requests = lazy_import("requests")
+requests_adapters = lazy_import("requests.adapters")
+
+CONNECT_TIMEOUT = float(os.getenv("GRIDPILOT_HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("GRIDPILOT_HTTP_READ_TIMEOUT", "10"))
+# Retries after the first attempt, so up to MAX_RETRIES + 1 requests per call
+MAX_RETRIES = int(os.getenv("GRIDPILOT_HTTP_RETRIES", "2"))
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 4.0
+POOL_SIZE = int(os.getenv("GRIDPILOT_HTTP_POOL_SIZE", "16"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class HttpClient:
+    """
+    Pooled, timeout-bounded JSON client with bounded retries.
+
+    The session is built on first use and shared across threads; urllib3's
+    connection pool is thread-safe and sized for the tool executor.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+        pool_size: int = POOL_SIZE,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self._session = None
+        self._lock = threading.Lock()
+        self._latencies: dict[str, deque] = {}
+        self._counts: dict[str, dict[str, int]] = {}
+
+    @property
+    def session(self) -> Any:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = requests_adapters.HTTPAdapter(
+                        pool_connections=self.pool_size, pool_maxsize=self.pool_size
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers["User-Agent"] = "gridpilot"
+                    self._session = session
+        return self._session
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def get_json(self, url: str, params: dict[str, Any] | None = None, timeout: Any = None) -> Any:
+        """
+        GET url and return the parsed JSON body.
+
+        Connection errors, timeouts and 429/5xx responses are retried up to
+        max_retries times. Other error responses are returned as parsed JSON so
+        API error bodies (e.g. Open-Meteo's {"error": true, "reason": ...})
+        reach the caller.
+
+        Raises:
+            requests.RequestException: When the last attempt still fails.
+        """
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=timeout or self.timeout)
+                self._record(host, time.perf_counter() - started, "ok" if response.ok else "http_error")
+                if response.status_code not in RETRY_STATUSES:
+                    return response.json()
+                if attempt >= self.max_retries:
+                    response.raise_for_status()
+                delay = self._retry_after(response) or self.backoff(attempt + 1)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(host, time.perf_counter() - started, "network_error")
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt + 1)
+            attempt += 1
+            self._count(host, "retries")
+            time.sleep(delay)
+
+    async def get_json_async(self, url: str, params: dict[str, Any] | None = None, timeout: Any = None) -> Any:
+        """get_json on the tool executor, for use from the event loop."""
+        return await run_blocking(self.get_json, url, params=params, timeout=timeout)
+
+    def _retry_after(self, response: Any) -> float | None:
+        value = response.headers.get("Retry-After")
+        try:
+            return min(float(value), self.backoff_max) if value is not None else None
+        except ValueError:
+            return None
+
+    def _record(self, host: str, seconds: float, outcome: str) -> None:
+        with self._lock:
+            self._latencies.setdefault(host, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+        self._count(host, outcome)
+
+    def _count(self, host: str, name: str) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(
+                host, {"requests": 0, "ok": 0, "http_error": 0, "network_error": 0, "retries": 0}
+            )
+            if name != "retries":
+                counts["requests"] += 1
+            counts[name] += 1
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-host request counts and latency percentiles (ms) over recent requests."""
+        result = {}
+        with self._lock:
+            for host, counts in self._counts.items():
+                samples = sorted(self._latencies.get(host, ()))
+                result[host] = {
+                    **counts,
+                    "p50_ms": percentile_ms(samples, 0.5),
+                    "p95_ms": percentile_ms(samples, 0.95),
+                    "max_ms": percentile_ms(samples, 1.0),
+                }
+        return result
+
+
+http_client = HttpClient()
@@ -0,0 +1,56 @@
+"""
+Deferred imports and client construction.
+Heavy dependencies (pandas, gridstatus, duckdb, geopy, requests) are only
+imported when a tool first needs them, so importing the agents stays cheap.
+"""
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Any, Callable
+
+
+class LazyModule(ModuleType):
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+
+class LazyObject:
+    """Proxy that builds its target with factory() on first attribute access."""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    def _resolve(self) -> Any:
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._factory()
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+
+def lazy_import(name: str) -> Any:
+    """Return a proxy for module `name` that is imported on first use."""
+    return LazyModule(name)
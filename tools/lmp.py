@@ -0,0 +1,159 @@
+"""
+LMP history tools: hub spread and congestion analytics (tools.lmp_analytics)
+and per-node summaries for whole portfolios, over prices pulled in bulk
+(tools.bulk_lmp).
+"""
+
+import time
+from typing import Any
+from tools.aio import async_tool
+from tools.bulk_lmp import fetch_lmp_bulk
+from tools.common import day_window
+from tools.grid import caiso
+from tools.lmp_analytics import pivot_lmp, spread_analytics
+from tools.weather import CAISO_HUBS, resolve_node
+
+# Markets the spread analytics accept, with their interval length in minutes
+SPREAD_MARKETS = {"REAL_TIME_5_MIN": 5, "REAL_TIME_15_MIN": 15, "DAY_AHEAD_HOURLY": 60}
+MAX_SPREAD_DAYS = 366
+DEFAULT_SPREAD_THRESHOLDS = [5.0, 20.0, 50.0]
+MAX_NODAL_DAYS = 31
+
+
+def get_hub_spread_analytics(
+    start_date: str,
+    end_date: str | None = None,
+    nodes: list[str] | None = None,
+    reference: str = "SP15",
+    market: str = "REAL_TIME_5_MIN",
+    thresholds: list[float] | None = None,
+    window_hours: float = 24,
+) -> dict[str, Any]:
+    """
+    Analyzes LMP spreads and congestion over a date range for the NP15/SP15/ZP26
+    trading hubs plus any requested nodes, e.g. "how often did the NP15-SP15
+    spread exceed $20 this month".
+
+    Args:
+        start_date: First date in YYYY-MM-DD format.
+        end_date: Last date in YYYY-MM-DD format (inclusive). Defaults to start_date.
+        nodes: Extra pricing nodes (node IDs or NP15/SP15/ZP26) to include. Optional.
+        reference: Location every spread is taken against (spread = location - reference).
+            Defaults to "SP15".
+        market: "REAL_TIME_5_MIN", "REAL_TIME_15_MIN" or "DAY_AHEAD_HOURLY".
+            Defaults to "REAL_TIME_5_MIN".
+        thresholds: Spread levels in $/MWh to count exceedances for (in either
+            direction). Defaults to [5, 20, 50].
+        window_hours: Trailing window for the rolling mean spread. Defaults to 24.
+
+    Returns:
+        Dictionary with, per location, mean LMP/energy/congestion/loss and mean
+        congestion by hour ending ("HE01" = 00:00-01:00 through "HE24",
+        Pacific); and per spread, summary statistics, its energy/congestion/loss
+        split, exceedance counts and hours per threshold, rolling mean extremes,
+        mean by hour ending and daily means.
+    """
+    try:
+        end_date = end_date or start_date
+        window = day_window(start_date, end_date, MAX_SPREAD_DAYS)
+        if isinstance(window, str):
+            return {"error": window}
+        market = market.upper()
+        if market not in SPREAD_MARKETS:
+            return {"error": f"Invalid market: {market}. Use one of {list(SPREAD_MARKETS)}."}
+
+        reference_node = resolve_node(reference)
+        locations = list(dict.fromkeys([*CAISO_HUBS.values(), *(resolve_node(node) for node in nodes or []), reference_node]))
+
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        # Closed days come from the local store; only missing days go to OASIS
+        df, report = fetch_lmp_bulk(caiso, locations, *window, market=market)
+        timings["fetch"] = round((time.perf_counter() - started) * 1000, 1)
+        if df.empty:
+            return {"error": "No LMP data available", "start_date": start_date, "end_date": end_date}
+
+        started = time.perf_counter()
+        matrices = pivot_lmp(df, locations, SPREAD_MARKETS[market])
+        result = spread_analytics(matrices, reference_node, thresholds or DEFAULT_SPREAD_THRESHOLDS, window_hours)
+        timings["compute"] = round((time.perf_counter() - started) * 1000, 1)
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "market": market,
+            "interval_minutes": matrices["interval_minutes"],
+            "reference": reference_node,
+            "missing_locations": [loc for loc, stats in result["locations"].items() if not stats["intervals"]],
+            "failed_requests": report["failed_requests"],
+            **result,
+            "timings_ms": timings,
+        }
+    except Exception as e:
+        return {"error": f"Failed to compute spread analytics: {str(e)}"}
+
+
+def get_caiso_nodal_lmps(
+    nodes: list[str],
+    start_date: str,
+    end_date: str | None = None,
+    market: str = "DAY_AHEAD_HOURLY",
+    top: int = 10,
+) -> dict[str, Any]:
+    """
+    Fetches LMPs for many pricing nodes at once (a whole portfolio, hundreds of
+    nodes) and summarizes them per node.
+
+    Args:
+        nodes: Node IDs (or NP15/SP15/ZP26 for the trading hubs).
+        start_date: First date in YYYY-MM-DD format.
+        end_date: Last date in YYYY-MM-DD format (inclusive). Defaults to start_date.
+        market: "DAY_AHEAD_HOURLY", "REAL_TIME_15_MIN" or "REAL_TIME_5_MIN".
+            Defaults to "DAY_AHEAD_HOURLY".
+        top: How many highest- and lowest-priced nodes to list. Defaults to 10.
+
+    Returns:
+        Dictionary with per-node mean/min/max LMP and mean congestion ($/MWh),
+        the highest and lowest nodes by mean LMP, nodes with no data, and fetch
+        statistics (requests, failures, rows, seconds, nodes_per_second).
+    """
+    try:
+        window = day_window(start_date, end_date, MAX_NODAL_DAYS)
+        if isinstance(window, str):
+            return {"error": window}
+        market = market.upper()
+        if market not in SPREAD_MARKETS:
+            return {"error": f"Invalid market: {market}. Use one of {list(SPREAD_MARKETS)}."}
+        if not nodes:
+            return {"error": "Provide at least one node"}
+
+        df, report = fetch_lmp_bulk(caiso, [resolve_node(node) for node in nodes], *window, market=market)
+        if df.empty:
+            return {"error": "No LMP data available", "start_date": start_date, "fetch": report}
+
+        summary = df.groupby("Location", observed=True).agg(
+            intervals=("LMP", "count"),
+            mean_lmp=("LMP", "mean"),
+            min_lmp=("LMP", "min"),
+            max_lmp=("LMP", "max"),
+            mean_congestion=("Congestion", "mean"),
+        ).round(2).sort_values("mean_lmp", ascending=False)
+        summary["intervals"] = summary["intervals"].astype(int)
+        by_node = summary.to_dict("index")
+        ranked = [{"node": node, "mean_lmp": stats["mean_lmp"]} for node, stats in by_node.items()]
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date or start_date,
+            "market": market,
+            "nodes": by_node,
+            "highest_mean_lmp": ranked[:top],
+            "lowest_mean_lmp": ranked[::-1][:top],
+            "fetch": report,
+        }
+    except Exception as e:
+        return {"error": f"Failed to fetch nodal LMPs: {str(e)}"}
+
+
+get_hub_spread_analytics_async = async_tool(get_hub_spread_analytics)
+get_caiso_nodal_lmps_async = async_tool(get_caiso_nodal_lmps)
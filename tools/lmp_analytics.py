@@ -0,0 +1,255 @@
+"""
+Price spread and congestion analytics over LMP history.
+Pivots a long gridstatus LMP frame into (interval x location) matrices on a
+regular time grid once, then computes spreads against a reference node,
+exceedance counts, rolling and daily means, hour-of-day profiles and the
+energy/congestion/loss decomposition as array operations over the whole
+history.
+"""
+
+from __future__ import annotations
+
+import warnings
+from typing import Any
+from tools.cache import CAISO_TZ
+from tools.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+COMPONENTS = ["LMP", "Energy", "Congestion", "Loss"]
+
+
+def pivot_lmp(df: pd.DataFrame, locations: list[str], interval_minutes: int | None = None) -> dict[str, Any]:
+    """
+    Turn a long LMP frame into one (interval x location) matrix per component.
+
+    Rows are placed by integer offset from the first interval, so the time
+    axis is regular and gaps (missing intervals or nodes) are NaN.
+
+    Args:
+        df: Frame with "Interval Start", "Location" and the COMPONENTS columns.
+        locations: Column order of the matrices; other locations are dropped.
+        interval_minutes: Interval length; inferred from the data if None.
+
+    Returns:
+        Dict with "times" (Pacific DatetimeIndex), "locations", "interval_minutes"
+        and one float matrix per component.
+    """
+    codes = pd.Categorical(df["Location"], categories=locations).codes
+    keep = codes >= 0
+    stamps = df["Interval Start"].to_numpy(dtype="datetime64[ns]")[keep].astype("int64")
+    codes = codes[keep]
+    if not len(stamps):
+        return {"times": pd.DatetimeIndex([], tz=CAISO_TZ), "locations": locations, "interval_minutes": interval_minutes,
+                **{component: np.zeros((0, len(locations))) for component in COMPONENTS}}
+
+    first = stamps.min()
+    if interval_minutes is None:
+        steps = np.diff(np.unique(stamps))
+        interval_minutes = int(np.median(steps) // 60_000_000_000) if len(steps) else 60
+    step = interval_minutes * 60_000_000_000
+    rows = (stamps - first) // step
+    n_rows = int(rows.max()) + 1
+
+    result = {
+        "times": pd.to_datetime(first + np.arange(n_rows) * step, unit="ns", utc=True).tz_convert(CAISO_TZ),
+        "locations": locations,
+        "interval_minutes": interval_minutes,
+    }
+    for component in COMPONENTS:
+        matrix = np.full((n_rows, len(locations)), np.nan)
+        matrix[rows, codes] = df[component].to_numpy(dtype=float)[keep]
+        result[component] = matrix
+    return result
+
+
+def rolling_mean(values: np.ndarray, window: int, min_periods: int = 1) -> np.ndarray:
+    """
+    Trailing NaN-aware mean over `window` rows of each column, via cumulative
+    sums. Rows whose window holds fewer than min_periods values are NaN.
+    """
+    present = np.isfinite(values)
+    sums = np.cumsum(np.where(present, values, 0.0), axis=0)
+    counts = np.cumsum(present, axis=0)
+    pad = np.zeros((1, *values.shape[1:]))
+    sums = np.concatenate([pad, sums])
+    counts = np.concatenate([pad, counts])
+    window = max(min(window, len(values)), 1)
+    lagged = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    total = sums[1:] - sums[lagged]
+    count = counts[1:] - counts[lagged]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count >= max(min_periods, 1), total / count, np.nan)
+
+
+def group_mean(values: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """NaN-aware mean of each column of values per group label (0..n_groups-1)."""
+    present = np.isfinite(values)
+    filled = np.where(present, values, 0.0)
+    if values.ndim == 1:
+        total = np.bincount(groups, weights=filled, minlength=n_groups)
+        count = np.bincount(groups, weights=present, minlength=n_groups)
+    else:
+        # Offset each column's labels so one bincount covers every column
+        offsets = groups[:, None] + n_groups * np.arange(values.shape[1])
+        total = np.bincount(offsets.ravel(), weights=filled.ravel(), minlength=n_groups * values.shape[1])
+        count = np.bincount(offsets.ravel(), weights=present.ravel(), minlength=n_groups * values.shape[1])
+        total = total.reshape(values.shape[1], n_groups).T
+        count = count.reshape(values.shape[1], n_groups).T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def _round(value: Any, digits: int = 2) -> float | None:
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+def _round_list(values: np.ndarray, digits: int = 2) -> list[float | None]:
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def _by_hour_ending(values: np.ndarray) -> dict[str, float | None]:
+    """Hour-of-day means (index = hour beginning, 0-23) keyed HE01-HE24."""
+    return {f"HE{hour + 1:02d}": value for hour, value in enumerate(_round_list(values))}
+
+
+def _extreme_at(values: np.ndarray, times: pd.DatetimeIndex, fn: Any) -> tuple[float | None, str | None]:
+    if not np.isfinite(values).any():
+        return None, None
+    i = int(fn(values))
+    return _round(values[i]), times[i].isoformat()
+
+
+def spread_analytics(
+    matrices: dict[str, Any],
+    reference: str,
+    thresholds: list[float],
+    window_hours: float = 24,
+) -> dict[str, Any]:
+    """
+    Spread and congestion analytics for every location against a reference.
+
+    Each spread is location minus reference, split into its energy,
+    congestion and loss parts. Exceedance counts intervals where the spread
+    is above +threshold or below -threshold.
+
+    Args:
+        matrices: Output of pivot_lmp.
+        reference: Location the spreads are taken against.
+        thresholds: Spread levels ($/MWh) to count exceedances for.
+        window_hours: Trailing window of the rolling mean spread.
+
+    Returns:
+        Dict with "locations" (component means and hour-of-day congestion) and
+        "spreads" (statistics per location minus reference).
+    """
+    # All-NaN columns (a node with no data) are reported as None, not warned about
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return _spread_analytics(matrices, reference, thresholds, window_hours)
+
+
+def _spread_analytics(
+    matrices: dict[str, Any],
+    reference: str,
+    thresholds: list[float],
+    window_hours: float,
+) -> dict[str, Any]:
+    times = matrices["times"]
+    locations = matrices["locations"]
+    interval_hours = matrices["interval_minutes"] / 60
+    # Hour beginning (0-23) of each interval; HE01 covers 00:00-01:00
+    hours = times.hour.to_numpy()
+    day_codes, days = pd.factorize(times.normalize())
+    ref = locations.index(reference)
+
+    lmp = matrices["LMP"]
+    means = {component: np.nanmean(matrices[component], axis=0) if len(lmp) else np.full(len(locations), np.nan)
+             for component in COMPONENTS}
+    abs_lmp = np.nanmean(np.abs(lmp), axis=0) if len(lmp) else np.full(len(locations), np.nan)
+    abs_congestion = np.nanmean(np.abs(matrices["Congestion"]), axis=0) if len(lmp) else np.full(len(locations), np.nan)
+    hourly_congestion = group_mean(matrices["Congestion"], hours, 24)
+
+    location_stats = {}
+    for j, location in enumerate(locations):
+        location_stats[location] = {
+            "intervals": int(np.isfinite(lmp[:, j]).sum()),
+            **{f"mean_{component.lower()}": _round(means[component][j]) for component in COMPONENTS},
+            # Share of the price level explained by congestion, either direction
+            "congestion_share_pct": _round(100 * abs_congestion[j] / abs_lmp[j], 1) if abs_lmp[j] else None,
+            "congestion_by_hour_ending": _by_hour_ending(hourly_congestion[:, j]),
+        }
+
+    others = [j for j in range(len(locations)) if j != ref]
+    spreads = {component: matrices[component][:, others] - matrices[component][:, [ref]] for component in COMPONENTS}
+    spread = spreads["LMP"]
+    valid = np.isfinite(spread)
+    n_valid = valid.sum(axis=0)
+    with np.errstate(invalid="ignore"):
+        percentiles = np.nanpercentile(spread, [5, 50, 95], axis=0) if len(spread) else np.full((3, len(others)), np.nan)
+        exceedance = {
+            threshold: ((spread > threshold).sum(axis=0), (spread < -threshold).sum(axis=0))
+            for threshold in thresholds
+        }
+    window = max(int(round(window_hours / interval_hours)), 1)
+    # At least half a window of data, so the extremes are not warm-up noise.
+    # rolling_mean clamps the window to the history, so a history shorter
+    # than the window (e.g. today so far) needs half of that, not of the window.
+    rolling = rolling_mean(spread, window, min_periods=(min(window, max(len(spread), 1)) + 1) // 2)
+    hourly = group_mean(spread, hours, 24)
+    daily = group_mean(spread, day_codes, len(days))
+    day_labels = [day.strftime("%Y-%m-%d") for day in days]
+
+    spread_stats = {}
+    for k, j in enumerate(others):
+        column = spread[:, k]
+        if not n_valid[k]:
+            spread_stats[f"{locations[j]} - {reference}"] = {"intervals": 0}
+            continue
+        max_value, max_at = _extreme_at(column, times, np.nanargmax)
+        min_value, min_at = _extreme_at(column, times, np.nanargmin)
+        rolling_max, rolling_max_at = _extreme_at(rolling[:, k], times, np.nanargmax)
+        rolling_min, rolling_min_at = _extreme_at(rolling[:, k], times, np.nanargmin)
+        last = np.flatnonzero(np.isfinite(rolling[:, k]))
+        spread_stats[f"{locations[j]} - {reference}"] = {
+            "intervals": int(n_valid[k]),
+            "mean": _round(np.nanmean(column)),
+            "std": _round(np.nanstd(column)),
+            "max": max_value,
+            "max_at": max_at,
+            "min": min_value,
+            "min_at": min_at,
+            "p5": _round(percentiles[0, k]),
+            "p50": _round(percentiles[1, k]),
+            "p95": _round(percentiles[2, k]),
+            # Mean spread split by component; energy is system-wide, so the
+            # spread is almost entirely congestion and losses
+            "components": {
+                component.lower(): _round(np.nanmean(spreads[component][:, k]))
+                for component in COMPONENTS[1:]
+            },
+            "exceedance": [
+                {
+                    "threshold": threshold,
+                    "above": int(above[k]),
+                    "below": int(below[k]),
+                    "share_pct": _round(100 * (above[k] + below[k]) / n_valid[k], 1),
+                    "hours": _round((above[k] + below[k]) * interval_hours, 1),
+                }
+                for threshold, (above, below) in exceedance.items()
+            ],
+            "rolling_mean": {
+                "window_hours": window_hours,
+                "latest": _round(rolling[last[-1], k]) if len(last) else None,
+                "max": rolling_max,
+                "max_at": rolling_max_at,
+                "min": rolling_min,
+                "min_at": rolling_min_at,
+            },
+            "by_hour_ending": _by_hour_ending(hourly[:, k]),
+            "daily_mean": dict(zip(day_labels, _round_list(daily[:, k]))),
+        }
+
+    return {"locations": location_stats, "spreads": spread_stats}
@@ -1,48 +1,116 @@
-import gridstatus
+import time
+from typing import Any, Callable
+from tools.aio import async_variant, gather_blocking
+from tools.grid import caiso, latest_or_fetch
 
-def get_caiso_market_data():
+# We focus on NP15 (North) and SP15 (South) to see congestion spreads
+HUB_LOCATIONS = ["TH_NP15_GEN-APND", "TH_SP15_GEN-APND"]
+
+
+def _snapshot_fetches() -> dict[str, Callable[[], Any]]:
+    """
+    The independent pulls behind a market snapshot, keyed by name.
+    Served from the background poller's buffers when it is running; otherwise
+    the shared client coalesces identical pulls from concurrent sessions.
+    """
+    # Shared client: concurrent sessions asking for the same snapshot share one fetch
+    iso = caiso
+    return {
+        "fuel_mix": lambda: latest_or_fetch("fuel_mix", "latest", None, lambda: iso.get_fuel_mix("latest"), last=1),
+        "load": lambda: latest_or_fetch("load", "latest", None, lambda: iso.get_load("latest"), last=1),
+        # Using Real-Time Market (RTM) 5-min prices
+        "hub_lmp": lambda: latest_or_fetch(
+            "hub_lmp", "latest", None,
+            lambda: iso.get_lmp("latest", market="REAL_TIME_5_MIN", locations=HUB_LOCATIONS),
+            last=1,
+        ),
+    }
+
+
+def _timed(fn: Callable[[], Any], timings: dict[str, float], name: str) -> Callable[[], Any]:
+    """Wrap fn so its wall time is recorded in timings[name] (ms)."""
+    def call():
+        started = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            timings[name] = round((time.perf_counter() - started) * 1000, 1)
+    return call
+
+
+def _market_snapshot(frames: dict[str, Any], timings: dict[str, float]) -> dict[str, Any]:
+    """Build the structured snapshot from the fetched frames."""
+    # gridstatus returns pandas DataFrames. We need the latest interval.
+    latest_mix = frames["fuel_mix"].iloc[-1]
+    latest_load_row = frames["load"].iloc[-1]
+
+    current_load = float(latest_load_row["Load"])
+    current_solar = float(latest_mix.get("Solar", 0))
+    current_wind = float(latest_mix.get("Wind", 0))
+
+    # Calculate Net Load - The most critical metric for CAISO traders
+    net_load = current_load - current_solar - current_wind
+
+    # Latest interval per hub, whatever order the rows arrive in
+    lmp_df = frames["hub_lmp"].sort_values("Interval Start").groupby("Location", sort=False).tail(1)
+    hub_prices = [
+        {
+            "location": row["Location"],
+            "interval_start": row["Interval Start"].isoformat(),
+            "lmp": round(float(row["LMP"]), 2),
+            "energy": round(float(row["Energy"]), 2),
+            "congestion": round(float(row["Congestion"]), 2),
+            "loss": round(float(row["Loss"]), 2),
+        }
+        for row in lmp_df.to_dict("records")
+    ]
+
+    return {
+        "time": latest_load_row["Time"].isoformat(),
+        "system_load_mw": round(current_load, 1),
+        "solar_mw": round(current_solar, 1),
+        "wind_mw": round(current_wind, 1),
+        "net_load_mw": round(net_load, 1),
+        "market": "REAL_TIME_5_MIN",
+        "hub_prices": hub_prices,
+        "timings_ms": timings,
+    }
+
+
+def get_caiso_market_data() -> dict[str, Any]:
     """
     Fetches real-time CAISO market data including Load, Net Load (Load - Solar - Wind),
     and Locational Marginal Prices (LMPs) for key trading hubs (NP15, SP15).
+
+    Returns:
+        Dictionary with the latest system load, solar, wind and net load (MW),
+        5-minute LMP with energy/congestion/loss components per hub, and
+        timings_ms for each sub-fetch and the whole snapshot.
     """
     try:
-        iso = gridstatus.CAISO()
-        
-        # 1. Get Load and Renewables (Fuel Mix)
-        # gridstatus returns pandas DataFrames. We need the latest interval.
-        fuel_mix_df = iso.get_fuel_mix("latest")
-        load_df = iso.get_load("latest")
-        
-        # Extract latest values
-        latest_mix = fuel_mix_df.iloc[-1]
-        latest_load_row = load_df.iloc[-1]
-        
-        current_load = latest_load_row["Load"]
-        current_solar = latest_mix.get("Solar", 0)
-        current_wind = latest_mix.get("Wind", 0)
-        
-        # Calculate Net Load - The most critical metric for CAISO traders
-        net_load = current_load - current_solar - current_wind
-        
-        # 2. Get Pricing (LMP) for Trading Hubs
-        # We focus on NP15 (North) and SP15 (South) to see congestion spreads
-        # Using Real-Time Market (RTM) 5-min prices
-        lmp_df = iso.get_lmp("latest", market="REAL_TIME_5_MIN", locations=["TH_NP15_GEN-APND", "TH_SP15_GEN-APND"])
-        
-        # Pivot or filter to get a clean view
-        latest_lmps = lmp_df.tail(2)[["Location", "LMP", "Congestion", "Energy", "Loss"]]
-        
-        summary = (
-            f"--- CAISO Real-Time Snapshot ---\n"
-            f"Time: {latest_load_row['Time']}\n"
-            f"System Load: {current_load} MW\n"
-            f"Renewables: Solar {current_solar} MW | Wind {current_wind} MW\n"
-            f"Net Load: {net_load} MW (Load - Renewables)\n\n"
-            f"--- Key Hub Pricing (5-Min RTM) ---\n"
-            f"{latest_lmps.to_string(index=False)}\n"
-        )
-        
-        return summary
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        frames = {name: _timed(fetch, timings, name)() for name, fetch in _snapshot_fetches().items()}
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+        return _market_snapshot(frames, timings)
+
+    except Exception as e:
+        return {"error": f"Error fetching CAISO data: {str(e)}"}
+
+
+# Async variant registered with the Market agent; the three pulls are independent,
+# so the snapshot takes as long as the slowest one rather than their sum
+@async_variant(get_caiso_market_data)
+async def get_caiso_market_data_async() -> dict[str, Any]:
+    try:
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        fetches = _snapshot_fetches()
+        results = await gather_blocking(*(_timed(fetch, timings, name) for name, fetch in fetches.items()))
+        # Fetches finish in any order; report them in a stable one
+        timings = {name: timings[name] for name in fetches}
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+        return _market_snapshot(dict(zip(fetches, results)), timings)
 
     except Exception as e:
-        return f"Error fetching CAISO data: {str(e)}"
\ No newline at end of file
+        return {"error": f"Error fetching CAISO data: {str(e)}"}
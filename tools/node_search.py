@@ -0,0 +1,389 @@
+"""
+CAISO node directory and search index.
+Keeps the OASIS pnode/apnode list cached on disk with a refresh policy and
+serves node searches from an in-memory index: a prefix index over node IDs
+and their name tokens, trigram postings for substring and fuzzy matches, and
+zone/type filters, so repeated searches never touch OASIS.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable
+from tools.cache import flights
+from tools.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+NODE_LIST_PATH = os.getenv("GRIDPILOT_NODE_LIST_PATH", os.path.join("data", "caiso_node_list.json"))
+# The pnode map changes with CAISO's quarterly network model releases; weekly is plenty
+NODE_LIST_MAX_AGE_SECONDS = float(os.getenv("GRIDPILOT_NODE_LIST_MAX_AGE_HOURS", "168")) * 3600
+# Wait after a failed refresh before OASIS is tried again
+REFRESH_RETRY_SECONDS = 900
+
+ZONES = ("NP15", "SP15", "ZP26")
+
+# Node ID prefix/suffix -> node type, first match wins
+NODE_TYPE_RULES = [
+    (re.compile(r"^TH_"), "trading_hub"),
+    (re.compile(r"^DLAP_"), "dlap"),
+    (re.compile(r"^SLAP_"), "slap"),
+    (re.compile(r"^ELAP_"), "elap"),
+    (re.compile(r"-APND$"), "apnode"),
+]
+
+# Query words that select node types rather than names
+TYPE_TERMS = {
+    "HUB": {"trading_hub"},
+    "HUBS": {"trading_hub"},
+    "TRADING_HUB": {"trading_hub"},
+    "DLAP": {"dlap"},
+    "SLAP": {"slap"},
+    "ELAP": {"elap"},
+    "LAP": {"dlap", "slap", "elap"},
+    "APNODE": {"trading_hub", "dlap", "slap", "elap", "apnode"},
+    "APND": {"trading_hub", "dlap", "slap", "elap", "apnode"},
+    "PNODE": {"pnode"},
+}
+
+_TOKEN_SPLIT = re.compile(r"[_\-\s.]+")
+
+# Score per match kind; fuzzy matches scale FUZZY_SCORE by the share of the
+# query's trigrams found in the node ID
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.9
+TOKEN_SCORE = 0.8
+SUBSTRING_SCORE = 0.7
+FUZZY_SCORE = 0.6
+MIN_SIMILARITY = 0.5
+# Candidates scored per match kind and query word, shortest IDs first; bounds
+# very short or very common words (e.g. "A", "N101") on large lists
+MAX_CANDIDATES = 256
+
+
+def node_type(node_id: str) -> str:
+    """Classify a node ID by CAISO naming convention."""
+    for pattern, kind in NODE_TYPE_RULES:
+        if pattern.search(node_id):
+            return kind
+    return "pnode"
+
+
+def name_zone(node_id: str) -> str | None:
+    """Zone named in the node ID itself (e.g. TH_SP15_GEN-APND), if any."""
+    for zone in ZONES:
+        if zone in node_id:
+            return zone
+    return None
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NodeSearchIndex:
+    """
+    In-memory search index over node records.
+
+    Args:
+        records: Dicts with "node_id", "type" and "zone" (None if unknown),
+            plus any extra fields returned with matches.
+    """
+
+    def __init__(self, records: list[dict[str, Any]]):
+        # Shorter IDs first, so ties and capped prefix scans favour the plainest names
+        self.records = sorted(records, key=lambda record: (len(record["node_id"]), record["node_id"]))
+        ids = [record["node_id"] for record in self.records]
+        self._position = {node_id: i for i, node_id in enumerate(ids)}
+
+        # Prefix index: sorted (key, node) pairs for every full ID and name token,
+        # so all keys with a prefix form one contiguous range
+        keys: dict[str, list[int]] = {}
+        for i, node_id in enumerate(ids):
+            keys.setdefault(node_id, []).append(i)
+            for token in _TOKEN_SPLIT.split(node_id):
+                if token and token != node_id:
+                    keys.setdefault(token, []).append(i)
+        self._keys = sorted(keys)
+        self._key_nodes = [keys[key] for key in self._keys]
+
+        postings: dict[str, list[int]] = {}
+        for i, node_id in enumerate(ids):
+            for trigram in _trigrams(node_id):
+                postings.setdefault(trigram, []).append(i)
+        self._postings = {trigram: np.array(nodes, dtype=np.int32) for trigram, nodes in postings.items()}
+
+        self._by_zone: dict[str | None, set[int]] = {}
+        self._by_type: dict[str, set[int]] = {}
+        for i, record in enumerate(self.records):
+            self._by_zone.setdefault(record.get("zone"), set()).add(i)
+            self._by_type.setdefault(record["type"], set()).add(i)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _term_scores(self, term: str, allowed: set[int] | None = None) -> dict[int, tuple[float, str]]:
+        """Best (score, match kind) per node for one query term, among allowed nodes."""
+        scores: dict[int, tuple[float, str]] = {}
+
+        def offer(i: int, score: float, kind: str) -> None:
+            if score > scores.get(i, (0.0, ""))[0]:
+                scores[i] = (score, kind)
+
+        exact = self._position.get(term)
+        if exact is not None and (allowed is None or exact in allowed):
+            offer(exact, EXACT_SCORE, "exact")
+
+        # Keys sharing the prefix are one contiguous run of the sorted key list
+        lo = bisect.bisect_left(self._keys, term)
+        hi = bisect.bisect_left(self._keys, term + "\uffff")
+        offered = 0
+        for k in range(lo, hi):
+            key = self._keys[k]
+            for i in self._key_nodes[k]:
+                if offered >= MAX_CANDIDATES:
+                    break
+                if allowed is not None and i not in allowed:
+                    continue
+                if self.records[i]["node_id"] == key:
+                    offer(i, PREFIX_SCORE, "prefix")
+                else:
+                    offer(i, TOKEN_SCORE, "token")
+                offered += 1
+
+        query_trigrams = _trigrams(term)
+        if query_trigrams:
+            lists = [self._postings[t] for t in query_trigrams if t in self._postings]
+            if lists:
+                shared = np.bincount(np.concatenate(lists), minlength=len(self.records))
+                if allowed is not None:
+                    mask = np.zeros(len(self.records), dtype=bool)
+                    mask[list(allowed)] = True
+                    shared[~mask] = 0
+                # Substring: node has every query trigram and really contains the term
+                for i in np.flatnonzero(shared == len(query_trigrams))[:MAX_CANDIDATES]:
+                    if term in self.records[i]["node_id"]:
+                        offer(int(i), SUBSTRING_SCORE, "substring")
+                # Fuzzy: share of query trigrams present, so a misspelled name part
+                # still matches a long node ID; too noisy for words under 5 letters
+                if len(query_trigrams) < 3:
+                    return scores
+                candidates = np.flatnonzero(shared)
+                similarity = shared[candidates] / len(query_trigrams)
+                keep = np.flatnonzero(similarity >= MIN_SIMILARITY)
+                keep = keep[np.argsort(-similarity[keep], kind="stable")[:MAX_CANDIDATES]]
+                for i, value in zip(candidates[keep].tolist(), similarity[keep].tolist()):
+                    offer(i, FUZZY_SCORE * value, "fuzzy")
+        return scores
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        zone: str | None = None,
+        node_types: set[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Rank nodes against a query.
+
+        Query words naming a node type (hub, dlap, slap, apnode, pnode, ...)
+        filter the results like the node_types argument, as do zone names
+        (NP15/SP15/ZP26) next to other words; a lone zone name is searched as
+        a name. Every other word must match the node ID, and a node's score is
+        the mean of its per-word scores.
+        """
+        # Words are whitespace-separated; "_" and "-" stay inside a term so full
+        # or partial node IDs match as typed
+        terms = query.upper().split()
+        allowed: set[int] | None = None
+        if zone:
+            allowed = set(self._by_zone.get(zone.upper(), ()))
+        types = set(node_types or ())
+        name_terms = []
+        for term in terms:
+            if term in ZONES and len(terms) > 1:
+                zone_nodes = self._by_zone.get(term, set())
+                allowed = zone_nodes if allowed is None else allowed & zone_nodes
+            elif term in TYPE_TERMS:
+                types |= TYPE_TERMS[term]
+            else:
+                name_terms.append(term)
+        if types:
+            type_nodes = set().union(*(self._by_type.get(kind, set()) for kind in types))
+            allowed = type_nodes if allowed is None else allowed & type_nodes
+
+        if not name_terms:
+            # Filter-only query: list matching nodes, plainest names first
+            return [
+                {**self.records[i], "score": EXACT_SCORE, "match": "filter"}
+                for i in heapq.nsmallest(limit, allowed if allowed is not None else range(len(self.records)))
+            ]
+
+        # Longest (usually most selective) word first; later words only score its matches
+        combined: dict[int, tuple[float, str]] = {}
+        for n, term in enumerate(sorted(name_terms, key=len, reverse=True)):
+            scores = self._term_scores(term, allowed)
+            if n == 0:
+                combined = scores
+            else:
+                combined = {
+                    i: (combined[i][0] + value[0], combined[i][1] if combined[i][0] >= value[0] else value[1])
+                    for i, value in scores.items()
+                }
+            allowed = set(combined)
+        ranked = heapq.nsmallest(limit, combined.items(), key=lambda item: (-item[1][0], item[0]))
+        return [
+            {**self.records[i], "score": round(score / len(name_terms), 3), "match": kind}
+            for i, (score, kind) in ranked
+        ]
+
+
+class NodeDirectory:
+    """
+    CAISO node list cached on disk, with a search index built from it.
+
+    The list is read from `path` on first use. Once older than `max_age` it is
+    still served while a background refresh downloads a new copy; a failed
+    refresh keeps the old list and is retried after REFRESH_RETRY_SECONDS.
+    Without a cached list the first search downloads it, and if that fails
+    too, only the `builtin` nodes are searchable.
+
+    Args:
+        fetch: Returns the OASIS pnode map as a DataFrame with "Aggregate
+            PNode ID" and "PNode ID" columns (gridstatus CAISO.get_pnodes).
+        builtin: Node ID -> attributes of nodes that are always listed,
+            e.g. the trading hubs and any node with known coordinates.
+        zone_of: Maps a node ID to its zone when the name does not say.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Any],
+        builtin: dict[str, dict[str, Any]] | None = None,
+        zone_of: Callable[[str], str | None] | None = None,
+        path: str = NODE_LIST_PATH,
+        max_age: float = NODE_LIST_MAX_AGE_SECONDS,
+    ):
+        self._fetch = fetch
+        self._builtin = builtin or {}
+        self._zone_of = zone_of
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._index: NodeSearchIndex | None = None
+        self._fetched_at: float | None = None
+        self._source = "builtin"
+        self._refreshing = False
+        self._retry_at = 0.0
+        self.last_error: str | None = None
+
+    def index(self) -> NodeSearchIndex:
+        """Current search index, loading or refreshing the node list as needed."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._load_initial()
+        if self._is_stale():
+            self._refresh_in_background()
+        return self._index
+
+    def _load_initial(self) -> None:
+        nodes = self._read()
+        if nodes is None:
+            try:
+                nodes = self._download()
+            except Exception as e:
+                self.last_error = str(e)
+                self._retry_at = time.time() + REFRESH_RETRY_SECONDS
+                logger.warning("CAISO node list download failed, searching built-in nodes only: %s", e)
+                nodes = []
+        self._install(nodes)
+
+    def _is_stale(self) -> bool:
+        now = time.time()
+        if now < self._retry_at:
+            return False
+        return self._fetched_at is None or now - self._fetched_at > self.max_age
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name="node-list-refresh", daemon=True).start()
+
+    def refresh(self) -> bool:
+        """Download the node list now and swap in a new index; False if the download failed."""
+        try:
+            nodes = self._download()
+        except Exception as e:
+            self.last_error = str(e)
+            self._retry_at = time.time() + REFRESH_RETRY_SECONDS
+            logger.warning("CAISO node list refresh failed, keeping the cached list: %s", e)
+            return False
+        finally:
+            self._refreshing = False
+        self._install(nodes)
+        return True
+
+    def _read(self) -> list[dict[str, Any]] | None:
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable node list cache %s: %s", self.path, e)
+            return None
+        self._fetched_at = cached.get("fetched_at")
+        self._source = "disk"
+        return cached.get("nodes", [])
+
+    def _download(self) -> list[dict[str, Any]]:
+        df = flights.do(("node-list", self.path), self._fetch)
+        members: dict[str, int] = {}
+        for apnode, pnode in zip(df["Aggregate PNode ID"], df["PNode ID"]):
+            members[str(apnode)] = members.get(str(apnode), 0) + 1
+            members.setdefault(str(pnode), 0)
+        nodes = [{"node_id": node_id, "pnodes": count} if count else {"node_id": node_id} for node_id, count in members.items()]
+
+        fetched_at = time.time()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"fetched_at": fetched_at, "source": "OASIS ATL_PNODE_MAP", "nodes": nodes}, f)
+        os.replace(tmp_path, self.path)
+        self._fetched_at = fetched_at
+        self._source = "oasis"
+        self.last_error = None
+        return nodes
+
+    def _install(self, nodes: list[dict[str, Any]]) -> None:
+        records = {}
+        for node in [*({"node_id": node_id, **attrs} for node_id, attrs in self._builtin.items()), *nodes]:
+            node_id = node["node_id"].strip().upper()
+            record = {**records.get(node_id, {}), **node, "node_id": node_id, "type": node_type(node_id)}
+            record["zone"] = record.get("zone") or name_zone(node_id) or (self._zone_of(node_id) if self._zone_of else None)
+            records[node_id] = record
+        self._index = NodeSearchIndex(list(records.values()))
+
+    def status(self) -> dict[str, Any]:
+        """Where the current list came from, its age and size."""
+        age = time.time() - self._fetched_at if self._fetched_at else None
+        return {
+            "source": self._source,
+            "nodes": len(self._index) if self._index is not None else 0,
+            "age_hours": round(age / 3600, 1) if age is not None else None,
+            "stale": age is None or age > self.max_age,
+            "refreshing": self._refreshing,
+            "last_error": self.last_error,
+        }
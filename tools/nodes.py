@@ -0,0 +1,258 @@
+"""
+CAISO node geography.
+Loads pricing-node coordinates from a local CSV, maps every node to its zone
+and nearest load/solar/wind weather points once at load time, and keeps a
+lat/lon grid index for nearest-neighbour queries on arbitrary coordinates.
+The site price files add the sites traded at each node and, for nodes with
+no coordinates, at least their zone.
+"""
+
+from __future__ import annotations
+
+import csv
+import glob
+import math
+import os
+import threading
+from typing import Any
+from tools.lazy import lazy_import
+
+duckdb = lazy_import("duckdb")
+np = lazy_import("numpy")
+
+# CSV with node_id, lat, lon and optionally zone, name, type columns
+NODES_PATH = os.getenv("GRIDPILOT_NODES_PATH", "data/caiso_nodes.csv")
+# Site price exports (site, zone, node columns); their nodes resolve by zone
+# even when the node list has no coordinates for them
+PRICE_FILES = os.getenv("GRIDPILOT_NODE_PRICE_FILES", "data/caiso_combined_prices_*.csv")
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1: Any, lon1: Any, lat2: Any, lon2: Any) -> Any:
+    """Great-circle distance in km; broadcasts over NumPy arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class GridIndex:
+    """
+    Uniform lat/lon grid (geohash-style buckets) for nearest-neighbour queries.
+
+    Points are bucketed into cell_deg x cell_deg cells and stored sorted by
+    (row, col), so any rectangle of cells is one contiguous slice per row. A
+    query grows a square window around its own cell until no point outside
+    the window can be closer than the k-th best inside it.
+    """
+
+    def __init__(self, lats: np.ndarray, lons: np.ndarray, cell_deg: float = 0.25):
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.cell_deg = cell_deg
+        if not len(self.lats):
+            return
+        rows = np.floor(self.lats / cell_deg).astype(int)
+        cols = np.floor(self.lons / cell_deg).astype(int)
+        self._origin = (int(rows.min()), int(cols.min()))
+        self._shape = (int(rows.max()) - self._origin[0] + 1, int(cols.max()) - self._origin[1] + 1)
+        flat = (rows - self._origin[0]) * self._shape[1] + (cols - self._origin[1])
+        self._order = np.argsort(flat, kind="stable")
+        # _starts[c]:_starts[c + 1] is the slice of _order holding cell c
+        self._starts = np.searchsorted(flat[self._order], np.arange(self._shape[0] * self._shape[1] + 1))
+        self._max_abs_lat = float(np.abs(self.lats).max())
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> list[tuple[int, float]]:
+        """Return up to k (point index, distance km) pairs, closest first."""
+        if not len(self.lats):
+            return []
+        n_rows, n_cols = self._shape
+        row = math.floor(lat / self.cell_deg) - self._origin[0]
+        col = math.floor(lon / self.cell_deg) - self._origin[1]
+        last_radius = max(row, n_rows - 1 - row, col, n_cols - 1 - col, 0)
+        # Narrowest cell width (km) anywhere between the query and the points, so
+        # everything outside a window of radius R is provably R cell widths away
+        widest_lat = min(max(abs(lat), self._max_abs_lat) + self.cell_deg, 89.9)
+        cell_km = self.cell_deg * 111.0 * math.cos(math.radians(widest_lat))
+
+        radius = 1
+        while True:
+            radius = min(radius, last_radius)
+            c0, c1 = max(col - radius, 0), min(col + radius, n_cols - 1)
+            slices = [
+                self._order[self._starts[r * n_cols + c0]:self._starts[r * n_cols + c1 + 1]]
+                for r in range(max(row - radius, 0), min(row + radius, n_rows - 1) + 1)
+            ] if c0 <= c1 else []
+            index = np.concatenate(slices) if slices else np.zeros(0, dtype=int)
+            if len(index) >= k or radius == last_radius:
+                distances = haversine_km(lat, lon, self.lats[index], self.lons[index])
+                order = np.argsort(distances)[:k]
+                if radius == last_radius or distances[order[-1]] <= radius * cell_km:
+                    return [(int(index[i]), float(distances[i])) for i in order]
+            radius *= 2
+
+
+class NodeGeography:
+    """
+    Node coordinates, zones and precomputed nearest weather points.
+
+    Args:
+        weather_points: Category ("load"/"solar"/"wind") -> points with name,
+            lat, lon and zone, as in CAISO_WEATHER_POINTS.
+        builtin_nodes: Node ID -> {"lat", "lon", "zone", ...} always available
+            (e.g. the trading hubs), overridden by rows in the CSV.
+        path: Node CSV, read on first lookup. A missing file leaves only the
+            built-in nodes.
+        price_files: Glob of site price CSVs. Their site names resolve to
+            their node, and nodes missing from the node CSV are known by zone
+            only (no coordinates or nearest weather points).
+    """
+
+    def __init__(
+        self,
+        weather_points: dict[str, list[dict[str, Any]]],
+        builtin_nodes: dict[str, dict[str, Any]] | None = None,
+        path: str = NODES_PATH,
+        price_files: str = PRICE_FILES,
+    ):
+        self._weather_points = weather_points
+        self._builtin = builtin_nodes or {}
+        self._path = path
+        self._price_files = price_files
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            records = {node_id: {"node_id": node_id, **node} for node_id, node in self._builtin.items()}
+            if os.path.exists(self._path):
+                with open(self._path, newline="") as f:
+                    for row in csv.DictReader(f):
+                        node_id = row["node_id"].strip().upper()
+                        records[node_id] = {
+                            "node_id": node_id,
+                            "lat": float(row["lat"]),
+                            "lon": float(row["lon"]),
+                            **{key: row[key] for key in ("zone", "name", "type") if row.get(key)},
+                        }
+
+            self._ids = list(records)
+            self._position = {node_id: i for i, node_id in enumerate(self._ids)}
+            self._records = [records[node_id] for node_id in self._ids]
+            lats = np.array([record["lat"] for record in self._records], dtype=float)
+            lons = np.array([record["lon"] for record in self._records], dtype=float)
+            self.index = GridIndex(lats, lons)
+
+            # Nearest weather point of each category for every node, in one (nodes x points) pass
+            self._nearest: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+            for category, points in self._weather_points.items():
+                point_lats = np.array([point["lat"] for point in points], dtype=float)
+                point_lons = np.array([point["lon"] for point in points], dtype=float)
+                distances = haversine_km(lats[:, None], lons[:, None], point_lats[None, :], point_lons[None, :])
+                nearest = distances.argmin(axis=1)
+                self._nearest[category] = (nearest, distances[np.arange(len(lats)), nearest])
+
+            # Nodes without a zone take the zone of their nearest load center
+            nearest_load = self._nearest.get("load")
+            for i, record in enumerate(self._records):
+                if "zone" not in record and nearest_load is not None:
+                    record["zone"] = self._weather_points["load"][nearest_load[0][i]]["zone"]
+                    record["zone_source"] = "nearest_load_center"
+            self._load_price_sites()
+            self._loaded = True
+
+    def _load_price_sites(self) -> None:
+        """Sites per node from the price files; zone-only records for nodes without coordinates."""
+        self._sites: dict[str, str] = {}
+        self._zone_only: dict[str, dict[str, Any]] = {}
+        files = sorted(glob.glob(self._price_files)) if self._price_files else []
+        if not files:
+            return
+        con = duckdb.connect()
+        try:
+            rows = con.execute(
+                "SELECT DISTINCT upper(trim(node)), upper(trim(zone)), site "
+                "FROM read_csv(?, header = true, union_by_name = true) WHERE node IS NOT NULL ORDER BY ALL",
+                [files],
+            ).fetchall()
+        finally:
+            con.close()
+        for node_id, zone, site in rows:
+            i = self._position.get(node_id)
+            if i is not None:
+                record = self._records[i]
+            else:
+                record = self._zone_only.setdefault(node_id, {"node_id": node_id, "zone_source": "price_history"})
+            if zone and "zone" not in record:
+                record["zone"] = zone
+            if site:
+                record.setdefault("sites", []).append(site)
+                self._sites[site.strip().upper()] = node_id
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._ids)
+
+    def _resolve(self, node_id: str) -> str:
+        """Node ID for a node ID or a site name from the price files."""
+        key = node_id.strip().upper()
+        return self._sites.get(key, key)
+
+    def __contains__(self, node_id: str) -> bool:
+        self._load()
+        key = self._resolve(node_id)
+        return key in self._position or key in self._zone_only
+
+    def zone(self, node_id: str) -> str | None:
+        """A node's zone, or None if the node is unknown."""
+        self._load()
+        key = self._resolve(node_id)
+        i = self._position.get(key)
+        if i is None:
+            return self._zone_only.get(key, {}).get("zone")
+        return self._records[i].get("zone")
+
+    def lookup(self, node_id: str) -> dict[str, Any] | None:
+        """
+        Return a node's coordinates, zone and nearest weather point per category,
+        or None if the node is unknown. node_id may also be a site name from
+        the price files. A node known only from the price files has no
+        coordinates (lat/lon None) and no nearest weather points.
+        """
+        self._load()
+        key = self._resolve(node_id)
+        i = self._position.get(key)
+        if i is None:
+            record = self._zone_only.get(key)
+            if record is None or "zone" not in record:
+                return None
+            return {**record, "lat": None, "lon": None, "nearest_weather_points": {}}
+        record = self._records[i]
+        nearest = {}
+        for category, (indices, distances) in self._nearest.items():
+            point = self._weather_points[category][indices[i]]
+            nearest[category] = {"name": point["name"], "zone": point["zone"], "distance_km": round(float(distances[i]), 1)}
+        return {**record, "nearest_weather_points": nearest}
+
+    def lookup_many(self, node_ids: list[str]) -> tuple[dict[str, dict[str, Any]], list[str]]:
+        """Bulk lookup; returns (node ID -> lookup result, unknown node IDs)."""
+        found, unknown = {}, []
+        for node_id in node_ids:
+            result = self.lookup(node_id)
+            if result is None:
+                unknown.append(node_id)
+            else:
+                found[result["node_id"]] = result
+        return found, unknown
+
+    def nearest_nodes(self, lat: float, lon: float, k: int = 5) -> list[dict[str, Any]]:
+        """The k nodes closest to a coordinate, with distances."""
+        self._load()
+        return [
+            {**self._records[i], "distance_km": round(distance, 1)}
+            for i, distance in self.index.nearest(lat, lon, k)
+        ]
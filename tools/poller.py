@@ -0,0 +1,320 @@
+"""
+Background poller for CAISO "latest" data.
+Refreshes key real-time series on the 5-minute publication cadence and keeps
+the trailing hours in fixed-size NumPy ring buffers, so "latest" tool calls
+are answered from memory instead of an OASIS round-trip.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any
+from tools.cache import CAISO_TZ, INTERVAL_SECONDS, next_interval_boundary
+from tools.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+HORIZON_HOURS = int(os.getenv("GRIDPILOT_POLLER_HOURS", "48"))
+# Seconds after each 5-minute boundary to poll, giving CAISO time to publish
+PUBLISH_DELAY_SECONDS = 30
+
+_TIME_COLUMNS = ["Time", "Interval Start", "Interval End"]
+
+# name -> how to fetch and lay out each polled series. Long frames (one row per
+# interface or hub per interval) are pivoted wide on the "pivot" columns.
+POLLED_SERIES = {
+    "load": {"method": "get_load", "values": ["Load"]},
+    "fuel_mix": {"method": "get_fuel_mix", "values": None},
+    "storage": {
+        "method": "get_storage",
+        "values": ["Supply", "Stand-alone Batteries", "Hybrid Batteries"],
+    },
+    "tie_flows": {
+        "method": "get_tie_flows_real_time",
+        "pivot": ["Interface ID", "Tie Name", "From BAA", "To BAA"],
+        "values": ["MW"],
+    },
+    "hub_lmp": {
+        "method": "get_lmp",
+        "kwargs": {"market": "REAL_TIME_5_MIN", "locations": ["TH_NP15_GEN-APND", "TH_SP15_GEN-APND"]},
+        "pivot": ["Location"],
+        "values": ["LMP", "Energy", "Congestion", "Loss"],
+    },
+}
+
+
+class RingBuffer:
+    """
+    Fixed-capacity buffer of interval timestamps and float columns.
+
+    Storage is preallocated once; appends overwrite the oldest rows and only
+    intervals newer than the last stored one are accepted.
+    """
+
+    def __init__(self, columns: list[Any], capacity: int):
+        self.columns = list(columns)
+        self.capacity = capacity
+        self._times = np.zeros(capacity, dtype=np.int64)
+        self._values = np.full((capacity, len(self.columns)), np.nan)
+        self._next = 0
+        self._size = 0
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_time(self) -> int | None:
+        """Epoch nanoseconds of the newest interval, or None when empty."""
+        with self._lock:
+            if not self._size:
+                return None
+            return int(self._times[(self._next - 1) % self.capacity])
+
+    def extend(self, times: np.ndarray, values: np.ndarray) -> int:
+        """Append rows newer than the current last interval; returns how many were added."""
+        with self._lock:
+            if self._size:
+                newer = times > self._times[(self._next - 1) % self.capacity]
+                times, values = times[newer], values[newer]
+            times, values = times[-self.capacity:], values[-self.capacity:]
+            count = len(times)
+            if not count:
+                return 0
+            slots = (self._next + np.arange(count)) % self.capacity
+            self._times[slots] = times
+            self._values[slots] = values
+            self._next = (self._next + count) % self.capacity
+            self._size = min(self._size + count, self.capacity)
+            self.version += 1
+            return count
+
+    def window(self, since: int | None = None, last: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return (times, values) copies in chronological order.
+
+        Args:
+            since: Only rows at or after this epoch-nanosecond time.
+            last: Only the newest `last` rows.
+        """
+        with self._lock:
+            order = (self._next - self._size + np.arange(self._size)) % self.capacity
+            times, values = self._times[order], self._values[order]
+        if since is not None:
+            keep = times >= since
+            times, values = times[keep], values[keep]
+        if last is not None:
+            times, values = times[-last:], values[-last:]
+        return times, values
+
+    def with_columns(self, columns: list[Any]) -> "RingBuffer":
+        """Copy into a buffer with extra columns appended (new columns start as NaN)."""
+        resized = RingBuffer(columns, self.capacity)
+        times, values = self.window()
+        index = [resized.columns.index(column) for column in self.columns]
+        widened = np.full((len(times), len(resized.columns)), np.nan)
+        widened[:, index] = values
+        resized.extend(times, widened)
+        return resized
+
+
+class LatestPoller:
+    """
+    Polls CAISO "latest" series on a background thread into ring buffers.
+
+    frame() returns a DataFrame shaped like the gridstatus "latest" result for
+    the requested window, or None when the poller is not running or its data is
+    stale, in which case callers should fetch live.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        series: dict[str, dict[str, Any]] | None = None,
+        horizon_hours: int = HORIZON_HOURS,
+        max_age_seconds: float = 2 * INTERVAL_SECONDS,
+    ):
+        self._client = client
+        self._series = series if series is not None else POLLED_SERIES
+        self._capacity = horizon_hours * 3600 // INTERVAL_SECONDS
+        self._max_age = max_age_seconds
+        self._buffers: dict[str, RingBuffer] = {}
+        self._keys: dict[str, list[tuple]] = {}
+        self._refreshed_at: dict[str, float] = {}
+        self._errors: dict[str, str] = {}
+        # Last frame built per (name, since, last), reused until the buffer changes
+        self._frames: dict[tuple, tuple[int, pd.DataFrame]] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, backfill: bool = True) -> None:
+        """Start polling in a daemon thread (no-op if already running)."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, kwargs={"backfill": backfill}, name="gridpilot-poller", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, backfill: bool) -> None:
+        if backfill:
+            yesterday = (pd.Timestamp.now(tz=CAISO_TZ) - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+            self.refresh(date=yesterday)
+        while not self._stop.is_set():
+            self.refresh()
+            # Next boundary + publish delay strictly after now
+            wake_at = next_interval_boundary(time.time() - PUBLISH_DELAY_SECONDS) + PUBLISH_DELAY_SECONDS
+            self._stop.wait(wake_at - time.time())
+
+    def refresh(self, date: str = "latest") -> None:
+        """Fetch every series once for date and append new intervals to its buffer."""
+        for name, spec in self._series.items():
+            try:
+                method = getattr(self._client, spec["method"])
+                df = method(date=date, **spec.get("kwargs", {}))
+                self._ingest(name, spec, df)
+                if date == "latest":
+                    self._refreshed_at[name] = time.time()
+                self._errors.pop(name, None)
+            except Exception as e:
+                self._errors[name] = str(e)
+                logger.warning("Poller refresh of %s failed: %s", name, e)
+
+    def _ingest(self, name: str, spec: dict[str, Any], df: pd.DataFrame) -> None:
+        if df is None or df.empty:
+            return
+        pivot = spec.get("pivot")
+        value_columns = spec.get("values") or [
+            col for col in df.columns
+            if col not in _TIME_COLUMNS and pd.api.types.is_numeric_dtype(df[col])
+        ]
+
+        if pivot:
+            wide = df.pivot_table(index="Interval Start", columns=pivot, values=value_columns, aggfunc="last")
+            keys = list(self._keys.get(name, []))
+            for column in wide.columns:
+                key = tuple(column[1:])
+                if key not in keys:
+                    keys.append(key)
+            self._keys[name] = keys
+            columns = [(key, value) for key in keys for value in value_columns]
+            wide = wide.reindex(columns=[(value, *key) for key, value in columns])
+        else:
+            wide = df.drop_duplicates("Interval Start", keep="last").set_index("Interval Start")[value_columns]
+            columns = value_columns
+
+        wide = wide.sort_index()
+        times = wide.index.as_unit("ns").asi8
+        values = wide.to_numpy(dtype=float, na_value=np.nan)
+
+        buffer = self._buffers.get(name)
+        if buffer is None:
+            buffer = RingBuffer(columns, self._capacity)
+        elif buffer.columns != columns:
+            buffer = buffer.with_columns(columns)
+        buffer.extend(times, values)
+        self._buffers[name] = buffer
+
+    def is_fresh(self, name: str) -> bool:
+        refreshed_at = self._refreshed_at.get(name)
+        return (
+            self.running
+            and name in self._buffers
+            and refreshed_at is not None
+            and time.time() - refreshed_at <= self._max_age
+        )
+
+    def frame(self, name: str, since: pd.Timestamp | None = None, last: int | None = None) -> pd.DataFrame | None:
+        """
+        Rebuild a gridstatus-shaped frame for a polled series from its buffer.
+
+        Args:
+            name: Series name from POLLED_SERIES.
+            since: Only intervals starting at or after this time.
+            last: Only the newest `last` intervals.
+
+        Returns:
+            The frame, or None if the series is not being polled or is stale.
+            Frames are reused until the buffer changes and must not be mutated.
+        """
+        if not self.is_fresh(name):
+            return None
+        buffer = self._buffers[name]
+        memo_key = (name, since, last)
+        memo = self._frames.get(memo_key)
+        if memo is not None and memo[0] == buffer.version and memo[1] is not None:
+            return memo[1]
+        df = self._build_frame(name, buffer, since, last)
+        self._frames[memo_key] = (buffer.version, df)
+        return df
+
+    def _build_frame(
+        self,
+        name: str,
+        buffer: RingBuffer,
+        since: pd.Timestamp | None,
+        last: int | None,
+    ) -> pd.DataFrame | None:
+        times, values = buffer.window(
+            since=None if since is None else since.as_unit("ns").value, last=last
+        )
+        if not len(times):
+            return None
+
+        starts = pd.DatetimeIndex(times.view("datetime64[ns]"), tz="UTC").tz_convert(CAISO_TZ)
+        pivot = self._series[name].get("pivot")
+        if not pivot:
+            df = pd.DataFrame(values, columns=buffer.columns)
+            df.insert(0, "Interval End", starts + pd.Timedelta(seconds=INTERVAL_SECONDS))
+            df.insert(0, "Interval Start", starts)
+            df.insert(0, "Time", starts)
+            return df
+
+        # Long layout: one row per (interval, key), dropping keys absent at that interval
+        keys = self._keys[name]
+        value_columns = self._series[name]["values"]
+        cube = values.reshape(len(times), len(keys), len(value_columns))
+        df = pd.DataFrame(cube.reshape(-1, len(value_columns)), columns=value_columns)
+        df.insert(0, "Interval End", (starts + pd.Timedelta(seconds=INTERVAL_SECONDS)).repeat(len(keys)))
+        df.insert(0, "Interval Start", starts.repeat(len(keys)))
+        df.insert(0, "Time", df["Interval Start"])
+        for i, column in enumerate(pivot):
+            df[column] = [key[i] for key in keys] * len(times)
+        return df[df[value_columns].notna().any(axis=1)].reset_index(drop=True)
+
+    def status(self) -> dict[str, Any]:
+        """Per-series buffer size, newest interval, refresh age and last error."""
+        now = time.time()
+        result = {}
+        for name in self._series:
+            buffer = self._buffers.get(name)
+            last_time = buffer.last_time if buffer is not None else None
+            refreshed_at = self._refreshed_at.get(name)
+            result[name] = {
+                "intervals": len(buffer) if buffer is not None else 0,
+                "latest_interval": (
+                    pd.Timestamp(last_time, tz="UTC").tz_convert(CAISO_TZ).isoformat()
+                    if last_time is not None else None
+                ),
+                "age_seconds": round(now - refreshed_at, 1) if refreshed_at is not None else None,
+                "fresh": self.is_fresh(name),
+                "error": self._errors.get(name),
+            }
+        return result
@@ -0,0 +1,405 @@
+"""
+Price history tools over the local price store: percentiles from the
+incrementally maintained rollups (tools.rollups), or exact ones from a read
+of the store for a single node, and spike, regime and weather-band analytics
+run as pooled queries (tools.price_analytics).
+"""
+
+import time
+from typing import Any
+from tools.aio import async_tool
+from tools.cache import CAISO_TZ
+from tools.common import day_window, isoformat, records
+from tools.lazy import lazy_import
+from tools.price_analytics import price_analytics
+from tools.price_store import price_store
+from tools.rollups import ALL_SITES, measure_stats, quantile_by, value_stats
+from tools.weather import resolve_node, zonal_weather_history
+from tools.zonal import ZONES
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+PERCENTILE_MEASURES = ("rt_price_mwh", "da_price_mwh", "price_spread_mwh")
+MAX_HISTORY_DAYS = 3660
+MAX_SPIKES = 100
+MAX_WEATHER_PRICE_DAYS = 366
+# Default band width per zonal weather index for weather-conditioned prices
+WEATHER_PRICE_BANDS = {
+    "temperature_f": 5.0,
+    "humidity_pct": 10.0,
+    "cloud_cover_pct": 10.0,
+    "solar_radiation_wm2": 100.0,
+    "wind_speed_mph": 5.0,
+}
+
+
+def get_price_percentiles(
+    location: str,
+    price: float | None = None,
+    hour: int | None = None,
+    start_month: str | None = None,
+    end_month: str | None = None,
+    measure: str = "rt_price_mwh",
+) -> dict[str, Any]:
+    """
+    Looks up historical price percentiles for a zone, every site or a pricing
+    node from the local price history, e.g. to answer "is today's $150 spike
+    above the 95th percentile for 6 PM in SP15". Zones and all sites are read
+    from the price history rollups (sketch percentiles, within about 1%);
+    a node's history is read from the price store and its percentiles are exact.
+
+    Args:
+        location: Zone ("NP15", "SP15", "ZP26"), "ALL" for every site, or node
+            ID in the price history.
+        price: A price in $/MWh to place within the distribution. Optional.
+        hour: Hour of day (0-23, Pacific) to restrict the history to. Optional.
+        start_month: First month (YYYY-MM) of history to include. Optional.
+        end_month: Last month (YYYY-MM) of history to include. Optional.
+        measure: "rt_price_mwh", "da_price_mwh" or "price_spread_mwh" (RT - DA).
+            Defaults to "rt_price_mwh".
+
+    Returns:
+        Dictionary with count, mean, std, min, max and p50/p95/p99 over the
+        selected history, the p95 for each hour of day, and, if price is
+        given, its percentile rank and whether it is above p95/p99.
+    """
+    try:
+        started = time.perf_counter()
+        if hour is not None and not 0 <= hour <= 23:
+            return {"error": "hour must be between 0 and 23"}
+        if measure not in PERCENTILE_MEASURES:
+            return {"error": f"Unknown measure: {measure}. Use one of {list(PERCENTILE_MEASURES)}."}
+        key = location.strip().upper()
+        level = "all" if key == ALL_SITES else "zone" if key in ZONES else "node"
+        if level == "node":
+            return _node_percentiles(resolve_node(location), price, hour, start_month, end_month, measure, started)
+        rows = price_store.rollups().rows("month_hour", level, key, start_month, end_month)
+        if rows.empty:
+            return {"error": f"No price history for {location}; known zones and nodes come from the ingested price files"}
+
+        selected = rows[rows["hour"] == hour] if hour is not None else rows
+        stats = measure_stats(selected, measure)
+        sketch = stats.pop("sketch", None)
+        if not stats["count"]:
+            return {"error": f"No {measure} values for {location} at the selected hour and months"}
+
+        result = {
+            "location": key,
+            "level": level,
+            "measure": measure,
+            "hour": hour,
+            "months": {"first": selected["period"].min(), "last": selected["period"].max()},
+            "stats": stats,
+            "p95_by_hour": {int(h): p95 for h, p95 in quantile_by(rows, measure, "hour", 0.95).items()},
+        }
+        if price is not None:
+            result["price"] = _price_rank(price, sketch.rank(price), stats)
+        result["timings_ms"] = {"total": round((time.perf_counter() - started) * 1000, 1)}
+        return result
+    except Exception as e:
+        return {"error": f"Failed to look up price percentiles: {str(e)}"}
+
+
+def _price_rank(price: float, rank: float, stats: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "value": price,
+        "percentile_rank": round(100 * rank, 1),
+        "above_p95": price > stats["p95"],
+        "above_p99": price > stats["p99"],
+    }
+
+
+def _node_history(node: str, first_month: str | None, last_month: str | None) -> pd.DataFrame:
+    """A node's stored rows over whole months, with the Pacific hour of day."""
+    start = f"{first_month}-01" if first_month else None
+    end = (pd.Period(last_month, "M") + 1).strftime("%Y-%m-01") if last_month else None
+    rows = price_store.query(start, end, nodes=[node])
+    if not rows.empty:
+        rows["hour"] = rows["timestamp"].dt.tz_convert(CAISO_TZ).dt.hour
+    return rows
+
+
+def _node_percentiles(
+    node: str,
+    price: float | None,
+    hour: int | None,
+    start_month: str | None,
+    end_month: str | None,
+    measure: str,
+    started: float,
+) -> dict[str, Any]:
+    """Exact percentiles of one node's history, read from the price store."""
+    rows = _node_history(node, start_month, end_month)
+    if rows.empty:
+        return {"error": f"No price history for {node}; known zones and nodes come from the ingested price files"}
+    selected = rows[rows["hour"] == hour] if hour is not None else rows
+    values = selected[measure].to_numpy(dtype=float)
+    stats = value_stats(values)
+    if not stats["count"]:
+        return {"error": f"No {measure} values for {node} at the selected hour and months"}
+
+    months = selected["timestamp"].dt.tz_convert(CAISO_TZ).dt.strftime("%Y-%m")
+    result = {
+        "location": node,
+        "level": "node",
+        "measure": measure,
+        "hour": hour,
+        "months": {"first": months.min(), "last": months.max()},
+        "stats": stats,
+        "p95_by_hour": {int(h): round(float(p95), 2) for h, p95 in rows.groupby("hour")[measure].quantile(0.95).dropna().items()},
+    }
+    if price is not None:
+        finite = values[np.isfinite(values)]
+        result["price"] = _price_rank(price, float((finite <= price).mean()), stats)
+    result["timings_ms"] = {"total": round((time.perf_counter() - started) * 1000, 1)}
+    return result
+
+
+def _history_filters(location: str | None, start_date: str | None, end_date: str | None, max_days: int) -> dict[str, Any] | str:
+    """Filter parameters for the price analytics queries, or an error message."""
+    params: dict[str, Any] = {}
+    if location:
+        key = location.strip().upper()
+        if key in ZONES:
+            params["zone"] = key
+        else:
+            params["node"] = resolve_node(location)
+    if start_date:
+        window = day_window(start_date, end_date, max_days)
+        if isinstance(window, str):
+            return window
+        start, end = window
+        params.update(
+            start=start.to_pydatetime(),
+            end=end.to_pydatetime(),
+            first_month=start.strftime("%Y-%m"),
+            last_month=(end - pd.Timedelta(microseconds=1)).strftime("%Y-%m"),
+        )
+    elif end_date:
+        return "end_date requires start_date"
+    return params
+
+
+def _history_window(start_date: str | None, end_date: str | None) -> dict[str, str] | str:
+    return {"start": start_date, "end": end_date or start_date} if start_date else "all stored history"
+
+
+def _rounded(series: Any, digits: int = 2) -> Any:
+    # NaN (e.g. a group with no DA prices) becomes None rather than an invalid JSON number
+    return series.astype(float).round(digits).astype(object).where(series.notna(), None)
+
+
+def get_price_spikes(
+    location: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    top: int = 10,
+) -> dict[str, Any]:
+    """
+    Ranks the highest real-time price hours in the local price history of the
+    solar-plus-storage sites, with the day-ahead price and RT - DA spread of each.
+
+    Args:
+        location: Zone ("NP15", "SP15", "ZP26") or node ID to restrict to. Optional;
+            defaults to every site.
+        start_date: First day (YYYY-MM-DD, Pacific) to include. Optional; defaults
+            to all stored history.
+        end_date: Last day (YYYY-MM-DD) to include. Defaults to start_date.
+        top: Number of spikes to return (1-100). Defaults to 10.
+
+    Returns:
+        Dictionary with the spikes, highest first, each with timestamp, site,
+        zone, node, rt_price_mwh, da_price_mwh and price_spread_mwh.
+    """
+    try:
+        if not 1 <= top <= MAX_SPIKES:
+            return {"error": f"top must be between 1 and {MAX_SPIKES}"}
+        params = _history_filters(location, start_date, end_date, MAX_HISTORY_DAYS)
+        if isinstance(params, str):
+            return {"error": params}
+
+        started = time.perf_counter()
+        df, truncated = price_analytics.query("spikes", {**params, "top": top})
+        timings = {"query": round((time.perf_counter() - started) * 1000, 1)}
+        if df.empty:
+            return {"error": f"No stored prices for {location or 'any site'} in {_history_window(start_date, end_date)}"}
+
+        return {
+            "location": location.strip().upper() if location else "all sites",
+            "window": _history_window(start_date, end_date),
+            "spikes": records({
+                "timestamp": isoformat(df["timestamp"].dt.tz_convert(CAISO_TZ)),
+                "site": df["site"],
+                "zone": df["zone"],
+                "node": df["node"],
+                "rt_price_mwh": _rounded(df["rt_price_mwh"]),
+                "da_price_mwh": _rounded(df["da_price_mwh"]),
+                "price_spread_mwh": _rounded(df["price_spread_mwh"]),
+            }),
+            "truncated": truncated,
+            "timings_ms": timings,
+        }
+    except Exception as e:
+        return {"error": f"Failed to rank price spikes: {str(e)}"}
+
+
+def get_price_regimes(
+    location: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> dict[str, Any]:
+    """
+    Splits the local price history into normal, spike (above the historical
+    p95 real-time price) and extreme (above p99) hours, and compares average
+    RT/DA prices and spreads across the regimes and hours of day.
+
+    Args:
+        location: Zone ("NP15", "SP15", "ZP26") or node ID. Optional; defaults
+            to every site.
+        start_date: First day (YYYY-MM-DD, Pacific) to include. Optional; defaults
+            to all stored history.
+        end_date: Last day (YYYY-MM-DD) to include. Defaults to start_date.
+
+    Returns:
+        Dictionary with the p95/p99 thresholds (over the months the window
+        spans), per-regime hours, average RT/DA price, spread, max RT price and
+        share of hours RT cleared above DA, and per hour of day (0-23, Pacific)
+        the share of hours that were spikes.
+    """
+    try:
+        params = _history_filters(location, start_date, end_date, MAX_HISTORY_DAYS)
+        if isinstance(params, str):
+            return {"error": params}
+
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        if "node" in params:
+            history = _node_history(params["node"], params.get("first_month"), params.get("last_month"))
+            thresholds = value_stats(history["rt_price_mwh"]) if not history.empty else {"count": 0}
+        else:
+            level, key = ("zone", params["zone"]) if "zone" in params else ("all", ALL_SITES)
+            rows = price_store.rollups().rows("month_hour", level, key, params.get("first_month"), params.get("last_month"))
+            thresholds = measure_stats(rows, "rt_price_mwh") if not rows.empty else {"count": 0}
+        timings["thresholds"] = round((time.perf_counter() - started) * 1000, 1)
+        if not thresholds["count"]:
+            return {"error": f"No stored prices for {location or 'any site'} in {_history_window(start_date, end_date)}"}
+        bounds = {"p95": thresholds["p95"], "p99": thresholds["p99"]}
+
+        started = time.perf_counter()
+        regimes, _ = price_analytics.query("regimes", {**params, **bounds})
+        timings["regimes"] = round((time.perf_counter() - started) * 1000, 1)
+        started = time.perf_counter()
+        hours, _ = price_analytics.query("regime_hours", {**params, "p95": bounds["p95"]})
+        timings["hours"] = round((time.perf_counter() - started) * 1000, 1)
+
+        spike_pct = 100 * hours["spike_hours"] / hours["hours"]
+        return {
+            "location": location.strip().upper() if location else "all sites",
+            "window": _history_window(start_date, end_date),
+            "thresholds": {"p95_rt_price": bounds["p95"], "p99_rt_price": bounds["p99"]},
+            "regimes": records({
+                "regime": regimes["regime"],
+                "hours": regimes["hours"].astype(int),
+                "avg_rt_price": _rounded(regimes["avg_rt_price"]),
+                "avg_da_price": _rounded(regimes["avg_da_price"]),
+                "avg_spread": _rounded(regimes["avg_spread"]),
+                "max_rt_price": _rounded(regimes["max_rt_price"]),
+                "rt_above_da_pct": _rounded(regimes["rt_above_da_pct"], 1),
+            }),
+            "by_hour": records({
+                "hour": hours["hour"].astype(int),
+                "spike_hours": hours["spike_hours"].astype(int),
+                "spike_pct": _rounded(spike_pct, 1),
+                "avg_rt_price": _rounded(hours["avg_rt_price"]),
+            }),
+            "timings_ms": timings,
+        }
+    except Exception as e:
+        return {"error": f"Failed to analyze price regimes: {str(e)}"}
+
+
+def get_weather_conditioned_prices(
+    start_date: str,
+    end_date: str | None = None,
+    location: str | None = None,
+    weather: str = "temperature_f",
+    band: float | None = None,
+) -> dict[str, Any]:
+    """
+    Groups the local price history by the zonal weather at each hour (e.g.
+    5 degree F temperature bands) and compares RT/DA prices across the bands,
+    to answer questions like "how high do SP15 prices run above 95F".
+
+    Args:
+        start_date: First day (YYYY-MM-DD, Pacific) to include.
+        end_date: Last day (YYYY-MM-DD) to include, at most a year after
+            start_date. Defaults to start_date.
+        location: Zone ("NP15", "SP15", "ZP26") or node ID. Optional; defaults
+            to every site, each matched with its own zone's weather.
+        weather: "temperature_f", "humidity_pct", "cloud_cover_pct",
+            "solar_radiation_wm2" or "wind_speed_mph". Defaults to "temperature_f".
+        band: Band width in the weather variable's units. Defaults to 5 for
+            temperature and wind, 10 for humidity and cloud cover, 100 for
+            solar radiation.
+
+    Returns:
+        Dictionary with one entry per weather band (low/high edge), with hours,
+        average RT/DA price, spread, p95 and max RT price.
+    """
+    try:
+        if weather not in WEATHER_PRICE_BANDS:
+            return {"error": f"Unknown weather variable: {weather}. Use one of {list(WEATHER_PRICE_BANDS)}."}
+        band = band or WEATHER_PRICE_BANDS[weather]
+        if band <= 0:
+            return {"error": "band must be positive"}
+        params = _history_filters(location, start_date, end_date, MAX_WEATHER_PRICE_DAYS)
+        if isinstance(params, str):
+            return {"error": params}
+
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        first_day = pd.Timestamp(params["start"])
+        n_days = (pd.Timestamp(params["end"]) - first_day).days
+        values = zonal_weather_history(first_day, n_days, [weather], ZONES)[weather]
+        days = pd.date_range(first_day.tz_localize(None), periods=n_days, freq="D")
+        frame = pd.DataFrame({
+            "zone": np.repeat(ZONES, n_days * 24),
+            "day": np.tile(np.repeat(days.to_numpy(), 24), len(ZONES)),
+            "hour": np.tile(np.arange(24), len(ZONES) * n_days),
+            "value": values.reshape(-1),
+        })
+        timings["weather"] = round((time.perf_counter() - started) * 1000, 1)
+
+        started = time.perf_counter()
+        df, truncated = price_analytics.query("weather_bands", {**params, "band": float(band)}, frames={"_weather": frame})
+        timings["query"] = round((time.perf_counter() - started) * 1000, 1)
+        if df.empty:
+            return {"error": f"No stored prices with {weather} data for {location or 'any site'} in {_history_window(start_date, end_date)}"}
+
+        return {
+            "location": location.strip().upper() if location else "all sites",
+            "window": _history_window(start_date, end_date),
+            "weather": weather,
+            "band": band,
+            "bands": records({
+                "band_low": _rounded(df["band_low"], 1),
+                "band_high": _rounded(df["band_low"] + band, 1),
+                "hours": df["hours"].astype(int),
+                "avg_rt_price": _rounded(df["avg_rt_price"]),
+                "avg_da_price": _rounded(df["avg_da_price"]),
+                "avg_spread": _rounded(df["avg_spread"]),
+                "p95_rt_price": _rounded(df["p95_rt_price"]),
+                "max_rt_price": _rounded(df["max_rt_price"]),
+            }),
+            "truncated": truncated,
+            "timings_ms": timings,
+        }
+    except Exception as e:
+        return {"error": f"Failed to condition prices on weather: {str(e)}"}
+
+
+get_price_percentiles_async = async_tool(get_price_percentiles)
+get_price_spikes_async = async_tool(get_price_spikes)
+get_price_regimes_async = async_tool(get_price_regimes)
+get_weather_conditioned_prices_async = async_tool(get_weather_conditioned_prices)
@@ -0,0 +1,341 @@
+"""
+Partitioned, columnar store for site price history.
+Price CSVs (timestamp, prices, site, zone, node) are converted once into
+Parquet files laid out as zone=<zone>/month=<YYYY-MM>/, with site and node
+dictionary-encoded and rows sorted by node then time, so a query only opens
+the partitions its zones and time window need and skips row groups by node
+and timestamp statistics. An append-only manifest records every ingested
+file; re-ingesting a file is a no-op. Each batch is also merged into the
+rollup tables (tools.rollups) before it is recorded.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+from tools.cache import CAISO_TZ
+from tools.lazy import lazy_import
+from tools.rollups import PriceRollups
+
+duckdb = lazy_import("duckdb")
+pd = lazy_import("pandas")
+
+PRICE_STORE_PATH = os.getenv("GRIDPILOT_PRICE_STORE_PATH", os.path.join("data", "prices"))
+MANIFEST_NAME = "_manifest.jsonl"
+# The rollup database sits next to the store root (data/prices_rollups.duckdb),
+# not inside it, so the partitioned tree holds only the Parquet files and manifest
+ROLLUPS_SUFFIX = "_rollups.duckdb"
+
+# Columns every price file must have; other columns are stored as they are
+REQUIRED_COLUMNS = {"timestamp", "zone", "node"}
+UNKNOWN_ZONE = "UNKNOWN"
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _months(start: pd.Timestamp | None, end: pd.Timestamp | None) -> tuple[str | None, str | None]:
+    """Pacific month labels bounding [start, end)."""
+    first = start.tz_convert(CAISO_TZ).strftime("%Y-%m") if start is not None else None
+    last = (end - pd.Timedelta(microseconds=1)).tz_convert(CAISO_TZ).strftime("%Y-%m") if end is not None else None
+    return first, last
+
+
+def _as_timestamp(value: Any) -> pd.Timestamp | None:
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    return ts.tz_localize(CAISO_TZ) if ts.tzinfo is None else ts
+
+
+class PriceStore:
+    """
+    Hive-partitioned Parquet store of price history under `root`.
+
+    The manifest (one JSON line per ingested file) is the source of truth:
+    readers only see partitions listed there, so files from an interrupted
+    ingestion are never read.
+    """
+
+    def __init__(self, root: str = PRICE_STORE_PATH, rollups_path: str | None = None):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.rollups_path = rollups_path or os.path.normpath(root) + ROLLUPS_SUFFIX
+        self._rollups = PriceRollups(self.rollups_path)
+        self._con = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> Any:
+        if self._con is None:
+            self._con = duckdb.connect()
+            self._con.execute(f"SET TimeZone = '{CAISO_TZ}'")
+        return self._con
+
+    def manifest(self) -> list[dict[str, Any]]:
+        """Ingestion records, oldest first."""
+        if not os.path.exists(self.manifest_path):
+            return []
+        entries = []
+        with open(self.manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A crash mid-append leaves a partial last line; that batch never happened
+                    continue
+        return entries
+
+    def _append_manifest(self, entry: dict[str, Any]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def partitions(
+        self,
+        start: Any = None,
+        end: Any = None,
+        zones: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Manifest partitions whose zone and month can hold rows of [start, end)."""
+        first_month, last_month = _months(_as_timestamp(start), _as_timestamp(end))
+        zone_set = {zone.upper() for zone in zones} if zones else None
+        selected = []
+        for entry in self.manifest():
+            for part in entry["partitions"]:
+                if zone_set is not None and part["zone"] not in zone_set:
+                    continue
+                if first_month is not None and part["month"] < first_month:
+                    continue
+                if last_month is not None and part["month"] > last_month:
+                    continue
+                selected.append(part)
+        return selected
+
+    def ingest(self, path: str) -> dict[str, Any]:
+        """
+        Add a price CSV to the store.
+
+        Rows whose (node, timestamp) is already stored are skipped, so
+        overlapping exports only add their new rows; a file whose content was
+        ingested before is not read again.
+
+        Args:
+            path: CSV with at least timestamp, zone and node columns.
+
+        Returns:
+            The manifest entry (batch, source, rows, skipped_rows, partitions),
+            with "already_ingested": True if the file was seen before.
+        """
+        digest = _file_digest(path)
+        with self._lock:
+            for entry in self.manifest():
+                if entry["sha256"] == digest:
+                    return {**entry, "already_ingested": True}
+
+            con = self._connection()
+            con.execute("""
+                CREATE OR REPLACE TEMP TABLE _batch AS
+                SELECT * FROM read_csv(?, header = true)
+            """, [path])
+            try:
+                columns = {row[0] for row in con.execute("DESCRIBE _batch").fetchall()}
+                missing = REQUIRED_COLUMNS - columns
+                if missing:
+                    raise ValueError(f"{path} is missing columns: {sorted(missing)}")
+
+                con.execute(f"""
+                    CREATE OR REPLACE TEMP TABLE _rows AS
+                    SELECT
+                        * REPLACE (
+                            CAST(timestamp AS TIMESTAMPTZ) AS timestamp,
+                            coalesce(nullif(upper(trim(zone)), ''), '{UNKNOWN_ZONE}') AS zone
+                        ),
+                        strftime(CAST(timestamp AS TIMESTAMPTZ), '%Y-%m') AS "month"
+                    FROM _batch
+                    WHERE timestamp IS NOT NULL AND node IS NOT NULL
+                """)
+                total = con.execute("SELECT count(*) FROM _rows").fetchone()[0]
+                skipped = self._drop_stored_rows(con)
+
+                batch = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+                partitions = self._write(con, batch)
+                # Only the rows just written, so nothing is counted twice
+                self._rollups.update(con.execute('SELECT * EXCLUDE ("month") FROM _rows').df(), batch)
+            finally:
+                con.execute("DROP TABLE IF EXISTS _batch")
+                con.execute("DROP TABLE IF EXISTS _rows")
+
+            entry = {
+                "batch": batch,
+                "source": os.path.abspath(path),
+                "sha256": digest,
+                "ingested_at": datetime.now(timezone.utc).isoformat(),
+                "rows": total - skipped,
+                "skipped_rows": skipped,
+                "partitions": partitions,
+            }
+            self._append_manifest(entry)
+            return entry
+
+    def rollups(self) -> PriceRollups:
+        """
+        The rollup tables, rebuilt from the stored files first if they do not
+        cover exactly the batches in the manifest (e.g. after a crash between
+        updating them and recording the batch).
+        """
+        with self._lock:
+            entries = self.manifest()
+            if self._rollups.applied_batches() != {entry["batch"] for entry in entries}:
+                self._rollups.reset()
+                con = self._connection()
+                for entry in entries:
+                    files = [os.path.join(self.root, file) for part in entry["partitions"] for file in part["files"]]
+                    rows = con.execute(
+                        "SELECT * EXCLUDE (\"month\") FROM read_parquet(?, hive_partitioning = true, union_by_name = true, "
+                        "hive_types = {'zone': VARCHAR, 'month': VARCHAR})",
+                        [files],
+                    ).df() if files else pd.DataFrame()
+                    self._rollups.update(rows, entry["batch"])
+            return self._rollups
+
+    def _drop_stored_rows(self, con: Any) -> int:
+        """Delete rows of _rows already present in the partitions they would land in."""
+        spans = set(con.execute('SELECT DISTINCT zone, "month" FROM _rows').fetchall())
+        files = [
+            os.path.join(self.root, file)
+            for part in self.partitions()
+            if (part["zone"], part["month"]) in spans
+            for file in part["files"]
+        ]
+        if not files:
+            return 0
+        return con.execute(
+            """
+            DELETE FROM _rows WHERE (node, timestamp) IN (
+                SELECT (node, timestamp) FROM read_parquet(?, union_by_name = true)
+            )
+            """,
+            [files],
+        ).fetchone()[0]
+
+    def _write(self, con: Any, batch: str) -> list[dict[str, Any]]:
+        """Write _rows as new Parquet files under its zone/month partitions."""
+        if not con.execute("SELECT count(*) FROM _rows").fetchone()[0]:
+            return []
+        stats = con.execute("""
+            SELECT zone, "month", count(*), min(timestamp), max(timestamp)
+            FROM _rows GROUP BY ALL
+        """).fetchall()
+        root = self.root.replace("'", "''")
+        # Sorted by node then time so row-group min/max statistics prune node lookups
+        written = con.execute(f"""
+            COPY (SELECT * FROM _rows ORDER BY zone, "month", node, timestamp)
+            TO '{root}' (
+                FORMAT parquet,
+                COMPRESSION zstd,
+                PARTITION_BY (zone, "month"),
+                FILENAME_PATTERN 'part-{batch}-{{uuid}}',
+                APPEND,
+                RETURN_FILES
+            )
+        """).fetchone()[1]
+
+        files: dict[tuple[str, str], list[str]] = {}
+        for file in written:
+            relative = os.path.relpath(file, self.root)
+            zone_dir, month_dir = relative.split(os.sep)[:2]
+            files.setdefault((zone_dir.split("=", 1)[1], month_dir.split("=", 1)[1]), []).append(relative)
+        return [
+            {
+                "zone": zone,
+                "month": month,
+                "rows": rows,
+                "start": first.isoformat(),
+                "end": last.isoformat(),
+                "files": files.get((zone, month), []),
+            }
+            for zone, month, rows, first, last in sorted(stats)
+        ]
+
+    def scan_sql(
+        self,
+        start: Any = None,
+        end: Any = None,
+        nodes: list[str] | None = None,
+        zones: list[str] | None = None,
+    ) -> tuple[str, list[Any]] | None:
+        """
+        SQL (and parameters) selecting stored rows in [start, end) for the
+        given nodes and zones, over only the partitions that can match.
+        None when no partition does.
+        """
+        start, end = _as_timestamp(start), _as_timestamp(end)
+        parts = self.partitions(start, end, zones)
+        if not parts:
+            return None
+        files = [os.path.join(self.root, file) for part in parts for file in part["files"]]
+        conditions, params = [], [files]
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start.to_pydatetime())
+        if end is not None:
+            conditions.append("timestamp < ?")
+            params.append(end.to_pydatetime())
+        if nodes:
+            # An IN list (not list_contains) so the filter reaches the Parquet reader
+            conditions.append(f"node IN ({', '.join('?' * len(nodes))})")
+            params.extend(nodes)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = (
+            "SELECT * FROM read_parquet(?, hive_partitioning = true, union_by_name = true, "
+            "hive_types = {'zone': VARCHAR, 'month': VARCHAR}) "
+            f"{where}"
+        )
+        return sql, params
+
+    def query(
+        self,
+        start: Any = None,
+        end: Any = None,
+        nodes: list[str] | None = None,
+        zones: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Stored rows in [start, end) for the given nodes and zones, ordered by
+        node and time. Naive start/end are taken as Pacific time.
+        """
+        scan = self.scan_sql(start, end, nodes, zones)
+        if scan is None:
+            return pd.DataFrame()
+        sql, params = scan
+        with self._lock:
+            return self._connection().execute(
+                f'SELECT * EXCLUDE ("month") FROM ({sql}) ORDER BY node, timestamp', params
+            ).df()
+
+    def create_view(self, con: Any, name: str = "prices") -> None:
+        """Create (or replace) a view over every stored partition on a DuckDB connection."""
+        files = [os.path.join(self.root, file) for part in self.partitions() for file in part["files"]]
+        if not files:
+            raise ValueError(f"No price data in {self.root}; ingest a CSV first")
+        listed = ", ".join("'" + file.replace("'", "''") + "'" for file in files)
+        con.execute(
+            f'CREATE OR REPLACE VIEW "{name}" AS SELECT * FROM read_parquet([{listed}], '
+            "hive_partitioning = true, union_by_name = true, "
+            "hive_types = {'zone': VARCHAR, 'month': VARCHAR})"
+        )
+
+
+price_store = PriceStore()
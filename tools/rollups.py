@@ -0,0 +1,367 @@
+"""
+Incrementally maintained rollups of price history.
+Every ingested batch of price rows is reduced to aggregates at three grains -
+hourly, daily and month x hour-of-day per zone, and month x hour over all
+sites - and merged into DuckDB tables: counts, sums, sums of squares, min
+and max for every numeric column (prices, spreads, any weather columns),
+plus quantile sketches of the $/MWh columns at the month x hour grain.
+Merging a batch only touches the groups it contains, so percentiles over
+years of history come from a few rows rather than a scan. A single node's
+month x hour holds about 30 values, as many as a sketch of them would, so
+nodes are not rolled up: their history is one Parquet-pruned read of the
+store (see value_stats).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any
+from tools.cache import CAISO_TZ
+from tools.lazy import lazy_import
+from tools.sketch import QuantileSketch, group_sketches, merge_serialized
+
+duckdb = lazy_import("duckdb")
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# grain -> (period label format, whether rows are also split by hour of day, levels)
+# Without sketches, every site's counts, sums and extremes are those of its
+# zones combined, so only the sketched grain keeps an "all" level
+ROLLUP_GRAINS = {
+    "hourly": ("%Y-%m-%dT%H", False, ("zone",)),
+    "daily": ("%Y-%m-%d", False, ("zone",)),
+    "month_hour": ("%Y-%m", True, ("zone", "all")),
+}
+# Grains that keep quantile sketches. An hourly group holds one value per
+# site, too few for a sketch to be smaller than the values, and a zone's day
+# sketch costs about 2 KB per measure, two thirds of the file, for
+# percentiles nothing reads
+SKETCHED = {"month_hour"}
+# Key of the "all" level's rows
+ALL_SITES = "ALL"
+KEY_COLUMNS = ["level", "key", "period", "hour"]
+# Storage block size of the rollup database. The tables are a few MB, and with
+# DuckDB's default 256 KB blocks two months of one site took 1.6 MB (0.55 MB
+# with 16 KB blocks)
+BLOCK_SIZE = 16384
+# Bumped when the grains, levels or columns change; an older database is
+# emptied on open and rebuilt from the store
+ROLLUP_VERSION = 2
+PERCENTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+
+def is_sketched(measure: str) -> bool:
+    """Price-like ($/MWh) columns get percentiles; others only means and extremes."""
+    return measure.endswith("_mwh")
+
+
+def _period_ids(wall: pd.Series, grain: str) -> np.ndarray:
+    """Integer id of each row's period (wall-clock hour, day or month)."""
+    if grain == "month_hour":
+        return (wall.dt.year * 12 + wall.dt.month - 1).to_numpy(dtype=np.int64)
+    ns = wall.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    return ns // (3_600_000_000_000 if grain == "hourly" else 86_400_000_000_000)
+
+
+def _period_labels(ids: np.ndarray, grain: str) -> np.ndarray:
+    # Format each distinct period once; a batch has far fewer periods than groups
+    distinct, inverse = np.unique(ids, return_inverse=True)
+    if grain == "month_hour":
+        labels = [f"{i // 12:04d}-{i % 12 + 1:02d}" for i in distinct.tolist()]
+    else:
+        unit = 3_600_000_000_000 if grain == "hourly" else 86_400_000_000_000
+        labels = pd.to_datetime(distinct * unit).strftime(ROLLUP_GRAINS[grain][0]).tolist()
+    return np.asarray(labels, dtype=object)[inverse]
+
+
+def aggregate(rows: pd.DataFrame, grain: str, level: str, measures: list[str]) -> pd.DataFrame:
+    """
+    Partial rollup of rows at one grain and level: one row per (key, period,
+    hour) with <measure>_count/_sum/_sumsq/_min/_max and, for sketched
+    measures at SKETCHED grains, a serialized <measure>_sketch.
+    """
+    wall = rows["timestamp"].dt.tz_convert(CAISO_TZ).dt.tz_localize(None)
+    key_codes, key_values = pd.factorize(rows[level] if level != "all" else np.full(len(rows), ALL_SITES, dtype=object))
+    periods = _period_ids(wall, grain)
+    by_hour = ROLLUP_GRAINS[grain][1]
+    hours = wall.dt.hour.to_numpy(dtype=np.int64) if by_hour else np.zeros(len(rows), dtype=np.int64)
+    first_period = periods.min() if len(periods) else 0
+    # One int64 label per (key, period, hour)
+    labels = (key_codes.astype(np.int64) << 32) | ((periods - first_period) << 5) | hours
+    groups, uniques = pd.factorize(labels)
+    n_groups = len(uniques)
+
+    partial = pd.DataFrame({
+        "level": level,
+        "key": np.asarray(key_values, dtype=object)[uniques >> 32],
+        "period": _period_labels(((uniques >> 5) & 0x7FFFFFF) + first_period, grain),
+        "hour": ((uniques & 31) if by_hour else np.full(n_groups, -1)).astype(np.int16),
+    })
+    order = np.argsort(groups, kind="stable")
+    starts = np.searchsorted(groups[order], np.arange(n_groups))
+    for measure in measures:
+        values = rows[measure].to_numpy(dtype=float)
+        present = np.isfinite(values)
+        filled = np.where(present, values, 0.0)
+        partial[f"{measure}_count"] = np.bincount(groups, weights=present, minlength=n_groups).astype(np.int64)
+        partial[f"{measure}_sum"] = np.bincount(groups, weights=filled, minlength=n_groups)
+        partial[f"{measure}_sumsq"] = np.bincount(groups, weights=filled * filled, minlength=n_groups)
+        ordered = values[order]
+        partial[f"{measure}_min"] = np.fmin.reduceat(ordered, starts) if n_groups else np.zeros(0)
+        partial[f"{measure}_max"] = np.fmax.reduceat(ordered, starts) if n_groups else np.zeros(0)
+        if grain in SKETCHED and is_sketched(measure):
+            partial[f"{measure}_sketch"] = group_sketches(groups, values, n_groups)
+    return partial
+
+
+def _combine(partial: pd.DataFrame, existing: pd.DataFrame) -> pd.DataFrame:
+    """Merge stored rows into the partial rollup rows with the same keys."""
+    combined = partial.set_index(KEY_COLUMNS)
+    stored = existing.set_index(KEY_COLUMNS).reindex(combined.index)
+    for column in stored.columns:
+        if column not in combined:
+            combined[column] = stored[column]
+            continue
+        new, old = combined[column], stored[column]
+        if column.endswith(("_count", "_sum", "_sumsq")):
+            combined[column] = (new.fillna(0) + old.fillna(0)).astype(new.dtype)
+        elif column.endswith("_min"):
+            combined[column] = np.fmin(new, old)
+        elif column.endswith("_max"):
+            combined[column] = np.fmax(new, old)
+        elif column.endswith("_sketch"):
+            merged = new.astype(object)
+            both = (old.notna() & new.notna()).to_numpy()
+            merged[both] = merge_serialized(new[both].tolist(), old[both].tolist())
+            combined[column] = merged.where(new.notna(), old)
+    return combined.reset_index()
+
+
+def merged_sketch(blobs: list[Any]) -> QuantileSketch:
+    """Merge serialized sketches, skipping missing ones."""
+    return QuantileSketch.merge_all([QuantileSketch.from_bytes(data) for data in blobs if data is not None and data == data])
+
+
+def quantile_by(rows: pd.DataFrame, measure: str, column: str, q: float) -> dict[Any, float | None]:
+    """Quantile q of a sketched measure for each value of a key column (e.g. hour)."""
+    labels = rows[column].tolist()
+    blobs = rows[f"{measure}_sketch"].tolist()
+    grouped: dict[Any, list[Any]] = {}
+    for label, data in zip(labels, blobs):
+        grouped.setdefault(label, []).append(data)
+    result = {}
+    for label in sorted(grouped):
+        value = merged_sketch(grouped[label]).quantile(q)
+        result[label] = None if value is None else round(value, 2)
+    return result
+
+
+def measure_stats(rows: pd.DataFrame, measure: str) -> dict[str, Any]:
+    """Combine a measure's rollup rows into count, mean, std, min, max and percentiles."""
+    count = int(rows[f"{measure}_count"].sum())
+    if not count:
+        return {"count": 0}
+    total, squares = rows[f"{measure}_sum"].sum(), rows[f"{measure}_sumsq"].sum()
+    mean = total / count
+    stats = {
+        "count": count,
+        "mean": round(float(mean), 2),
+        "std": round(float(np.sqrt(max(squares / count - mean * mean, 0.0))), 2),
+        "min": round(float(rows[f"{measure}_min"].min()), 2),
+        "max": round(float(rows[f"{measure}_max"].max()), 2),
+    }
+    if f"{measure}_sketch" in rows:
+        sketch = merged_sketch(rows[f"{measure}_sketch"].tolist())
+        # A bucket's representative value can fall just outside the observed range
+        stats.update({
+            name: None if value is None else round(min(max(value, stats["min"]), stats["max"]), 2)
+            for name, value in zip(PERCENTILES, sketch.quantiles(list(PERCENTILES.values())))
+        })
+        stats["sketch"] = sketch
+    return stats
+
+
+def value_stats(values: np.ndarray) -> dict[str, Any]:
+    """
+    Exact count, mean, std, min, max and percentiles of raw values, in the
+    shape measure_stats returns; used for node history read from the store.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {"count": 0}
+    stats = {
+        "count": int(len(values)),
+        "mean": round(float(values.mean()), 2),
+        "std": round(float(values.std()), 2),
+        "min": round(float(values.min()), 2),
+        "max": round(float(values.max()), 2),
+    }
+    quantiles = np.quantile(values, list(PERCENTILES.values()))
+    stats.update({name: round(float(value), 2) for name, value in zip(PERCENTILES, quantiles)})
+    return stats
+
+
+class PriceRollups:
+    """
+    DuckDB file of rollup tables (rollup_<grain>) plus the batches merged
+    into them, so they can be checked against the price store's manifest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._con = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> Any:
+        if self._con is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            con = duckdb.connect()
+            if self.path != ":memory:":
+                quoted = self.path.replace("'", "''")
+                attach = f"ATTACH '{quoted}' AS rollups (BLOCK_SIZE {BLOCK_SIZE})"
+                try:
+                    con.execute(attach)
+                except duckdb.InvalidInputException:
+                    # A database written with another block size; the rollups
+                    # are rebuilt from the store, so start a new file
+                    for stale in (self.path, self.path + ".wal"):
+                        if os.path.exists(stale):
+                            os.remove(stale)
+                    con.execute(attach)
+                con.execute("USE rollups")
+            con.execute("CREATE TABLE IF NOT EXISTS _applied (batch VARCHAR PRIMARY KEY)")
+            con.execute("CREATE TABLE IF NOT EXISTS _version (version INTEGER)")
+            if con.execute("SELECT max(version) FROM _version").fetchone()[0] != ROLLUP_VERSION:
+                self._drop_tables(con)
+                con.execute("DELETE FROM _version")
+                con.execute("INSERT INTO _version VALUES (?)", [ROLLUP_VERSION])
+            self._con = con
+        return self._con
+
+    @staticmethod
+    def _drop_tables(con: Any) -> None:
+        for (table,) in con.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_name LIKE 'rollup_%'"
+        ).fetchall():
+            con.execute(f'DROP TABLE "{table}"')
+        con.execute("DELETE FROM _applied")
+
+    def applied_batches(self) -> set[str]:
+        with self._lock:
+            return {row[0] for row in self._connection().execute("SELECT batch FROM _applied").fetchall()}
+
+    def update(self, rows: pd.DataFrame, batch: str) -> None:
+        """
+        Merge a batch of new price rows (timestamp, node, zone and numeric
+        columns) into every rollup table, in one transaction.
+        """
+        measures = [
+            column for column in rows.columns
+            if column not in ("timestamp", "month", "hour") and pd.api.types.is_numeric_dtype(rows[column])
+        ]
+        partials = {
+            grain: pd.concat([aggregate(rows, grain, level, measures) for level in levels], ignore_index=True)
+            for grain, (_, _, levels) in ROLLUP_GRAINS.items()
+        } if len(rows) else {}
+
+        with self._lock:
+            con = self._connection()
+            con.execute("BEGIN TRANSACTION")
+            try:
+                for grain, partial in partials.items():
+                    self._merge(con, f"rollup_{grain}", partial)
+                con.execute("INSERT OR IGNORE INTO _applied VALUES (?)", [batch])
+                con.execute("COMMIT")
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+            # Compact the merged groups into the file now rather than letting
+            # the write-ahead log grow to the checkpoint threshold
+            con.execute("CHECKPOINT")
+
+    def _merge(self, con: Any, table: str, partial: pd.DataFrame) -> None:
+        con.register("_partial", partial)
+        try:
+            con.execute(f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM _partial LIMIT 0")
+            # A batch with new numeric columns widens the table rather than failing
+            existing_columns = {row[0] for row in con.execute(f"DESCRIBE {table}").fetchall()}
+            for column, column_type, *_ in con.execute("DESCRIBE _partial").fetchall():
+                if column not in existing_columns:
+                    con.execute(f'ALTER TABLE {table} ADD COLUMN "{column}" {column_type}')
+            match = " AND ".join(f"t.{column} = p.{column}" for column in KEY_COLUMNS)
+            existing = con.execute(f"SELECT t.* FROM {table} t JOIN _partial p ON {match}").df()
+        finally:
+            con.unregister("_partial")
+
+        combined = _combine(partial, existing) if len(existing) else partial
+        con.register("_combined", combined)
+        try:
+            if len(existing):
+                con.execute(f"DELETE FROM {table} t USING _combined p WHERE {match}")
+            con.execute(f"INSERT INTO {table} BY NAME SELECT * FROM _combined")
+        finally:
+            con.unregister("_combined")
+
+    def reset(self) -> None:
+        """Drop every rollup table and the applied-batch log."""
+        with self._lock:
+            self._drop_tables(self._connection())
+
+    def rows(
+        self,
+        grain: str,
+        level: str | None = None,
+        key: str | None = None,
+        first_period: str | None = None,
+        last_period: str | None = None,
+        hours: list[int] | None = None,
+    ) -> pd.DataFrame:
+        """Rollup rows of a grain, filtered by level, key, period range and hours of day."""
+        if grain not in ROLLUP_GRAINS:
+            raise ValueError(f"Unknown grain {grain}; use one of {list(ROLLUP_GRAINS)}")
+        conditions, params = [], []
+        for column, value in (("level", level), ("key", key)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if first_period is not None:
+            conditions.append("period >= ?")
+            params.append(first_period)
+        if last_period is not None:
+            conditions.append("period <= ?")
+            params.append(last_period)
+        if hours:
+            conditions.append(f"hour IN ({', '.join('?' * len(hours))})")
+            params.extend(int(hour) for hour in hours)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            con = self._connection()
+            exists = con.execute(
+                "SELECT 1 FROM information_schema.tables WHERE table_name = ?", [f"rollup_{grain}"]
+            ).fetchone()
+            if not exists:
+                return pd.DataFrame(columns=KEY_COLUMNS)
+            return con.execute(f"SELECT * FROM rollup_{grain} {where} ORDER BY level, key, period, hour", params).df()
+
+    def frame(self, grain: str, level: str, measures: list[str] | None = None, **filters: Any) -> pd.DataFrame:
+        """
+        Readable rollup: one row per (key, period, hour) with count, mean,
+        min, max and, where sketched, p50/p95/p99 per measure.
+        """
+        rows = self.rows(grain, level, **filters)
+        measures = measures or [column[:-len("_count")] for column in rows.columns if column.endswith("_count")]
+        out = rows[KEY_COLUMNS[1:]].copy()
+        for measure in measures:
+            count = rows[f"{measure}_count"]
+            out[f"{measure}_count"] = count
+            out[f"{measure}_mean"] = (rows[f"{measure}_sum"] / count.where(count > 0)).round(2)
+            out[f"{measure}_min"] = rows[f"{measure}_min"].round(2)
+            out[f"{measure}_max"] = rows[f"{measure}_max"].round(2)
+            if f"{measure}_sketch" in rows:
+                quantiles = [QuantileSketch.from_bytes(data).quantiles(list(PERCENTILES.values())) for data in rows[f"{measure}_sketch"].tolist()]
+                for j, name in enumerate(PERCENTILES):
+                    out[f"{measure}_{name}"] = [None if q[j] is None else round(q[j], 2) for q in quantiles]
+        return out
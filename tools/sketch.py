@@ -0,0 +1,160 @@
+"""
+Mergeable quantile sketches with relative-error guarantees (DDSketch-style).
+Values are counted in logarithmic buckets, so any quantile comes back within
+SKETCH_ALPHA relative error, two sketches merge by adding bucket counts, and
+a sketch of prices between $1 and $10,000 holds at most a few hundred buckets
+whatever the number of values. Negative prices get their own buckets.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+from tools.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+SKETCH_ALPHA = 0.01
+# Magnitudes below this are counted as zero
+MIN_MAGNITUDE = 1e-6
+# Bucket code of zero; other codes are 2 * key + (1 if negative)
+ZERO_CODE = -(2 ** 31)
+# Serialized sketches are (code, count) int32 pairs: codes of any price stay
+# within a few thousand of zero, and no stored group has 2**31 values
+_WIRE = "<i4"
+_PAIR_BYTES = 8
+
+
+def _gamma(alpha: float) -> float:
+    return (1 + alpha) / (1 - alpha)
+
+
+def bucket_codes(values: np.ndarray, alpha: float = SKETCH_ALPHA) -> np.ndarray:
+    """Bucket code of each (finite) value."""
+    magnitude = np.abs(values)
+    zero = magnitude < MIN_MAGNITUDE
+    keys = np.ceil(np.log(np.where(zero, 1.0, magnitude)) / math.log(_gamma(alpha))).astype(np.int64)
+    return np.where(zero, ZERO_CODE, 2 * keys + (values < 0))
+
+
+def bucket_values(codes: np.ndarray, alpha: float = SKETCH_ALPHA) -> np.ndarray:
+    """Representative value of each bucket code (within alpha of every value in it)."""
+    gamma = _gamma(alpha)
+    keys = codes >> 1
+    magnitude = 2 * np.power(gamma, keys.astype(float)) / (gamma + 1)
+    return np.where(codes == ZERO_CODE, 0.0, np.where(codes & 1, -magnitude, magnitude))
+
+
+class QuantileSketch:
+    """
+    Bucket counts of a set of values.
+
+    Args:
+        codes: Sorted unique bucket codes.
+        counts: Count per code.
+        alpha: Relative accuracy the codes were built with.
+    """
+
+    __slots__ = ("codes", "counts", "alpha")
+
+    def __init__(self, codes: np.ndarray | None = None, counts: np.ndarray | None = None, alpha: float = SKETCH_ALPHA):
+        self.codes = codes if codes is not None else np.zeros(0, dtype=np.int64)
+        self.counts = counts if counts is not None else np.zeros(0, dtype=np.int64)
+        self.alpha = alpha
+
+    @classmethod
+    def from_values(cls, values: Any, alpha: float = SKETCH_ALPHA) -> QuantileSketch:
+        values = np.asarray(values, dtype=float)
+        codes, counts = np.unique(bucket_codes(values[np.isfinite(values)], alpha), return_counts=True)
+        return cls(codes, counts.astype(np.int64), alpha)
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def merge(self, other: QuantileSketch) -> QuantileSketch:
+        """A new sketch of both sets of values."""
+        return QuantileSketch.merge_all([self, other], self.alpha)
+
+    @classmethod
+    def merge_all(cls, sketches: list[QuantileSketch], alpha: float = SKETCH_ALPHA) -> QuantileSketch:
+        """One sketch of every sketch's values, merged in a single pass."""
+        if any(sketch.alpha != alpha for sketch in sketches):
+            raise ValueError("Cannot merge sketches built with different accuracy")
+        if not sketches:
+            return cls(alpha=alpha)
+        codes, inverse = np.unique(np.concatenate([sketch.codes for sketch in sketches]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([sketch.counts for sketch in sketches]), minlength=len(codes))
+        return cls(codes, counts.astype(np.int64), alpha)
+
+    def _ordered(self) -> tuple[np.ndarray, np.ndarray]:
+        """Bucket values ascending with their cumulative counts."""
+        values = bucket_values(self.codes, self.alpha)
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(self.counts[order])
+
+    def quantiles(self, qs: list[float]) -> list[float | None]:
+        """Values at the given quantiles (0..1); None for an empty sketch."""
+        if not self.count:
+            return [None for _ in qs]
+        values, cumulative = self._ordered()
+        ranks = np.clip(np.asarray(qs, dtype=float), 0, 1) * (cumulative[-1] - 1)
+        return values[np.searchsorted(cumulative, ranks, side="right")].tolist()
+
+    def quantile(self, q: float) -> float | None:
+        return self.quantiles([q])[0]
+
+    def rank(self, value: float) -> float | None:
+        """Share of values at or below value (0..1); None for an empty sketch."""
+        if not self.count:
+            return None
+        values, cumulative = self._ordered()
+        below = np.searchsorted(values, value, side="right")
+        return float(cumulative[below - 1] / cumulative[-1]) if below else 0.0
+
+    def to_bytes(self) -> bytes:
+        return np.column_stack([self.codes, self.counts]).astype(_WIRE).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes | None, alpha: float = SKETCH_ALPHA) -> QuantileSketch:
+        if not data:
+            return cls(alpha=alpha)
+        pairs = np.frombuffer(data, dtype=_WIRE).reshape(-1, 2).astype(np.int64)
+        return cls(pairs[:, 0], pairs[:, 1], alpha)
+
+
+def _pack_groups(groups: np.ndarray, codes: np.ndarray, counts: np.ndarray, n_groups: int) -> list[bytes]:
+    """Serialized sketch per group label from (group, code, count) triples, one sort for all groups."""
+    order = np.lexsort((codes, groups))
+    groups, codes, counts = groups[order], codes[order], counts[order]
+    # Runs of equal (group, code) become one bucket
+    starts = np.flatnonzero(np.r_[True, (groups[1:] != groups[:-1]) | (codes[1:] != codes[:-1])]) if len(groups) else np.zeros(0, dtype=int)
+    totals = np.add.reduceat(counts, starts) if len(starts) else np.zeros(0, dtype=np.int64)
+    pairs = np.column_stack([codes[starts], totals]).astype(_WIRE)
+    bounds = np.searchsorted(groups[starts], np.arange(n_groups + 1))
+    return [pairs[bounds[g]:bounds[g + 1]].tobytes() for g in range(n_groups)]
+
+
+def group_sketches(groups: np.ndarray, values: np.ndarray, n_groups: int, alpha: float = SKETCH_ALPHA) -> list[bytes]:
+    """
+    Serialized sketch of the values of each group label (0..n_groups-1),
+    built with one sort over all values rather than one sketch at a time.
+    """
+    finite = np.isfinite(values)
+    codes = bucket_codes(values[finite], alpha)
+    return _pack_groups(groups[finite], codes, np.ones(len(codes), dtype=np.int64), n_groups)
+
+
+def merge_serialized(*columns: list[Any]) -> list[bytes]:
+    """
+    Row-wise merge of equally long lists of serialized sketches (None or NaN
+    where a row has none): element i of the result merges element i of each list.
+    """
+    n_rows = len(columns[0]) if columns else 0
+    # DuckDB returns BLOB columns as bytearray
+    blobs = [bytes(data) if isinstance(data, (bytes, bytearray)) else b"" for column in columns for data in column]
+    # One buffer of every (code, count) pair, labelled with its row
+    pairs = np.frombuffer(b"".join(blobs), dtype=_WIRE).reshape(-1, 2).astype(np.int64)
+    rows = np.tile(np.arange(n_rows, dtype=np.int64), len(columns))
+    groups = np.repeat(rows, [len(data) // _PAIR_BYTES for data in blobs])
+    return _pack_groups(groups, pairs[:, 0], pairs[:, 1], n_rows)
@@ -0,0 +1,272 @@
+"""
+Incremental local time-series store for CAISO datasets.
+Settled historical days never change, so they are fetched from OASIS once,
+upserted into a local DuckDB file and served from disk afterwards. Some
+datasets are published a day or more late, so only days older than a
+settlement lag are stored, and a day counts as stored only once it has rows.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import os
+import threading
+from typing import Any, Callable
+from tools.cache import CAISO_TZ, SETTLEMENT_LAG_DAYS, to_caiso_timestamp, bind_arguments, settled_cutoff
+from tools.fetch import range_fetcher, stitch
+from tools.lazy import lazy_import
+
+duckdb = lazy_import("duckdb")
+pd = lazy_import("pandas")
+
+STORE_PATH = os.getenv("GRIDPILOT_STORE_PATH", os.path.join("data", "caiso_store.duckdb"))
+
+# gridstatus method -> table name for the datasets kept on disk
+STORED_METHODS = {
+    "get_load": "load",
+    "get_fuel_mix": "fuel_mix",
+    "get_renewables_hourly": "renewables",
+    "get_storage": "storage",
+    "get_tie_flows_real_time": "tie_flows",
+    "get_curtailment": "curtailment",
+    "get_lmp": "lmp",
+}
+
+# Arguments that select the time window or control transport, not the dataset
+_WINDOW_ARGS = {"date", "start", "end", "verbose", "sleep"}
+
+
+def _params_key(arguments: dict[str, Any]) -> str:
+    """Serialize the dataset-selecting arguments (market, locations, ...) into a stable key."""
+    params = {}
+    for name, value in arguments.items():
+        if name in _WINDOW_ARGS:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(value)
+        params[name] = value
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _day_runs(days: list[pd.Timestamp]) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+    """Group sorted days into contiguous [start, end) runs."""
+    runs = []
+    for day in days:
+        if runs and runs[-1][1] == day:
+            runs[-1] = (runs[-1][0], day + pd.Timedelta(days=1))
+        else:
+            runs.append((day, day + pd.Timedelta(days=1)))
+    return runs
+
+
+class TimeSeriesStore:
+    """
+    DuckDB-backed store of CAISO frames, one table per dataset.
+
+    Each row is tagged with the dataset parameters (_params) and the Pacific
+    trading day it belongs to (_day). A coverage table records which settled
+    days have been stored, so only missing days go back to OASIS. A day the
+    source returned no rows for is not covered and is asked for again.
+    """
+
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._con = duckdb.connect(path)
+        self._con.execute(f"SET TimeZone = '{CAISO_TZ}'")
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS _coverage (
+                dataset VARCHAR,
+                params VARCHAR,
+                day DATE,
+                fetched_at TIMESTAMPTZ DEFAULT current_timestamp,
+                PRIMARY KEY (dataset, params, day)
+            )
+        """)
+        self._lock = threading.Lock()
+
+    def missing_days(self, dataset: str, params: str, start: pd.Timestamp, end: pd.Timestamp) -> list[pd.Timestamp]:
+        """Return the days in [start, end) with no stored coverage."""
+        days = pd.date_range(start, end, freq="D", inclusive="left")
+        if days.empty:
+            return []
+        with self._lock:
+            if not self._has_table(dataset):
+                return list(days)
+            # Only days with stored rows count; stores written before empty
+            # fetches stopped being recorded may list days that have none
+            covered = {
+                row[0] for row in self._con.execute(
+                    f"""
+                    SELECT c.day FROM _coverage c
+                    WHERE c.dataset = ? AND c.params = ? AND c.day >= ? AND c.day < ?
+                      AND EXISTS (SELECT 1 FROM "{dataset}" t WHERE t._params = c.params AND t._day = c.day)
+                    """,
+                    [dataset, params, start.date(), end.date()],
+                ).fetchall()
+            }
+        return [day for day in days if day.date() not in covered]
+
+    def upsert(self, dataset: str, params: str, days: list[pd.Timestamp], df: pd.DataFrame) -> None:
+        """
+        Replace the stored rows of the days df has rows for and mark those
+        days covered. Days in `days` with no rows in df are left as they were,
+        so they are fetched again next time. Re-running with the same frame
+        leaves the store unchanged.
+        """
+        if not days or df.empty:
+            return
+        row_days = set(df["Interval Start"].dt.tz_convert(CAISO_TZ).dt.date)
+        day_values = [day.date() for day in days if day.date() in row_days]
+        if not day_values:
+            return
+        table = f'"{dataset}"'
+
+        with self._lock:
+            self._con.execute("BEGIN TRANSACTION")
+            try:
+                self._insert_frame(table, params, day_values, df)
+                self._con.executemany(
+                    "INSERT OR REPLACE INTO _coverage (dataset, params, day) VALUES (?, ?, ?)",
+                    [[dataset, params, day] for day in day_values],
+                )
+                self._con.execute("COMMIT")
+            except Exception:
+                self._con.execute("ROLLBACK")
+                raise
+
+    def _has_table(self, dataset: str) -> bool:
+        return bool(self._con.execute(
+            "SELECT 1 FROM information_schema.tables WHERE table_name = ?", [dataset]
+        ).fetchone())
+
+    def _delete_days(self, table: str, params: str, day_values: list) -> None:
+        self._con.execute(
+            f"DELETE FROM {table} WHERE _params = ? AND list_contains(?::DATE[], _day)",
+            [params, day_values],
+        )
+
+    def _insert_frame(self, table: str, params: str, day_values: list, df: pd.DataFrame) -> None:
+        frame = df.copy()
+        frame["_params"] = params
+        frame["_day"] = frame["Interval Start"].dt.tz_convert(CAISO_TZ).dt.date
+        # Rows spilling onto days outside this upsert would duplicate stored ones
+        frame = frame[frame["_day"].isin(day_values)]
+        self._con.register("_frame", frame)
+        try:
+            self._con.execute(f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM _frame LIMIT 0")
+            # gridstatus occasionally adds columns; widen the table rather than fail
+            existing = {row[0] for row in self._con.execute(f"DESCRIBE {table}").fetchall()}
+            for column, column_type, *_ in self._con.execute("DESCRIBE _frame").fetchall():
+                if column not in existing:
+                    self._con.execute(f'ALTER TABLE {table} ADD COLUMN "{column}" {column_type}')
+            self._delete_days(table, params, day_values)
+            self._con.execute(f"INSERT INTO {table} BY NAME SELECT * FROM _frame")
+        finally:
+            self._con.unregister("_frame")
+
+    def read(self, dataset: str, params: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """Read stored rows for the days in [start, end), ordered by interval."""
+        table = f'"{dataset}"'
+        with self._lock:
+            if not self._has_table(dataset):
+                return pd.DataFrame()
+            return self._con.execute(
+                f'SELECT * EXCLUDE (_params, _day) FROM {table} '
+                f'WHERE _params = ? AND _day >= ? AND _day < ? ORDER BY "Interval Start"',
+                [params, start.date(), end.date()],
+            ).df()
+
+
+class StoredClient:
+    """
+    Proxy in front of a gridstatus client that serves closed days of the
+    datasets in STORED_METHODS from a TimeSeriesStore.
+
+    Live queries ("latest", "today"), the still-open current day and the
+    SETTLEMENT_LAG_DAYS before it always go to the wrapped client; every
+    other attribute passes through unchanged.
+    """
+
+    def __init__(self, client: Any, store: TimeSeriesStore | None = None):
+        self._client = client
+        self._store = store
+        self._store_lock = threading.Lock()
+
+    @property
+    def store(self) -> TimeSeriesStore:
+        # Opened on first range query so live-only sessions never touch the file
+        with self._store_lock:
+            if self._store is None:
+                self._store = TimeSeriesStore()
+            return self._store
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name not in STORED_METHODS or not callable(attr):
+            return attr
+        return self._stored_method(name, attr)
+
+    def _stored_method(self, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        dataset = STORED_METHODS[name]
+        supports_end = "end" in inspect.signature(method).parameters
+
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            arguments = bind_arguments(method, args, kwargs)
+            start = to_caiso_timestamp(arguments.get("date"))
+            if start is None:
+                return method(*args, **kwargs)
+
+            end = arguments.get("end")
+            stop = to_caiso_timestamp(end) if end is not None else start.normalize() + pd.Timedelta(days=1)
+            if stop is None:
+                return method(*args, **kwargs)
+
+            first_day = start.normalize()
+            last_day = stop.normalize() if stop == stop.normalize() else stop.normalize() + pd.Timedelta(days=1)
+            settled = settled_cutoff()
+            closed_end = min(last_day, settled)
+
+            params = _params_key(arguments)
+            frames = []
+            if first_day < closed_end:
+                for run_start, run_end in _day_runs(self.store.missing_days(dataset, params, first_day, closed_end)):
+                    fetched = self._fetch(method, arguments, supports_end, run_start, run_end)
+                    days = list(pd.date_range(run_start, run_end, freq="D", inclusive="left"))
+                    self.store.upsert(dataset, params, days, fetched)
+                frames.append(self.store.read(dataset, params, first_day, closed_end))
+
+            if last_day > settled:
+                # The current day and the settlement lag are still being published; never store them
+                frames.append(self._fetch(method, arguments, supports_end, max(first_day, settled), last_day))
+
+            frames = [frame for frame in frames if not frame.empty]
+            if not frames:
+                return pd.DataFrame()
+            df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+            in_window = (df["Interval Start"] >= start) & (df["Interval Start"] < stop)
+            return df[in_window].reset_index(drop=True)
+
+        return call
+
+    def _fetch(
+        self,
+        method: Callable[..., Any],
+        arguments: dict[str, Any],
+        supports_end: bool,
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+    ) -> pd.DataFrame:
+        """Fetch [start, end) from the wrapped client, day by day in parallel if it has no end argument."""
+        arguments = {k: v for k, v in arguments.items() if k not in ("date", "end")}
+        if supports_end:
+            return method(date=start, end=end, **arguments)
+        calls = [
+            functools.partial(method, date=day, **arguments)
+            for day in pd.date_range(start, end, freq="D", inclusive="left")
+        ]
+        return stitch(range_fetcher.map(calls))
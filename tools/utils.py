@@ -1,15 +1,59 @@
-import gridstatus
+from typing import Any
+from tools.aio import async_tool
+from tools.grid import caiso
+from tools.node_search import NodeDirectory, TYPE_TERMS
+from tools.weather import NODE_COORDINATES, node_geography
 
-def search_caiso_nodes(query: str, limit: int = 10):
+# OASIS node list cached on disk and indexed in memory; searches never hit OASIS
+# unless the cached list is missing or due for its periodic refresh
+node_directory = NodeDirectory(
+    lambda: caiso.get_pnodes(),
+    builtin=NODE_COORDINATES,
+    zone_of=node_geography.zone,
+)
+
+
+def search_caiso_nodes(
+    query: str,
+    limit: int = 10,
+    zone: str | None = None,
+    node_type: str | None = None,
+) -> dict[str, Any]:
     """
-    Search for CAISO pricing nodes by name.
+    Search CAISO pricing nodes (trading hubs, LAPs, aggregated and individual pnodes) by name.
     Useful for finding specific generators, substations, or load zones.
+
+    Matches exact IDs, ID prefixes, name parts (e.g. "MOSSLD" in "MOSSLD_2_PSP1"),
+    substrings and misspellings, best first. Words like "hub", "dlap", "slap",
+    "apnode" or "pnode" in the query filter by node type, and a zone name next to
+    other words (e.g. "SP15 hub") filters by zone.
+
+    Args:
+        query: Node name or part of it, optionally with type/zone words.
+        limit: Maximum number of matches to return. Defaults to 10.
+        zone: Only return nodes in this zone (NP15, SP15 or ZP26). Optional.
+        node_type: Only return nodes of this type: trading_hub, dlap, slap, elap,
+            apnode or pnode (or "hub"/"lap"). Optional.
+
+    Returns:
+        Dictionary with ranked matches (node_id, type, zone when known, score,
+        match kind) and the status of the cached node list.
     """
-    iso = gridstatus.CAISO()
-    
-    # gridstatus may have a method for this, or you pull the full list once
-    # and cache it. CAISO publishes the master node list on OASIS.
-    all_nodes = iso.get_pnode_ids()  # Check if this exists in your version
-    
-    matches = [n for n in all_nodes if query.lower() in n.lower()]
-    return matches[:limit]
\ No newline at end of file
+    try:
+        index = node_directory.index()
+        node_types = None
+        if node_type:
+            kind = node_type.strip().lower()
+            node_types = TYPE_TERMS.get(kind.upper(), {kind})
+        matches = index.search(query, limit=limit, zone=zone, node_types=node_types)
+        return {
+            "query": query,
+            "matches": matches,
+            "node_list": node_directory.status(),
+        }
+    except Exception as e:
+        return {"error": f"Failed to search CAISO nodes: {str(e)}"}
+
+
+# Async variant registered with the Market agent; the first search may download the node list
+search_caiso_nodes_async = async_tool(search_caiso_nodes)
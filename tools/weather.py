@@ -1,10 +1,18 @@
-import gridstatus
-from typing import List, Optional
-import requests
-from geopy.geocoders import Nominatim
+import warnings
+from typing import Any, List, Optional
 from datetime import datetime, timedelta
+from tools.aio import async_tool, async_variant, gather_blocking
+from tools.geocode import GeocodeResolver
+from tools.grid import caiso
+from tools.lazy import lazy_import
+from tools.nodes import NodeGeography
+from tools.weather_data import HOURLY_VARIABLES, date_range, value_at, weather_data
+from tools.zonal import SYSTEM, ZONAL_INDICES, ZONES, hourly_cubes, zonal_indices
 
-geolocator = Nominatim(user_agent="gridpilot")
+np = lazy_import("numpy")
+
+# Weather history for the zonal indices is requested in pieces of this many days
+ZONAL_HISTORY_CHUNK_DAYS = 92
 
 # Location aliases for common abbreviations
 LOCATION_ALIASES = {
@@ -29,7 +37,7 @@ CAISO_HUBS = {
     "ZP26": "TH_ZP26_GEN-APND",  # Central (Fresno)
 }
 
-# CAISO node coordinates (you'd load this from CAISO's master node file)
+# Trading hub coordinates; other nodes come from the node list loaded by node_geography
 NODE_COORDINATES = {
     "TH_NP15_GEN-APND": {"lat": 38.5, "lon": -121.5, "zone": "NP15", "type": "HUB"},
     "TH_SP15_GEN-APND": {"lat": 34.0, "lon": -118.2, "zone": "SP15", "type": "HUB"},
@@ -61,26 +69,90 @@ CAISO_WEATHER_POINTS = {
     ]
 }
 
+# Node coordinates from the local node list (GRIDPILOT_NODES_PATH) plus the hubs above
+node_geography = NodeGeography(CAISO_WEATHER_POINTS, builtin_nodes=NODE_COORDINATES)
+
+# Weather points, nodes and hub shorthands resolve from these tables without geocoding
+geocoder = GeocodeResolver(
+    known={
+        **{point["name"]: point for points in CAISO_WEATHER_POINTS.values() for point in points},
+        **{node_id: {"name": node_id, **node} for node_id, node in NODE_COORDINATES.items()},
+        **{hub: {"name": node_id, **NODE_COORDINATES[node_id]} for hub, node_id in CAISO_HUBS.items()},
+    },
+    aliases=LOCATION_ALIASES,
+)
+
+
+def resolve_node(node: str) -> str:
+    """Hub short name (NP15/SP15/ZP26) or node ID -> node ID."""
+    node = node.strip().upper()
+    return CAISO_HUBS.get(node, node)
+
+
 def get_weather_locations_for_node(node_id: str) -> dict:
     """
     Determines which weather locations are relevant for predicting 
     price at a given CAISO node.
     
     Returns locations for both load (temperature-driven demand) and 
-    renewables (generation that sets marginal price).
+    renewables (generation that sets marginal price), plus the nearest
+    weather point of each kind to the node itself. Accepts a node ID, a hub
+    shorthand or a site name from the site price files; a site node with no
+    known coordinates is resolved by its zone only.
     """
     
     # Resolve node
     if node_id.upper() in ["NP15", "SP15", "ZP26"]:
         node_id = f"TH_{node_id.upper()}_GEN-APND"
     
-    node = NODE_COORDINATES.get(node_id)
+    node = node_geography.lookup(node_id)
     if not node:
-        return {"error": f"Unknown node: {node_id}. Try NP15, SP15, or ZP26."}
+        return {"error": f"Unknown node: {node_id}. Try NP15, SP15, ZP26 or a node ID from the CAISO node list."}
     
-    zone = node["zone"]
-    node_location = (node["lat"], node["lon"])
+    return {
+        "node_id": node["node_id"],
+        "node_location": {"lat": node["lat"], "lon": node["lon"]},
+        "nearest_weather_points": node["nearest_weather_points"],
+        **({"sites": node["sites"]} if node.get("sites") else {}),
+        **_zone_weather_locations(node["zone"], subject=node["node_id"]),
+    }
+
+def get_weather_locations_for_nodes(node_ids: List[str]) -> dict:
+    """
+    Bulk version of get_weather_locations_for_node for a portfolio of CAISO nodes.
     
+    Args:
+        node_ids: Node IDs (or NP15/SP15/ZP26 shorthands).
+    
+    Returns:
+        Dict with each node's zone, coordinates and nearest load/solar/wind
+        weather points, the relevant weather locations once per zone, and any
+        unknown node IDs.
+    """
+    resolved = [
+        f"TH_{node_id.upper()}_GEN-APND" if node_id.upper() in ["NP15", "SP15", "ZP26"] else node_id
+        for node_id in node_ids
+    ]
+    found, unknown = node_geography.lookup_many(resolved)
+    nodes = {
+        node_id: {
+            "zone": node["zone"],
+            "lat": node["lat"],
+            "lon": node["lon"],
+            "nearest_weather_points": node["nearest_weather_points"],
+            **({"sites": node["sites"]} if node.get("sites") else {}),
+        }
+        for node_id, node in found.items()
+    }
+    zones = sorted({node["zone"] for node in found.values()})
+    return {
+        "nodes": nodes,
+        "zones": {zone: _zone_weather_locations(zone) for zone in zones},
+        "unknown_nodes": unknown,
+    }
+
+def _zone_weather_locations(zone: str, subject: Optional[str] = None) -> dict:
+    """Weighted load, solar and wind weather locations for a zone (subject names it in the query hint)."""
     # Get load centers in this zone, weighted by population
     zone_loads = [loc for loc in CAISO_WEATHER_POINTS["load"] if loc["zone"] == zone]
     zone_loads_sorted = sorted(zone_loads, key=lambda x: x["population"], reverse=True)
@@ -110,7 +182,6 @@ def get_weather_locations_for_node(node_id: str) -> dict:
         note = "NP15 is more load-driven; less local solar impact"
     
     return {
-        "node_id": node_id,
         "zone": zone,
         "analysis_note": note,
         "weather_locations": {
@@ -130,7 +201,7 @@ def get_weather_locations_for_node(node_id: str) -> dict:
                 "metric": "wind speed (drives wind output)"
             }
         },
-        "recommended_query": f"For {node_id}, check temps in {zone_loads_sorted[0]['name'] if zone_loads_sorted else 'N/A'} "
+        "recommended_query": f"For {subject or zone}, check temps in {zone_loads_sorted[0]['name'] if zone_loads_sorted else 'N/A'} "
                             f"and solar conditions in {zone_solar[0]['name'] if zone_solar else 'Mojave Desert, CA'}"
     }
 
@@ -151,107 +222,324 @@ def get_caiso_forecasts(
         Dict with load forecast and day-ahead LMPs for requested locations.
     """
     try:
-        iso = gridstatus.CAISO()
-        
-        # Resolve location shorthand to full node IDs
-        if locations is None:
-            locations = ["NP15", "SP15"]
-        
-        resolved_locations = []
-        for loc in locations:
-            if loc.upper() in CAISO_HUBS:
-                resolved_locations.append(CAISO_HUBS[loc.upper()])
-            else:
-                # Assume it's already a full node ID
-                resolved_locations.append(loc)
+        resolved_locations = _resolve_locations(locations)
         
         # CAISO publishes load forecasts (system-wide, not nodal)
-        load_forecast = iso.get_load_forecast(date)
+        load_forecast = caiso.get_load_forecast(date)
         
         # Day-ahead prices for specified nodes
-        dam_prices = iso.get_lmp(
+        dam_prices = caiso.get_lmp(
             date=date,
             market="DAY_AHEAD_HOURLY",
             locations=resolved_locations
         )
         
-        return {
-            "date": date,
-            "locations_queried": resolved_locations,
-            "load_forecast": load_forecast.to_dict(),
-            "day_ahead_lmp": dam_prices.to_dict()
-        }
+        return _forecasts_summary(date, resolved_locations, load_forecast, dam_prices)
     except Exception as e:
         return f"Error: {str(e)}"
 
+def _forecasts_summary(date: str, resolved_locations: List[str], load_forecast, dam_prices) -> dict:
+    """Build the forecasts result from the load forecast and day-ahead LMP frames."""
+    return {
+        "date": date,
+        "locations_queried": resolved_locations,
+        "load_forecast": load_forecast.to_dict(),
+        "day_ahead_lmp": dam_prices.to_dict()
+    }
+
+def _resolve_locations(locations: Optional[List[str]]) -> List[str]:
+    """Resolve hub shorthand ("NP15") to full node IDs, defaulting to NP15 and SP15."""
+    if locations is None:
+        locations = ["NP15", "SP15"]
+    
+    resolved_locations = []
+    for loc in locations:
+        if loc.upper() in CAISO_HUBS:
+            resolved_locations.append(CAISO_HUBS[loc.upper()])
+        else:
+            # Assume it's already a full node ID
+            resolved_locations.append(loc)
+    return resolved_locations
+
+def _resolve_forecast_date(date: Optional[str]) -> str:
+    """Validate a YYYY-MM-DD date and clamp it to the range Open-Meteo serves."""
+    # Handle date - if not provided or invalid, use today
+    if not date or date == "today":
+        return datetime.now().strftime("%Y-%m-%d")
+
+    # Try to parse the date to validate format
+    try:
+        date_obj = datetime.strptime(date, "%Y-%m-%d")
+        # Open-Meteo has limits on forecast range (usually 16 days ahead)
+        max_date = datetime.now() + timedelta(days=15)
+        min_date = datetime.now() - timedelta(days=90)
+
+        if date_obj > max_date:
+            date = max_date.strftime("%Y-%m-%d")
+            print(f"Date too far in future, using {date}")
+        elif date_obj < min_date:
+            date = datetime.now().strftime("%Y-%m-%d")
+            print(f"Date too far in past, using today: {date}")
+    except ValueError:
+        date = datetime.now().strftime("%Y-%m-%d")
+        print(f"Invalid date format, using today: {date}")
+    return date
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return None if value is None or value != value else round(float(value), 1)
+
+def _nanmean(values) -> Optional[float]:
+    return float(np.nanmean(values)) if np.isfinite(values).any() else None
+
+def _nanmax(values) -> Optional[float]:
+    return float(np.nanmax(values)) if np.isfinite(values).any() else None
+
 def get_weather_forecast(location: str, date: str = None):
     """
     Retrieves the weather using Open-Meteo API for a given location and date.
-    Returns a simplified summary of the day's temperature curve.
+    Returns a simplified summary of the day's temperature curve, humidity,
+    cloud cover, solar radiation and wind.
 
     Args:
         location: City name (e.g., "Los Angeles, CA" or "LA")
         date: Date in YYYY-MM-DD format. If None, uses today's date.
 
     Returns:
-        Dict with temperature summary for the day
+        Dict with weather summary for the day
     """
     try:
-        # Handle location aliases
-        location_upper = location.upper().strip()
-        if location_upper in LOCATION_ALIASES:
-            location = LOCATION_ALIASES[location_upper]
-
-        # Handle date - if not provided or invalid, use today
-        if not date or date == "today":
-            date = datetime.now().strftime("%Y-%m-%d")
+        date = _resolve_forecast_date(date)
 
-        # Try to parse the date to validate format
-        try:
-            date_obj = datetime.strptime(date, "%Y-%m-%d")
-            # Open-Meteo has limits on forecast range (usually 16 days ahead)
-            max_date = datetime.now() + timedelta(days=15)
-            min_date = datetime.now() - timedelta(days=90)
-
-            if date_obj > max_date:
-                date = max_date.strftime("%Y-%m-%d")
-                print(f"Date too far in future, using {date}")
-            elif date_obj < min_date:
-                date = datetime.now().strftime("%Y-%m-%d")
-                print(f"Date too far in past, using today: {date}")
-        except ValueError:
-            date = datetime.now().strftime("%Y-%m-%d")
-            print(f"Invalid date format, using today: {date}")
-
-        loc = geolocator.geocode(location)
-        if not loc:
+        # Aliases, CAISO weather points and nodes resolve locally; other names are geocoded once
+        place = geocoder.resolve(location)
+        if not place:
             return {"error": f"Location '{location}' not found. Try full city name with state (e.g., 'Los Angeles, CA')"}
+        location = place["name"]
 
-        # Fetching hourly temperature
-        url = f"https://api.open-meteo.com/v1/forecast?latitude={loc.latitude}&longitude={loc.longitude}&hourly=temperature_2m&start_date={date}&end_date={date}&temperature_unit=fahrenheit&timezone=America/Los_Angeles"
-        response = requests.get(url)
-        data = response.json()
-
-        if "error" in data:
-            return {"error": data.get("reason", "Unknown error from weather API")}
-
-        hourly = data.get("hourly", {})
-        times = hourly.get("time", [])
-        temps = hourly.get("temperature_2m", [])
+        # One cached pull covers every variable; the summary is computed from the hourly arrays
+        hourly = weather_data.hourly([(place["lat"], place["lon"])], date)[0]
+        temps = hourly["temperature_2m"]
 
-        if not temps:
+        if not np.isfinite(temps).any():
             return {"error": "No temperature data available for this date"}
 
         # summarizing to save token context (temps now in Fahrenheit)
         summary = {
             "location": location,
             "date": date,
-            "max_temp_f": round(max(temps), 1) if temps else None,
-            "min_temp_f": round(min(temps), 1) if temps else None,
-            "noon_temp_f": round(temps[12], 1) if len(temps) > 12 else None,
-            "evening_peak_temp_f_1800": round(temps[18], 1) if len(temps) > 18 else None,
+            "max_temp_f": round(float(np.nanmax(temps)), 1),
+            "min_temp_f": round(float(np.nanmin(temps)), 1),
+            "noon_temp_f": _rounded(value_at(hourly, "temperature_2m", date, 12)),
+            "evening_peak_temp_f_1800": _rounded(value_at(hourly, "temperature_2m", date, 18)),
+            "avg_humidity_pct": _rounded(_nanmean(hourly["relative_humidity_2m"])),
+            "avg_cloud_cover_pct": _rounded(_nanmean(hourly["cloud_cover"])),
+            "peak_solar_radiation_wm2": _rounded(_nanmax(hourly["shortwave_radiation"])),
+            "max_wind_speed_10m_mph": _rounded(_nanmax(hourly["wind_speed_10m"])),
+            "max_wind_speed_100m_mph": _rounded(_nanmax(hourly["wind_speed_100m"])),
             "unit": "fahrenheit"
         }
         return str(summary)
     except Exception as e:
-        return f"Failed to fetch weather: {str(e)}"
\ No newline at end of file
+        return f"Failed to fetch weather: {str(e)}"
+
+
+# Hourly variables included in the system weather snapshot
+SNAPSHOT_VARIABLES = ["temperature_2m", "cloud_cover", "shortwave_radiation", "wind_speed_10m", "wind_speed_100m"]
+
+def get_caiso_weather_snapshot(
+    date: Optional[str] = None,
+    categories: Optional[List[str]] = None
+):
+    """
+    Fetches hourly weather for every CAISO weather point (load centers, solar
+    and wind sites) in a single Open-Meteo request.
+
+    Args:
+        date: Date in YYYY-MM-DD format. If None, uses today's date.
+        categories: Subset of "load", "solar", "wind". Defaults to all three.
+
+    Returns:
+        Dict with the locations queried, the hourly timestamps, and for each
+        variable one array per location aligned with "locations" (hourly
+        values plus daily max/min/mean).
+    """
+    try:
+        date = _resolve_forecast_date(date)
+        categories = categories or list(CAISO_WEATHER_POINTS)
+        unknown = [c for c in categories if c not in CAISO_WEATHER_POINTS]
+        if unknown:
+            return {"error": f"Unknown categories: {unknown}. Use load, solar or wind."}
+
+        points = [
+            {"category": category, **point}
+            for category in categories
+            for point in CAISO_WEATHER_POINTS[category]
+        ]
+
+        hourly = weather_data.hourly([(point["lat"], point["lon"]) for point in points], date)
+        times = hourly[0]["time"]
+        variables = {}
+        for variable in SNAPSHOT_VARIABLES:
+            # (locations, hours) matrix; missing values are NaN
+            values = np.vstack([entry[variable] for entry in hourly])
+            if not values.size:
+                continue
+            variables[variable] = {
+                "unit": HOURLY_VARIABLES[variable],
+                "hourly": np.round(values, 1).tolist(),
+                "daily_max": np.round(np.nanmax(values, axis=1), 1).tolist(),
+                "daily_min": np.round(np.nanmin(values, axis=1), 1).tolist(),
+                "daily_mean": np.round(np.nanmean(values, axis=1), 1).tolist(),
+            }
+
+        return {
+            "date": date,
+            "locations": [
+                {"name": p["name"], "category": p["category"], "zone": p["zone"], "lat": p["lat"], "lon": p["lon"]}
+                for p in points
+            ],
+            "times": times,
+            "variables": variables,
+        }
+    except Exception as e:
+        return {"error": f"Failed to fetch weather snapshot: {str(e)}"}
+
+# Longest range get_zonal_weather_indices accepts, in days
+MAX_INDEX_DAYS = 366
+
+def _rounded_list(values) -> list:
+    """Round an array to 0.1 and convert to nested lists with None for missing values."""
+    rounded = np.round(values, 1).astype(object)
+    rounded[~np.isfinite(values)] = None
+    return rounded.tolist()
+
+def get_zonal_weather_indices(
+    start_date: str,
+    end_date: Optional[str] = None,
+    zones: Optional[List[str]] = None,
+    resolution: str = "daily"
+):
+    """
+    Computes weather indices for CAISO zones over a date range: population-weighted
+    temperature and humidity over load centers, capacity-weighted cloud cover and
+    solar radiation over solar sites, and capacity-weighted 100m wind speed over
+    wind sites. Zones without their own solar or wind sites use system-wide weights.
+
+    Args:
+        start_date: First date in YYYY-MM-DD format.
+        end_date: Last date in YYYY-MM-DD format (inclusive). Defaults to start_date.
+        zones: Any of "NP15", "SP15", "ZP26", "CAISO" (system-wide). Defaults to all.
+        resolution: "daily" for daily mean/min/max per index, or "hourly" for
+            one 24-value array per day.
+
+    Returns:
+        Dict with the dates covered and, per zone and index, values aligned with "dates".
+    """
+    try:
+        end_date = end_date or start_date
+        try:
+            first = datetime.strptime(start_date, "%Y-%m-%d")
+            last = datetime.strptime(end_date, "%Y-%m-%d")
+        except ValueError:
+            return {"error": "Dates must be in YYYY-MM-DD format"}
+        if last < first:
+            return {"error": "end_date must not be before start_date"}
+        if (last - first).days + 1 > MAX_INDEX_DAYS:
+            return {"error": f"Range too long; request at most {MAX_INDEX_DAYS} days"}
+        if last > datetime.now() + timedelta(days=15):
+            return {"error": "Forecasts are only available up to 15 days ahead"}
+        if resolution not in ("daily", "hourly"):
+            return {"error": "resolution must be 'daily' or 'hourly'"}
+
+        zones = [zone.upper() for zone in zones] if zones else [*ZONES, SYSTEM]
+        unknown = [zone for zone in zones if zone not in ZONES and zone != SYSTEM]
+        if unknown:
+            return {"error": f"Unknown zones: {unknown}. Use NP15, SP15, ZP26 or CAISO."}
+
+        points = [
+            {"category": category, **point}
+            for category, category_points in CAISO_WEATHER_POINTS.items()
+            for point in category_points
+        ]
+        point_days = weather_data.hourly_range([(p["lat"], p["lon"]) for p in points], start_date, end_date)
+        variables = {spec["variable"] for spec in ZONAL_INDICES.values()}
+        cubes = hourly_cubes(point_days, sorted(variables))
+        indices, fallbacks = zonal_indices(points, cubes, zones)
+
+        result = {}
+        for z, zone in enumerate(zones):
+            result[zone] = {}
+            for name, values in indices.items():
+                zone_values = values[z]
+                if resolution == "hourly":
+                    result[zone][name] = {"hourly": _rounded_list(zone_values)}
+                    continue
+                # Days with no data at all come back as None
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", RuntimeWarning)
+                    daily = {
+                        "daily_mean": np.nanmean(zone_values, axis=1),
+                        "daily_min": np.nanmin(zone_values, axis=1),
+                        "daily_max": np.nanmax(zone_values, axis=1),
+                    }
+                result[zone][name] = {key: _rounded_list(value) for key, value in daily.items()}
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "resolution": resolution,
+            "dates": [day.strftime("%Y-%m-%d") for day in date_range(start_date, end_date)],
+            "zones": result,
+            "system_weighted_fallbacks": {name: zs for name, zs in fallbacks.items() if zs},
+        }
+    except Exception as e:
+        return {"error": f"Failed to compute zonal weather indices: {str(e)}"}
+
+
+def zonal_weather_history(first_day: Any, n_days: int, names: list[str], zones: list[str]) -> dict[str, Any]:
+    """
+    Hourly zonal weather indices for n_days from first_day (a Pacific
+    midnight), index name -> (zone x day x 24), fetched in pieces of
+    ZONAL_HISTORY_CHUNK_DAYS days.
+    """
+    points = [
+        {"category": category, **point}
+        for category, category_points in CAISO_WEATHER_POINTS.items()
+        for point in category_points
+    ]
+    indices = {name: ZONAL_INDICES[name] for name in names}
+    variables = sorted({spec["variable"] for spec in indices.values()})
+    parts: dict[str, list[Any]] = {name: [] for name in names}
+    for offset in range(0, n_days, ZONAL_HISTORY_CHUNK_DAYS):
+        start = first_day + timedelta(days=offset)
+        end = first_day + timedelta(days=min(offset + ZONAL_HISTORY_CHUNK_DAYS, n_days) - 1)
+        point_days = weather_data.hourly_range(
+            [(p["lat"], p["lon"]) for p in points], start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+        )
+        values, _ = zonal_indices(points, hourly_cubes(point_days, variables), zones, indices)
+        for name in names:
+            parts[name].append(values[name])
+    return {name: np.concatenate(chunks, axis=1) for name, chunks in parts.items()}
+
+# Async variants registered with the Weather agent; blocking HTTP runs on the tool executor
+
+@async_variant(get_caiso_forecasts)
+async def get_caiso_forecasts_async(
+    date: str,
+    locations: Optional[List[str]] = None
+):
+    try:
+        resolved_locations = _resolve_locations(locations)
+        
+        # Load forecast and DA prices are independent; fetch them together
+        load_forecast, dam_prices = await gather_blocking(
+            lambda: caiso.get_load_forecast(date),
+            lambda: caiso.get_lmp(date=date, market="DAY_AHEAD_HOURLY", locations=resolved_locations),
+        )
+        return _forecasts_summary(date, resolved_locations, load_forecast, dam_prices)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+get_weather_forecast_async = async_tool(get_weather_forecast)
+get_caiso_weather_snapshot_async = async_tool(get_caiso_weather_snapshot)
+get_zonal_weather_indices_async = async_tool(get_zonal_weather_indices)
@@ -0,0 +1,232 @@
+"""
+Hourly weather data layer over Open-Meteo.
+Fetches every variable the weather tools use in one request, batching all
+uncached points into a single multi-coordinate call, and caches the full
+hourly arrays per (lat, lon, date, model run) so tool summaries are computed
+from memory instead of re-downloading.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any
+from tools.cache import IntervalCache, flights
+from tools.http_client import http_client
+from tools.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Overridable so the tools can run against a local stub server
+OPEN_METEO_URL = os.getenv("GRIDPILOT_OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+OPEN_METEO_ARCHIVE_URL = os.getenv("GRIDPILOT_OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+# Days back the forecast API serves; older ranges use the archive API
+FORECAST_PAST_DAYS = 90
+WEATHER_TZ = "America/Los_Angeles"
+
+# Hourly variables fetched for every point, with the units requested for them
+HOURLY_VARIABLES = {
+    "temperature_2m": "fahrenheit",
+    "relative_humidity_2m": "percent",
+    "cloud_cover": "percent",
+    "shortwave_radiation": "W/m2",
+    "wind_speed_10m": "mph",
+    "wind_speed_100m": "mph",
+}
+
+# Hours between forecast updates; cached forecasts for today and later are
+# refetched once a newer run is due, past days never change
+MODEL_RUN_HOURS = int(os.getenv("GRIDPILOT_WEATHER_RUN_HOURS", "1"))
+# Seconds before a past day the API returned no values for is asked for again
+EMPTY_DAY_RETRY_SECONDS = 3600
+
+
+def model_run(date: str, now: float | None = None) -> tuple[str, float | None]:
+    """
+    Return (run id, expiry epoch) for data about `date`.
+
+    Past days are served as "final" and never expire; otherwise the run is the
+    current UTC update cycle and expires when the next one starts.
+    """
+    if now is None:
+        now = time.time()
+    today = datetime.now().strftime("%Y-%m-%d")
+    if date < today:
+        return "final", None
+    period = MODEL_RUN_HOURS * 3600
+    start = int(now // period) * period
+    return time.strftime("%Y-%m-%dT%HZ", time.gmtime(start)), start + period
+
+
+def date_range(start: str, end: str) -> list[datetime]:
+    """Calendar days from start to end inclusive (YYYY-MM-DD strings)."""
+    first, last = datetime.strptime(start, "%Y-%m-%d"), datetime.strptime(end, "%Y-%m-%d")
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+def _point(lat: float, lon: float) -> tuple[float, float]:
+    # Open-Meteo resolves to grid cells far coarser than 1e-4 degrees
+    return round(float(lat), 4), round(float(lon), 4)
+
+
+class HourlyWeatherCache:
+    """
+    Cache of hourly Open-Meteo arrays per point and date.
+
+    Each entry is a dict with "time" (local "YYYY-MM-DDTHH:MM" strings), "hour"
+    (local hour of day for each time) and one float array per HOURLY_VARIABLES key, NaN where the API had no value.
+    Arrays are read-only because entries are shared between callers.
+    """
+
+    def __init__(
+        self,
+        cache: IntervalCache | None = None,
+        url: str = OPEN_METEO_URL,
+        archive_url: str = OPEN_METEO_ARCHIVE_URL,
+    ):
+        # One entry per point-day; sized for a year of history at every CAISO weather point
+        self._cache = cache if cache is not None else IntervalCache(max_entries=8192)
+        self._url = url
+        self._archive_url = archive_url
+
+    def hourly(self, points: list[tuple[float, float]], date: str) -> list[dict[str, Any]]:
+        """
+        Return hourly arrays for each (lat, lon) point on date, in order.
+
+        Points missing from the cache are fetched together in one request.
+
+        Raises:
+            ValueError: If the weather API returns an error or a mismatched result.
+        """
+        return [days[0] for days in self.hourly_range(points, date, date)]
+
+    def hourly_range(self, points: list[tuple[float, float]], start: str, end: str) -> list[list[dict[str, Any]]]:
+        """
+        Return hourly arrays for each point and each day in [start, end], as
+        one list of per-day entries per point.
+
+        Every uncached (point, day) is covered by a single request spanning
+        the missing points and days; the response is split and cached by day.
+
+        Raises:
+            ValueError: If the weather API returns an error or a mismatched result.
+        """
+        points = [_point(lat, lon) for lat, lon in points]
+        dates = [day.strftime("%Y-%m-%d") for day in date_range(start, end)]
+        runs = {date: model_run(date) for date in dates}
+
+        found = {}
+        missing_points, missing_dates = [], []
+        for point in dict.fromkeys(points):
+            for date in dates:
+                key = ("open-meteo", *point, date, runs[date][0])
+                hit, value = self._cache.get(key)
+                if hit:
+                    found[key] = value
+                else:
+                    missing_points.append(point)
+                    missing_dates.append(date)
+
+        if missing_points:
+            fetch_points = list(dict.fromkeys(missing_points))
+            first, last = min(missing_dates), max(missing_dates)
+            for point, by_day in zip(fetch_points, self._fetch(fetch_points, first, last)):
+                for date, entry in by_day.items():
+                    run, expires_at = runs.get(date) or model_run(date)
+                    if expires_at is None and not _has_values(entry):
+                        # Not published yet rather than final; retry later instead of caching the gap forever
+                        expires_at = time.time() + EMPTY_DAY_RETRY_SECONDS
+                    key = ("open-meteo", *point, date, run)
+                    self._cache.set(key, entry, expires_at)
+                    found[key] = entry
+
+        empty = {"time": [], "hour": np.zeros(0, dtype=int), **{variable: np.full(0, np.nan) for variable in HOURLY_VARIABLES}}
+        return [
+            [found.get(("open-meteo", *point, date, runs[date][0]), empty) for date in dates]
+            for point in points
+        ]
+
+    def _fetch(self, points: list[tuple[float, float]], start: str, end: str) -> list[dict[str, dict[str, Any]]]:
+        """
+        Fetch [start, end] for points; returns {date: entry} per point.
+
+        The forecast API only reaches ~3 months back and the archive lags the
+        present by days, so a range crossing that boundary is split: older
+        days from the archive, the rest from the forecast API.
+        """
+        oldest_forecast = (datetime.now() - timedelta(days=FORECAST_PAST_DAYS)).strftime("%Y-%m-%d")
+        if start >= oldest_forecast:
+            return self._request(self._url, points, start, end)
+        if end < oldest_forecast:
+            return self._request(self._archive_url, points, start, end)
+        last_archive = (datetime.strptime(oldest_forecast, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+        archive = self._request(self._archive_url, points, start, last_archive)
+        forecast = self._request(self._url, points, oldest_forecast, end)
+        return [{**old, **recent} for old, recent in zip(archive, forecast)]
+
+    def _request(self, base_url: str, points: list[tuple[float, float]], start: str, end: str) -> list[dict[str, dict[str, Any]]]:
+        """Fetch [start, end] for points from one endpoint in one request."""
+        # Open-Meteo accepts comma-separated coordinates and returns one result per point, in order
+        url = (
+            f"{base_url}?latitude={','.join(str(lat) for lat, _ in points)}"
+            f"&longitude={','.join(str(lon) for _, lon in points)}"
+            f"&hourly={','.join(HOURLY_VARIABLES)}&start_date={start}&end_date={end}"
+            f"&temperature_unit=fahrenheit&wind_speed_unit=mph&timezone={WEATHER_TZ}"
+        )
+        data = flights.do(("open-meteo", url), lambda: http_client.get_json(url))
+
+        if isinstance(data, dict) and "error" in data:
+            raise ValueError(data.get("reason", "Unknown error from weather API"))
+        results = data if isinstance(data, list) else [data]
+        if len(results) != len(points):
+            raise ValueError(f"Weather API returned {len(results)} locations for {len(points)} requested")
+
+        by_point = []
+        for result in results:
+            hourly = result.get("hourly", {})
+            times = list(hourly.get("time", []))
+            columns = {
+                variable: np.array([np.nan if v is None else v for v in hourly.get(variable, [])], dtype=float)
+                for variable in HOURLY_VARIABLES
+            }
+            stamps = np.array(times, dtype="datetime64[m]")
+            local_hour = (stamps.astype("datetime64[h]") - stamps.astype("datetime64[D]")).astype(int)
+            # Split on the local date prefix, so 23- and 25-hour DST days stay intact
+            bounds: dict[str, list[int]] = {}
+            for i, time_ in enumerate(times):
+                bounds.setdefault(time_[:10], [i, i])[1] = i + 1
+            by_day = {}
+            for date, (lo, hi) in bounds.items():
+                entry = {"time": times[lo:hi], "hour": local_hour[lo:hi]}
+                for variable, values in columns.items():
+                    day_values = values[lo:hi].copy()
+                    day_values.flags.writeable = False
+                    entry[variable] = day_values
+                by_day[date] = entry
+            by_point.append(by_day)
+        return by_point
+
+    def stats(self) -> dict[str, Any]:
+        return self._cache.stats()
+
+
+def _has_values(entry: dict[str, Any]) -> bool:
+    """Whether any variable of a day entry has a non-NaN value."""
+    return any(np.isfinite(entry[variable]).any() for variable in HOURLY_VARIABLES)
+
+
+def value_at(entry: dict[str, Any], variable: str, date: str, hour: int) -> float | None:
+    """Value of variable at local hour on date, matched by timestamp rather than position."""
+    stamp = f"{date}T{hour:02d}:00"
+    try:
+        index = entry["time"].index(stamp)
+    except ValueError:
+        return None
+    values = entry[variable]
+    if index >= len(values) or np.isnan(values[index]):
+        return None
+    return float(values[index])
+
+
+weather_data = HourlyWeatherCache()
@@ -0,0 +1,115 @@
+"""
+Zonal weather indices for CAISO trading zones.
+Turns hourly weather at every CAISO weather point into NP15/SP15/ZP26 (and
+system-wide) indices with weight-matrix contractions over
+(location x day x hour) cubes, so months of history reduce in one pass.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+from tools.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+ZONES = ["NP15", "SP15", "ZP26"]
+SYSTEM = "CAISO"
+
+# index -> which weather points it averages, what weights them and which variable it reads
+ZONAL_INDICES = {
+    "temperature_f": {"category": "load", "weight": "population", "variable": "temperature_2m"},
+    "humidity_pct": {"category": "load", "weight": "population", "variable": "relative_humidity_2m"},
+    "cloud_cover_pct": {"category": "solar", "weight": "capacity_mw", "variable": "cloud_cover"},
+    "solar_radiation_wm2": {"category": "solar", "weight": "capacity_mw", "variable": "shortwave_radiation"},
+    "wind_speed_mph": {"category": "wind", "weight": "capacity_mw", "variable": "wind_speed_100m"},
+}
+
+
+def weight_matrix(points: list[dict[str, Any]], category: str, weight: str, zones: list[str]) -> tuple[np.ndarray, list[str]]:
+    """
+    Row-normalized (zone x location) weights for one index.
+
+    Zones without any point of the category fall back to the system-wide
+    weights; SYSTEM in zones always uses every point of the category.
+
+    Returns:
+        (weights, names of zones that fell back to system-wide weights)
+    """
+    raw = np.array([p.get(weight, 0) if p["category"] == category else 0 for p in points], dtype=float)
+    system = raw / raw.sum() if raw.sum() else raw
+    rows, fallbacks = [], []
+    for zone in zones:
+        if zone == SYSTEM:
+            rows.append(system)
+            continue
+        zonal = raw * np.array([p["zone"] == zone for p in points])
+        if zonal.sum():
+            rows.append(zonal / zonal.sum())
+        else:
+            rows.append(system)
+            fallbacks.append(zone)
+    return np.vstack(rows), fallbacks
+
+
+def hourly_cubes(point_days: list[list[dict[str, Any]]], variables: list[str], hours: int = 24) -> dict[str, np.ndarray]:
+    """
+    Stack per-point, per-day hourly entries into one (location x day x hour)
+    array per variable.
+
+    Values are placed by each entry's local "hour", so DST days with 23 or 25
+    hours leave a NaN gap or keep the later repeated hour.
+    """
+    shape = (len(point_days), len(point_days[0]) if point_days else 0, hours)
+    cubes = {variable: np.full(shape, np.nan) for variable in variables}
+    for i, days in enumerate(point_days):
+        for d, entry in enumerate(days):
+            hour = entry["hour"]
+            if not len(hour):
+                continue
+            for variable in variables:
+                cubes[variable][i, d, hour] = entry[variable]
+    return cubes
+
+
+def weighted_mean(weights: np.ndarray, cube: np.ndarray) -> np.ndarray:
+    """
+    NaN-aware weighted average of a (location x day x hour) cube into
+    (zone x day x hour): missing locations drop out and the remaining
+    weights are renormalized per cell.
+    """
+    present = np.isfinite(cube)
+    total = np.einsum("zl,ldh->zdh", weights, np.where(present, cube, 0.0))
+    mass = np.einsum("zl,ldh->zdh", weights, present.astype(float))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(mass > 0, total / mass, np.nan)
+
+
+def zonal_indices(
+    points: list[dict[str, Any]],
+    cubes: dict[str, np.ndarray],
+    zones: list[str] | None = None,
+    indices: dict[str, dict[str, str]] | None = None,
+) -> tuple[dict[str, np.ndarray], dict[str, list[str]]]:
+    """
+    Compute zonal indices from weather cubes.
+
+    Args:
+        points: Weather points with "category", "zone" and population/capacity_mw.
+        cubes: Variable name -> (location x day x hour) array aligned with points.
+        zones: Zones to compute; defaults to ZONES plus SYSTEM.
+        indices: Index definitions; defaults to ZONAL_INDICES.
+
+    Returns:
+        (index name -> (zone x day x hour) array, index name -> zones that
+        used system-wide weights because they have no points of that kind)
+    """
+    zones = zones or [*ZONES, SYSTEM]
+    indices = indices or ZONAL_INDICES
+    result, fallbacks = {}, {}
+    for name, spec in indices.items():
+        cube = cubes.get(spec["variable"])
+        if cube is None:
+            continue
+        weights, fallbacks[name] = weight_matrix(points, spec["category"], spec["weight"], zones)
+        result[name] = weighted_mean(weights, cube)
+    return result, fallbacks